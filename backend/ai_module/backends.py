@@ -0,0 +1,115 @@
+import os
+import re
+
+from backend.config import MODEL_BACKEND, MODEL_BACKEND_OVERRIDES, ONNX_CACHE_DIR
+
+BACKENDS = ("torch", "int8", "onnx")
+
+
+def parse_overrides(items: list[str]) -> dict:
+    """["translator_de_ru=int8", ...] -> {"translator_de_ru": "int8"}"""
+    overrides = {}
+    for item in items:
+        name, _, backend = item.partition("=")
+        if backend.strip() in BACKENDS:
+            overrides[name.strip()] = backend.strip()
+        else:
+            print(f"⚠️ Неизвестный бэкенд в MODEL_BACKEND_OVERRIDES: {item}")
+    return overrides
+
+
+def backend_for(name: str, default: str = MODEL_BACKEND, overrides: dict | None = None) -> str:
+    if overrides is None:
+        overrides = parse_overrides(MODEL_BACKEND_OVERRIDES)
+    backend = overrides.get(name, default)
+    return backend if backend in BACKENDS else "torch"
+
+
+# ---------------------------------------------------------
+#  Сборка пайплайна под выбранный бэкенд.
+#  torch / optimum импортируются только здесь и только когда нужны.
+# ---------------------------------------------------------
+def _pipeline_kwargs(spec: dict) -> dict:
+    """Всё, кроме task/model (src_lang, tgt_lang и т.п.)"""
+    return {k: v for k, v in spec.items() if k not in ("task", "model")}
+
+
+def _build_torch(spec: dict):
+    from transformers import pipeline
+
+    return pipeline(**spec)
+
+
+def _build_int8(spec: dict):
+    """fp32-модель с динамической int8-квантизацией Linear-слоёв (только CPU)"""
+    import torch
+
+    pipe = _build_torch(spec)
+    pipe.model = torch.quantization.quantize_dynamic(
+        pipe.model, {torch.nn.Linear}, dtype=torch.qint8
+    )
+    return pipe
+
+
+def onnx_dir(model_id: str, cache_dir: str = ONNX_CACHE_DIR) -> str:
+    return os.path.join(cache_dir, re.sub(r"[^\w.-]+", "__", model_id))
+
+
+def _ort_model_class(task: str):
+    """Класс ORT-модели под задачу: seq2seq (выжимки, переводы) или энкодер (эмбеддинги)"""
+    from optimum import onnxruntime
+
+    if task == "feature-extraction":
+        return onnxruntime.ORTModelForFeatureExtraction
+    return onnxruntime.ORTModelForSeq2SeqLM
+
+
+def export_onnx(spec: dict, cache_dir: str = ONNX_CACHE_DIR) -> str:
+    """
+    Один раз экспортирует модель в ONNX и кладёт в cache_dir
+    (вместе с токенизатором). Повторный вызов ничего не делает.
+    """
+    from transformers import AutoTokenizer
+
+    path = onnx_dir(spec["model"], cache_dir)
+    if os.path.isfile(os.path.join(path, "config.json")):
+        return path
+
+    print(f"📦 Экспорт {spec['model']} в ONNX (один раз) → {path}")
+    model = _ort_model_class(spec["task"]).from_pretrained(spec["model"], export=True)
+    model.save_pretrained(path)
+    AutoTokenizer.from_pretrained(spec["model"]).save_pretrained(path)
+    return path
+
+
+def _build_onnx(spec: dict):
+    from transformers import AutoTokenizer, pipeline
+
+    path = export_onnx(spec)
+    return pipeline(
+        spec["task"],
+        model=_ort_model_class(spec["task"]).from_pretrained(path),
+        tokenizer=AutoTokenizer.from_pretrained(path),
+        **_pipeline_kwargs(spec),
+    )
+
+
+_BUILDERS = {
+    "torch": _build_torch,
+    "int8": _build_int8,
+    "onnx": _build_onnx,
+}
+
+
+def build_pipeline(spec: dict, backend: str = "torch"):
+    """
+    HF-пайплайн для spec из MODEL_SPECS на нужном бэкенде -> (pipe, бэкенд).
+    Если зависимостей бэкенда нет (optimum / onnxruntime) — откат на torch.
+    """
+    if backend == "torch":
+        return _build_torch(spec), "torch"
+    try:
+        return _BUILDERS[backend](spec), backend
+    except ImportError as e:
+        print(f"⚠️ Бэкенд {backend} недоступен ({e}), используем torch")
+        return _build_torch(spec), "torch"
@@ -0,0 +1,50 @@
+from backend.config import INFERENCE_BATCH_SIZE
+
+
+def token_lengths(pipe, texts: list[str]) -> list[int]:
+    """Длина входов в токенах (или в словах, если токенизатора нет)"""
+    tokenizer = getattr(pipe, "tokenizer", None)
+    if tokenizer is not None:
+        try:
+            encoded = tokenizer(texts, add_special_tokens=False, truncation=False)
+            return [len(ids) for ids in encoded["input_ids"]]
+        except Exception:
+            pass
+    return [len(t.split()) for t in texts]
+
+
+def run_batched(pipe, texts: list[str], batch_size: int = INFERENCE_BATCH_SIZE, **kwargs) -> list:
+    """
+    Прогоняет тексты через huggingface pipeline батчами:
+    - сортирует по длине в токенах, чтобы меньше паддинга
+    - возвращает результаты в исходном порядке
+    - если батч упал, повторяет его по одному, ошибка = None только у плохого текста
+    """
+    results = [None] * len(texts)
+    if not texts:
+        return results
+
+    lengths = token_lengths(pipe, texts)
+    order = sorted(range(len(texts)), key=lambda i: lengths[i])
+    batch_size = max(1, batch_size)
+
+    for start in range(0, len(order), batch_size):
+        idx = order[start:start + batch_size]
+        batch = [texts[i] for i in idx]
+
+        try:
+            out = pipe(batch, batch_size=len(batch), **kwargs)
+            for i, item in zip(idx, out):
+                results[i] = item[0] if isinstance(item, list) else item
+            continue
+        except Exception as e:
+            print(f"⚠️ Батч из {len(batch)} текстов упал ({e}), повторяем по одному")
+
+        for i in idx:
+            try:
+                out = pipe(texts[i], **kwargs)
+                results[i] = out[0] if out else None
+            except Exception as e:
+                print(f"⚠️ Ошибка инференса: {e}")
+
+    return results
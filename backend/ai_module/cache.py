@@ -0,0 +1,109 @@
+import hashlib
+import threading
+from collections import OrderedDict, defaultdict
+
+from sqlalchemy import text
+
+from backend.config import SUMMARY_CACHE_SIZE
+from backend.db.database import SessionLocal
+
+
+# Какие колонки articles хранят результат для каждого вида кэша.
+# "de" проверяется по articles.content_hash, переводы — по хэшу summary_de.
+_DB_COLUMNS = {
+    "de": "summary_de",
+    "en": "summary_en",
+    "ru": "summary_ru",
+}
+
+
+def content_hash(value: str) -> str:
+    """Хэш текста, который уходит в модель"""
+    return hashlib.sha1(value.encode("utf-8")).hexdigest()
+
+
+class SummaryCache:
+    """
+    LRU-кэш выжимок и переводов:
+    - ключ: (вид, url, хэш входного текста)
+    - сначала память, потом таблица articles
+    - считает попадания и промахи по каждому виду
+    """
+
+    def __init__(self, maxsize: int = SUMMARY_CACHE_SIZE, session_maker=SessionLocal):
+        self.maxsize = maxsize
+        self._session_maker = session_maker
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = defaultdict(lambda: {"hits": 0, "db_hits": 0, "misses": 0})
+
+    def get(self, kind: str, url: str | None, key: str):
+        mem_key = (kind, url or "", key)
+        with self._lock:
+            if mem_key in self._data:
+                self._data.move_to_end(mem_key)
+                self._stats[kind]["hits"] += 1
+                return self._data[mem_key]
+
+        value = self._get_from_db(kind, url, key)
+        with self._lock:
+            if value is None:
+                self._stats[kind]["misses"] += 1
+                return None
+            self._stats[kind]["db_hits"] += 1
+        self._remember(mem_key, value)
+        return value
+
+    def put(self, kind: str, url: str | None, key: str, value: str):
+        if value:
+            self._remember((kind, url or "", key), value)
+
+    def _remember(self, mem_key, value):
+        with self._lock:
+            self._data[mem_key] = value
+            self._data.move_to_end(mem_key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def _get_from_db(self, kind: str, url: str | None, key: str):
+        column = _DB_COLUMNS.get(kind)
+        if not url or not column:
+            return None
+
+        session = self._session_maker()
+        try:
+            row = session.execute(
+                text(f"SELECT summary_de, content_hash, {column} FROM articles WHERE url = :url"),
+                {"url": url},
+            ).fetchone()
+        except Exception:
+            return None
+        finally:
+            session.close()
+
+        if not row or not row[2]:
+            return None
+
+        summary_de, stored_hash = row[0], row[1]
+        if kind == "de":
+            valid = stored_hash == key
+        else:
+            valid = bool(summary_de) and content_hash(summary_de) == key
+        return row[2] if valid else None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {kind: dict(counters) for kind, counters in self._stats.items()}
+
+    def stats_line(self) -> str:
+        parts = []
+        for kind, c in sorted(self.stats().items()):
+            parts.append(f"{kind}: hit={c['hits']} db={c['db_hits']} miss={c['misses']}")
+        return ", ".join(parts) or "пусто"
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+summary_cache = SummaryCache()
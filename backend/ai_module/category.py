@@ -1,4 +1,4 @@
-import re
+from backend.config import CATEGORY_LEAD_CHARS
 
 CATEGORIES = {
     "politics": [
@@ -26,12 +26,106 @@ CATEGORIES = {
     ]
 }
 
+# Совпадение в заголовке весит больше, чем в тексте
+TITLE_WEIGHT = 3
+
+
+def _build_keywords():
+    """
+    Таблица (слово, категория, только целым словом, более длинные слова с ним внутри).
+    Короткие ключевые слова (eu, ki, spd, gas…) — только целым словом,
+    иначе "eu" находится в "neue", а "ki" — в "Kinder".
+    Длинные ищем и внутри слова: немецкие составные слова
+    ("Bundesregierung", "Autoindustrie") иначе не поймать.
+    "regierung" внутри "bundesregierung" второй раз не считается.
+    """
+    keyword_category = {kw: cat for cat, kws in CATEGORIES.items() for kw in kws}
+    table = []
+    for kw, cat in keyword_category.items():
+        whole = len(kw) <= 3
+        longer = () if whole else tuple(
+            other for other in keyword_category if other != kw and kw in other and len(other) > 3
+        )
+        table.append((kw, cat, whole, longer))
+    return tuple(table)
+
+
+# Собирается один раз при импорте и дальше только читается —
+# категоризацию можно звать из нескольких потоков пула инференса
+_KEYWORDS = _build_keywords()
+_ORDER = {cat: i for i, cat in enumerate(CATEGORIES)}
+
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum() or ch == "_"
+
+
+def _count_words(text: str, kw: str) -> int:
+    """Вхождения kw целым словом (границы как у \\b)"""
+    count, start, size = 0, text.find(kw), len(kw)
+    while start != -1:
+        end = start + size
+        if (start == 0 or not _is_word_char(text[start - 1])) and (
+            end == len(text) or not _is_word_char(text[end])
+        ):
+            count += 1
+        start = text.find(kw, end)
+    return count
+
+
+def _lead(body: str, limit: int = CATEGORY_LEAD_CHARS) -> str:
+    """Начало текста до limit символов, по границе слова"""
+    if limit <= 0 or len(body) <= limit:
+        return body
+    return body[:limit].rpartition(" ")[0] or body[:limit]
+
+
+def score(title: str, body: str = "") -> dict:
+    """
+    Взвешенное число совпадений по каждой категории.
+    Тема статьи задаётся заголовком и лидом: текст смотрим только до CATEGORY_LEAD_CHARS.
+    """
+    title, body = title.lower(), _lead(body).lower()
+    # один проход поиска подстрок в C по заголовку и лиду вместе (как `kw in text`
+    # у старого цикла, но без выхода на первом совпадении); считаем только найденные
+    text = f"{title}\n{body}"
+    scores = {}
+    for kw, cat, whole, longer in [entry for entry in _KEYWORDS if entry[0] in text]:
+        if whole:
+            n = _count_words(title, kw) * TITLE_WEIGHT + _count_words(body, kw)
+        else:
+            n = title.count(kw) * TITLE_WEIGHT + body.count(kw)
+            for other in longer:
+                n -= title.count(other) * TITLE_WEIGHT + body.count(other)
+        if n > 0:
+            scores[cat] = scores.get(cat, 0) + n
+    return scores
+
+
+def categorize_scored(title: str, body: str = "") -> tuple[str, float]:
+    """
+    Категория с наибольшим счётом и уверенность (доля счёта лучшей категории).
+    При равенстве побеждает категория, стоящая раньше в CATEGORIES.
+    """
+    scores = score(title, body)
+    if not scores:
+        return "other", 0.0
+
+    best = min(scores, key=lambda cat: (-scores[cat], _ORDER[cat]))
+    return best, scores[best] / sum(scores.values())
+
+
 def categorize(text: str) -> str:
-    text = text.lower()
+    return categorize_scored("", text)[0]
 
-    for category, keywords in CATEGORIES.items():
-        for kw in keywords:
-            if kw in text:
-                return category
 
-    return "other"
+def categorize_many(items) -> list[tuple[str, float]]:
+    """Пакетная категоризация: items — пары (title, body) или словари с title/content"""
+    results = []
+    for item in items:
+        if isinstance(item, dict):
+            title, body = item.get("title", ""), item.get("content", "")
+        else:
+            title, body = item
+        results.append(categorize_scored(title or "", body or ""))
+    return results
@@ -0,0 +1,58 @@
+import math
+import re
+
+from backend.ai_module.batching import token_lengths
+from backend.config import SUMMARY_CHUNK_TOKENS, SUMMARY_MAX_CHUNKS
+
+# Конец предложения: . ! ? … и дальше заглавная буква, цифра или кавычка
+_SENTENCE_RE = re.compile(r"(?<=[.!?…])\s+(?=[A-ZÄÖÜ0-9„\"«])")
+
+
+def split_sentences(text: str) -> list[str]:
+    return [s.strip() for s in _SENTENCE_RE.split(text) if s.strip()]
+
+
+def _split_long(sentence: str, tokens: int, max_tokens: int):
+    """Предложение длиннее бюджета режем по словам на примерно равные части"""
+    if tokens <= max_tokens:
+        yield sentence, tokens
+        return
+
+    words = sentence.split()
+    parts = math.ceil(tokens / max_tokens)
+    step = math.ceil(len(words) / parts)
+    for start in range(0, len(words), step):
+        piece = words[start:start + step]
+        yield " ".join(piece), math.ceil(tokens * len(piece) / len(words))
+
+
+def chunk_text(
+    pipe,
+    text: str,
+    max_tokens: int = SUMMARY_CHUNK_TOKENS,
+    max_chunks: int = SUMMARY_MAX_CHUNKS,
+) -> list[str]:
+    """
+    Делит текст на куски не длиннее max_tokens токенов модели:
+    - границы кусков по предложениям
+    - длина считается токенизатором пайплайна (одним вызовом на все предложения)
+    - не больше max_chunks кусков, хвост статьи отбрасывается
+    """
+    sentences = split_sentences(text)
+    if not sentences:
+        return []
+
+    chunks, current, used = [], [], 0
+    for sentence, tokens in zip(sentences, token_lengths(pipe, sentences)):
+        for piece, n in _split_long(sentence, tokens, max_tokens):
+            if current and used + n > max_tokens:
+                chunks.append(" ".join(current))
+                if len(chunks) >= max_chunks:
+                    return chunks
+                current, used = [], 0
+            current.append(piece)
+            used += n
+
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
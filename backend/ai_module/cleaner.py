@@ -1,3 +1,4 @@
+import html
 import re
 from bs4 import BeautifulSoup
 
@@ -9,34 +10,70 @@ NAVIGATION_PHRASES = [
     "view this video",
 ]
 
+# Теги, комментарии или HTML-сущности — только тогда нужен парсер.
+# rust_core уже отдаёт текст абзацев, так что обычно разметки нет.
+_MARKUP_RE = re.compile(r"<[a-zA-Z/!][^>]*>")
+_ENTITY_RE = re.compile(r"&(?:#\d+|#x[0-9a-fA-F]+|[a-zA-Z]+);")
+
+# Все фразы одной регуляркой без учёта регистра; пробелы в фразах
+# совпадают с любым whitespace (переносы строк между словами).
+# Регулярка с IGNORECASE медленная на длинном тексте, поэтому сначала
+# дешёвая проверка `in` по тексту в нижнем регистре со схлопнутыми пробелами.
+_NAVIGATION_RE = re.compile(
+    "|".join(r"\s+".join(map(re.escape, p.split())) for p in NAVIGATION_PHRASES),
+    re.IGNORECASE,
+)
+
+
+def has_markup(text: str) -> bool:
+    return _MARKUP_RE.search(text) is not None
+
+
+def _strip_markup(text: str) -> str:
+    """Текст без тегов; BeautifulSoup — только если разметка действительно есть"""
+    if has_markup(text):
+        try:
+            soup = BeautifulSoup(text, "html.parser")
+            for tag in soup(["script", "style", "noscript"]):
+                tag.decompose()
+            return soup.get_text(separator=" ")
+        except Exception:
+            return text
+    if "&" in text and _ENTITY_RE.search(text):
+        return html.unescape(text)
+    return text
+
+
+def _collapse_ws(text: str) -> str:
+    # split() без аргументов режет по любому whitespace — быстрее re.sub(r"\s+")
+    return " ".join(text.split())
+
+
 def clean_html(text: str) -> str:
     """Удаляет HTML, переносы строк, скрипты."""
-    try:
-        soup = BeautifulSoup(text, "html.parser")
-        cleaned = soup.get_text(separator=" ")
-    except Exception:
-        cleaned = text
-
-    # убираем лишний whitespace
-    cleaned = re.sub(r"\s+", " ", cleaned).strip()
-    return cleaned
+    return _collapse_ws(_strip_markup(text))
 
 
 def remove_navigation_garbage(text: str) -> str:
-    """Удаляет типичный DW-мусор."""
-    lowered = text.lower()
-    for phrase in NAVIGATION_PHRASES:
-        if phrase in lowered:
-            lowered = lowered.replace(phrase, "")
-    return lowered.strip()
+    """Удаляет типичный DW-мусор (регистр остального текста сохраняется)."""
+    lowered = _collapse_ws(text).lower()
+    if not any(phrase in lowered for phrase in NAVIGATION_PHRASES):
+        return text.strip()
+    return _NAVIGATION_RE.sub(" ", text).strip()
 
 
 def clean_article(text: str) -> str:
-    """Полная очистка для пайплайна."""
+    """Полная очистка для пайплайна: разметка → навигация → пробелы."""
     if not text:
         return ""
 
-    text = clean_html(text)
-    text = remove_navigation_garbage(text)
-    text = re.sub(r"\s+", " ", text)
-    return text.strip()
+    text = _collapse_ws(_strip_markup(text))
+    lowered = text.lower()
+    if any(phrase in lowered for phrase in NAVIGATION_PHRASES):
+        text = _collapse_ws(_NAVIGATION_RE.sub(" ", text))
+    return text
+
+
+def clean_articles(texts) -> list[str]:
+    """Пакетная очистка списка текстов (регулярки уже скомпилированы)"""
+    return [clean_article(t) for t in texts]
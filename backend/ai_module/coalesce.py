@@ -0,0 +1,62 @@
+import asyncio
+import time
+
+from backend.config import COALESCE_REUSE_SECONDS
+
+
+class SingleFlight:
+    """
+    Склейка одинаковых запросов (single-flight) в event loop бота:
+    - пока вычисление по ключу идёт, новые вызовы ждут его же результата
+    - после завершения результат ещё reuse_seconds отдаётся без пересчёта
+      (только если reusable(result) — ошибки не кэшируем)
+    - ожидающий может быть отменён (таймаут, обрыв) — общее вычисление
+      защищено asyncio.shield и доводится до конца для остальных
+    Исключения получают все ожидающие, но не запоминаются.
+    """
+
+    def __init__(self, reuse_seconds: float = COALESCE_REUSE_SECONDS, reusable=None):
+        self.reuse_seconds = reuse_seconds
+        self._reusable = reusable or (lambda result: True)
+        self._inflight = {}  # ключ -> asyncio.Task
+        self._recent = {}  # ключ -> (время завершения, результат)
+        self._stats = {"runs": 0, "joined": 0, "reused": 0}
+
+    async def do(self, key: str, fn):
+        """fn — функция без аргументов, возвращающая корутину"""
+        recent = self._recent.get(key)
+        if recent is not None and time.monotonic() - recent[0] <= self.reuse_seconds:
+            self._stats["reused"] += 1
+            return recent[1]
+
+        task = self._inflight.get(key)
+        if task is None:
+            self._stats["runs"] += 1
+            task = asyncio.ensure_future(self._run(key, fn))
+            self._inflight[key] = task
+        else:
+            self._stats["joined"] += 1
+        return await asyncio.shield(task)
+
+    async def _run(self, key: str, fn):
+        try:
+            result = await fn()
+            if self.reuse_seconds > 0 and self._reusable(result):
+                self._recent[key] = (time.monotonic(), result)
+            return result
+        finally:
+            self._inflight.pop(key, None)
+
+    def forget(self, key: str | None = None):
+        """Сбросить запомненный результат (например, после свежего дайджеста)"""
+        if key is None:
+            self._recent.clear()
+        else:
+            self._recent.pop(key, None)
+
+    def stats(self) -> dict:
+        return {**self._stats, "inflight": len(self._inflight)}
+
+    def stats_line(self) -> str:
+        s = self.stats()
+        return f"запусков={s['runs']} склеено={s['joined']} повторно={s['reused']} в работе={s['inflight']}"
@@ -0,0 +1,171 @@
+import random
+import re
+import struct
+import threading
+import zlib
+
+from sqlalchemy import text
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from backend.config import (
+    DEDUPE_NUM_PERM,
+    DEDUPE_BANDS,
+    DEDUPE_THRESHOLD,
+    DEDUPE_WINDOW_DAYS,
+)
+from backend.db.database import SessionLocal
+from backend.db.models import ArticleSignature
+
+_WORD_RE = re.compile(r"\w+")
+_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+
+def shingles(title: str, content: str, k: int = 3, max_chars: int = 2000) -> set[str]:
+    """Словесные k-граммы заголовка и начала текста"""
+    words = _WORD_RE.findall(f"{title} {content[:max_chars]}".lower())
+    if len(words) < k:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + k]) for i in range(len(words) - k + 1)}
+
+
+class MinHasher:
+    """MinHash через num_perm универсальных хэш-функций (a*x + b) mod p"""
+
+    def __init__(self, num_perm: int = DEDUPE_NUM_PERM, seed: int = 1):
+        rnd = random.Random(seed)
+        self.num_perm = num_perm
+        self._perms = [(rnd.randrange(1, _PRIME), rnd.randrange(0, _PRIME)) for _ in range(num_perm)]
+
+    def signature(self, items: set[str]) -> list[int]:
+        hashes = [zlib.crc32(s.encode("utf-8")) for s in items]
+        if not hashes:
+            return [_MAX_HASH] * self.num_perm
+        return [
+            min(((a * h + b) % _PRIME) & _MAX_HASH for h in hashes)
+            for a, b in self._perms
+        ]
+
+
+def similarity(sig_a: list[int], sig_b: list[int]) -> float:
+    """Оценка коэффициента Жаккара по двум подписям"""
+    return sum(x == y for x, y in zip(sig_a, sig_b)) / len(sig_a)
+
+
+class NearDuplicateIndex:
+    """
+    Индекс почти-дублей (MinHash + LSH):
+    - подпись по заголовку и тексту, кандидаты — через LSH-полосы,
+      поэтому поиск не сравнивает статью со всеми подряд
+    - каждая статья попадает в кластер; представитель кластера — первая статья сюжета
+    - подписи хранятся в article_signatures, так что дубли ловятся
+      между прогонами и между источниками (один материал dpa на DW и Tagesschau)
+    session_maker=None — индекс только в памяти (для разовой дедупликации)
+    """
+
+    def __init__(
+        self,
+        session_maker=SessionLocal,
+        num_perm: int = DEDUPE_NUM_PERM,
+        bands: int = DEDUPE_BANDS,
+        threshold: float = DEDUPE_THRESHOLD,
+        window_days: int = DEDUPE_WINDOW_DAYS,
+    ):
+        if num_perm % bands:
+            raise ValueError("num_perm должно делиться на bands")
+        self._session_maker = session_maker
+        self._hasher = MinHasher(num_perm)
+        self._bands = bands
+        self._rows = num_perm // bands
+        self.threshold = threshold
+        self.window_days = window_days
+
+        self._signatures = {}  # url -> подпись
+        self._clusters = {}  # url -> url представителя
+        self._buckets = {}  # (полоса, значения) -> [url]
+        self._loaded = session_maker is None
+        self._lock = threading.Lock()
+
+    def _band_keys(self, sig: list[int]):
+        for band in range(self._bands):
+            yield band, tuple(sig[band * self._rows:(band + 1) * self._rows])
+
+    def _remember(self, url: str, sig: list[int], cluster: str):
+        self._signatures[url] = sig
+        self._clusters[url] = cluster
+        for key in self._band_keys(sig):
+            self._buckets.setdefault(key, []).append(url)
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        session = self._session_maker()
+        try:
+            rows = session.execute(text("""
+                SELECT url, signature, cluster
+                FROM article_signatures
+                WHERE created_at >= datetime('now', :window)
+                ORDER BY id
+            """), {"window": f"-{self.window_days} day"}).fetchall()
+        finally:
+            session.close()
+
+        for url, packed, cluster in rows:
+            sig = list(struct.unpack(f"<{len(packed) // 4}I", packed))
+            if len(sig) == self._hasher.num_perm:
+                self._remember(url, sig, cluster)
+        self._loaded = True
+
+    def assign(self, url: str, title: str, content: str, session=None) -> str:
+        """
+        Кластер статьи (URL представителя). Статья сразу добавляется в индекс;
+        если передан session — подпись сохраняется в той же транзакции.
+        """
+        with self._lock:
+            self._ensure_loaded()
+            if url in self._clusters:
+                return self._clusters[url]
+
+            sig = self._hasher.signature(shingles(title, content))
+
+            candidates = set()
+            for key in self._band_keys(sig):
+                candidates.update(self._buckets.get(key, ()))
+
+            best, best_sim = None, 0.0
+            for other in candidates:
+                sim = similarity(sig, self._signatures[other])
+                if sim > best_sim:
+                    best, best_sim = other, sim
+
+            cluster = self._clusters[best] if best and best_sim >= self.threshold else url
+            self._remember(url, sig, cluster)
+
+        if session is not None and self._session_maker is not None:
+            session.execute(
+                sqlite_insert(ArticleSignature)
+                .values(
+                    url=url[:1024],
+                    signature=struct.pack(f"<{len(sig)}I", *sig),
+                    cluster=cluster[:1024],
+                )
+                .on_conflict_do_nothing(index_elements=["url"])
+            )
+        return cluster
+
+
+def representatives(items: list[dict]) -> list[dict]:
+    """Разовая дедупликация списка статей: по одной на кластер, порядок сохраняется"""
+    index = NearDuplicateIndex(session_maker=None)
+    seen = set()
+    result = []
+    for item in items:
+        if item["url"] in seen:
+            continue
+        seen.add(item["url"])
+        if index.assign(item["url"], item.get("title", ""), item.get("content", "")) == item["url"]:
+            result.append(item)
+    return result
+
+
+near_duplicates = NearDuplicateIndex()
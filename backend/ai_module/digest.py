@@ -0,0 +1,84 @@
+import threading
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from backend.config import DIGEST_MAX_AGE_MINUTES
+from backend.db.database import SessionLocal
+from backend.db.models import Digest
+
+DIGEST_KINDS = ("news", "smart", "multilang")
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class DigestStore:
+    """
+    Последние готовые дайджесты:
+    - в памяти — для мгновенного ответа
+    - в таблице digests (одна строка на вид) — чтобы пережить перезапуск бота
+    """
+
+    def __init__(self, session_maker=SessionLocal, max_age_minutes: int = DIGEST_MAX_AGE_MINUTES):
+        self._session_maker = session_maker
+        self.max_age = timedelta(minutes=max_age_minutes)
+        self._snapshots = {}  # kind -> (текст, время сборки)
+        self._lock = threading.Lock()
+
+    def save(self, kind: str, text: str):
+        built_at = _utcnow()
+        with self._lock:
+            self._snapshots[kind] = (text, built_at)
+
+        session = self._session_maker()
+        try:
+            stmt = sqlite_insert(Digest).values(kind=kind, content=text, created_at=built_at.replace(tzinfo=None))
+            session.execute(stmt.on_conflict_do_update(
+                index_elements=["kind"],
+                set_={"content": stmt.excluded.content, "created_at": stmt.excluded.created_at},
+            ))
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            print(f"❌ Не удалось сохранить дайджест {kind}: {e}")
+        finally:
+            session.close()
+
+    def load_latest(self):
+        """Поднимает последние дайджесты из БД (при старте бота)"""
+        session = self._session_maker()
+        try:
+            for kind in DIGEST_KINDS:
+                row = (
+                    session.query(Digest)
+                    .filter(Digest.kind == kind)
+                    .order_by(Digest.created_at.desc())
+                    .first()
+                )
+                if row and row.created_at:
+                    built_at = row.created_at.replace(tzinfo=timezone.utc)
+                    with self._lock:
+                        self._snapshots.setdefault(kind, (row.content, built_at))
+        finally:
+            session.close()
+
+    def get(self, kind: str):
+        """Свежий дайджест или None, если его нет / он старше max_age"""
+        with self._lock:
+            snapshot = self._snapshots.get(kind)
+        if not snapshot:
+            return None
+        text, built_at = snapshot
+        if _utcnow() - built_at > self.max_age:
+            return None
+        return text
+
+    def age(self, kind: str):
+        with self._lock:
+            snapshot = self._snapshots.get(kind)
+        return None if not snapshot else _utcnow() - snapshot[1]
+
+
+digest_store = DigestStore()
@@ -0,0 +1,65 @@
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+from backend.config import INFERENCE_WORKERS, INFERENCE_QUEUE_SIZE, INFERENCE_TIMEOUT
+
+
+class QueueFullError(RuntimeError):
+    """Очередь инференса заполнена — запрос не принят"""
+
+
+class InferenceExecutor:
+    """
+    Пул потоков для тяжёлых пайплайнов (скрейпинг + модели):
+    - модели — глобальные объекты модуля, грузятся один раз на процесс
+      и общие для всех воркеров
+    - ограниченная очередь: лишние запросы сразу получают QueueFullError
+    - таймаут на запрос; сама задача при этом дорабатывает в фоне
+      и продолжает занимать место в очереди, пока не завершится
+    """
+
+    def __init__(
+        self,
+        workers: int = INFERENCE_WORKERS,
+        max_queue: int = INFERENCE_QUEUE_SIZE,
+        timeout: float | None = INFERENCE_TIMEOUT,
+    ):
+        self._pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="inference")
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._pending = 0
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def _release(self, _future):
+        self._pending -= 1
+
+    async def run(self, fn, *args, timeout: float | None = -1, force: bool = False):
+        """
+        Выполняет fn(*args) в пуле.
+        timeout=-1 — таймаут по умолчанию, None — ждать сколько нужно.
+        force=True — не проверять заполненность очереди (планировщик).
+        """
+        if not force and self._pending >= self.max_queue:
+            raise QueueFullError("inference queue is full")
+
+        if timeout == -1:
+            timeout = self.timeout
+
+        loop = asyncio.get_running_loop()
+        ctx = contextvars.copy_context()
+        future = loop.run_in_executor(self._pool, ctx.run, fn, *args)
+        self._pending += 1
+        future.add_done_callback(self._release)
+
+        # shield: таймаут одного ожидающего не отменяет саму задачу
+        return await asyncio.wait_for(asyncio.shield(future), timeout)
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+inference_executor = InferenceExecutor()
@@ -0,0 +1,101 @@
+import json
+
+from sqlalchemy import func, text
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from backend.config import PAGE_CACHE_KNOWN_DAYS, SEEN_URLS_DAYS
+from backend.db.database import SessionLocal
+from backend.db.models import CrawlState, SeenUrl
+
+
+# ---------------------------------------------------------
+#  Инкрементальный сбор: какие ссылки уже видели и когда был прошлый прогон.
+#  Rust получает список известных ссылок и не скачивает их вовсе,
+#  пайплайн обрабатывает только новые статьи (дельту).
+# ---------------------------------------------------------
+def known_urls(session_maker=SessionLocal) -> list[str]:
+    """Ссылки, которые не надо скачивать: статьи из БД + просмотренные ссылки"""
+    session = session_maker()
+    try:
+        rows = session.execute(text("""
+            SELECT url FROM articles WHERE created_at >= datetime('now', :articles_window)
+            UNION
+            SELECT url FROM seen_urls WHERE last_seen >= datetime('now', :seen_window)
+        """), {
+            "articles_window": f"-{PAGE_CACHE_KNOWN_DAYS} day",
+            "seen_window": f"-{SEEN_URLS_DAYS} day",
+        }).fetchall()
+        return [r[0] for r in rows]
+    finally:
+        session.close()
+
+
+def mark_seen(session, items: list[tuple[str, str]]):
+    """
+    Запоминает ссылки (url, статус) в той же транзакции, что и сохранение статей:
+    если прогон упадёт до commit, ссылки обработаются в следующий раз.
+    """
+    rows, seen = [], set()
+    for url, status in items:
+        url = url[:1024]
+        if url and url not in seen:
+            seen.add(url)
+            rows.append({"url": url, "status": status})
+    if not rows:
+        return
+
+    stmt = sqlite_insert(SeenUrl).values(rows)
+    session.execute(stmt.on_conflict_do_update(
+        index_elements=["url"],
+        set_={"status": stmt.excluded.status, "last_seen": func.now()},
+    ))
+
+
+def save_watermark(session, stats: dict):
+    """Водяной знак прогона: время (updated_at) и счётчики дельты"""
+    stmt = sqlite_insert(CrawlState).values(key="last_crawl", value=json.dumps(stats))
+    session.execute(stmt.on_conflict_do_update(
+        index_elements=["key"],
+        set_={"value": stmt.excluded.value, "updated_at": func.now()},
+    ))
+
+
+def load_watermark(session_maker=SessionLocal) -> dict | None:
+    """Счётчики прошлого прогона и его время (ключ at) — для /stats; None — прогонов не было"""
+    session = session_maker()
+    try:
+        row = session.get(CrawlState, "last_crawl")
+        if row is None:
+            return None
+        return {**json.loads(row.value or "{}"), "at": row.updated_at}
+    finally:
+        session.close()
+
+
+def recent_articles(limit: int, exclude: set[str], session_maker=SessionLocal) -> list[dict]:
+    """
+    Последние сохранённые статьи (с готовой выжимкой, если она есть) —
+    добирают дайджест, когда новых статей меньше limit.
+    """
+    if limit <= 0:
+        return []
+    session = session_maker()
+    try:
+        rows = session.execute(text("""
+            SELECT title, url, content, summary_de
+            FROM articles
+            WHERE created_at >= datetime('now', '-1 day')
+            ORDER BY (summary_de IS NOT NULL AND summary_de != '') DESC, created_at DESC
+            LIMIT :limit
+        """), {"limit": limit + len(exclude)}).fetchall()
+    finally:
+        session.close()
+
+    result = []
+    for title, url, content, summary_de in rows:
+        if url in exclude:
+            continue
+        result.append({"title": title, "url": url, "content": content, "summary_de": summary_de or ""})
+        if len(result) >= limit:
+            break
+    return result
@@ -1,23 +1,25 @@
 import json
 import re
-from transformers import pipeline
-from difflib import SequenceMatcher
 from sqlalchemy import Column, Integer, String, Text, DateTime, func
 from backend.db.database import Base
-
-# --- 🔧 Инициализация моделей ---
-# Суммаризация немецких новостей
-summarizer = pipeline("summarization", model="sshleifer/distilbart-cnn-12-6")
-
-# Переводчики
-translator_de_en = pipeline("translation", model="Helsinki-NLP/opus-mt-de-en")
-translator_de_ru = pipeline(
-    "translation",
-    model="facebook/nllb-200-distilled-600M",
-    src_lang="deu_Latn",
-    tgt_lang="rus_Cyrl",
+from backend.ai_module.cache import summary_cache, content_hash
+from backend.ai_module.batching import run_batched
+from backend.ai_module.registry import model_registry
+from backend.ai_module.dedupe import representatives
+from backend.ai_module.chunking import chunk_text
+from backend.ai_module.translation import translation_service
+from backend.metrics import metrics
+from backend.config import (
+    SUMMARY_MODE_SMART,
+    SUMMARY_MODE_MULTILANG,
+    SUMMARY_CHUNK_TOKENS,
+    SUMMARY_MAX_CHUNKS,
 )
 
+# --- 🔧 Модели ---
+# Пайплайны (summarizer, translator_de_en, translator_de_ru) грузятся
+# лениво через model_registry при первом обращении
+
 # --- 🔹 Вспомогательные функции ---
 def clean_text(text: str) -> str:
     """Очистка текста от мусора и лишних пробелов"""
@@ -25,9 +27,134 @@ def clean_text(text: str) -> str:
     return text.strip()
 
 
-def is_similar(a, b, threshold=0.75):
-    """Проверка похожести строк (для фильтрации дублей)"""
-    return SequenceMatcher(None, a.lower(), b.lower()).ratio() > threshold
+def _load_items(news) -> list[dict]:
+    """Статьи: JSON-строка из rust_core или уже готовый список словарей"""
+    if isinstance(news, str):
+        with metrics.stage("json_decode"):
+            return json.loads(news)
+    return list(news)
+
+
+# В режиме chunked в модель уходит не больше SUMMARY_MAX_CHUNKS кусков,
+# поэтому гигантские страницы не стоит даже целиком токенизировать
+_CHUNKED_MAX_CHARS = SUMMARY_MAX_CHUNKS * SUMMARY_CHUNK_TOKENS * 8
+
+
+def _prepare_summary_input(text: str, max_chars: int, mode: str = "truncate") -> str:
+    text = clean_text(text)
+    if mode == "chunked":
+        max_chars = max(max_chars, _CHUNKED_MAX_CHARS)
+    if len(text) > max_chars:
+        text = text[:max_chars]
+    return text
+
+
+def _summary_key(text: str, max_len: int, min_len: int, mode: str) -> str:
+    if mode == "chunked":
+        return content_hash(
+            f"chunked:{SUMMARY_CHUNK_TOKENS}:{SUMMARY_MAX_CHUNKS}:{max_len}:{min_len}:{text}"
+        )
+    return content_hash(f"{max_len}:{min_len}:{text}")
+
+
+def summary_hash(
+    text: str,
+    max_chars: int = 1800,
+    max_len: int = 80,
+    min_len: int = 25,
+    mode: str = "truncate",
+) -> str:
+    """Ключ кэша выжимки: хэш того, что реально уйдёт в модель"""
+    text = _prepare_summary_input(text, max_chars, mode)
+    return _summary_key(text, max_len, min_len, mode)
+
+
+def _summarize_chunked(pipe, texts: list[str], max_len: int, min_len: int) -> list:
+    """
+    Map-reduce суммаризация длинных текстов:
+    - map: каждый текст режется на куски по токенам, все куски всех текстов — одним батчем
+    - reduce: выжимки кусков склеиваются и суммаризируются ещё раз (тоже батчем)
+    Текст из одного куска reduce не проходит.
+    """
+    kwargs = {"max_length": max_len, "min_length": min_len, "do_sample": False, "truncation": True}
+    chunked = [chunk_text(pipe, text) for text in texts]
+    partial = run_batched(pipe, [c for chunks in chunked for c in chunks], **kwargs)
+
+    results = [None] * len(texts)
+    reduce_idx, reduce_inputs = [], []
+    pos = 0
+    for i, chunks in enumerate(chunked):
+        parts = [
+            out["summary_text"] for out in partial[pos:pos + len(chunks)]
+            if out and "summary_text" in out
+        ]
+        pos += len(chunks)
+        if len(parts) == 1:
+            results[i] = {"summary_text": parts[0]}
+        elif parts:
+            reduce_idx.append(i)
+            reduce_inputs.append(" ".join(parts))
+
+    for i, out in zip(reduce_idx, run_batched(pipe, reduce_inputs, **kwargs)):
+        results[i] = out
+    return results
+
+
+def summarize_many(
+    texts: list[str],
+    urls: list[str | None] | None = None,
+    max_chars: int = 1800,
+    max_len: int = 80,
+    min_len: int = 25,
+    mode: str = "truncate",
+) -> list[str | None]:
+    """
+    Батчевая суммаризация списка текстов:
+    - truncate: обрезает длинные тексты до max_chars
+    - chunked: map-reduce по кускам в токенах (см. _summarize_chunked)
+    - короткие сразу -> None, готовое берётся из кэша
+    - остальное одним прогоном через run_batched, порядок сохраняется
+    """
+    urls = urls or [None] * len(texts)
+    results = [None] * len(texts)
+    pending = []  # (индекс, подготовленный текст, ключ кэша)
+
+    for i, (text, url) in enumerate(zip(texts, urls)):
+        text = _prepare_summary_input(text, max_chars, mode)
+        if len(text.split()) < 30:  # меньше ~30 слов — слишком коротко
+            continue
+
+        key = _summary_key(text, max_len, min_len, mode)
+        cached = summary_cache.get("de", url, key)
+        if cached is not None:
+            results[i] = cached
+        else:
+            pending.append((i, text, key))
+
+    if not pending:
+        return results
+
+    with metrics.stage("summarize"):
+        pipe = model_registry.get("summarizer")
+        inputs = [text for _, text, _ in pending]
+        if mode == "chunked":
+            outputs = _summarize_chunked(pipe, inputs, max_len, min_len)
+        else:
+            outputs = run_batched(
+                pipe,
+                inputs,
+                max_length=max_len,
+                min_length=min_len,
+                do_sample=False,
+                truncation=True,
+            )
+    for (i, _, key), out in zip(pending, outputs):
+        if not out or "summary_text" not in out:
+            continue
+        results[i] = out["summary_text"]
+        summary_cache.put("de", urls[i], key, results[i])
+
+    return results
 
 
 def summarize_text_safe(
@@ -35,53 +162,163 @@ def summarize_text_safe(
     max_chars: int = 1800,
     max_len: int = 80,
     min_len: int = 25,
+    url: str | None = None,
+    mode: str = "truncate",
 ):
     """
-    Безопасная обёртка над summarizer:
+    Безопасная обёртка над summarizer для одного текста:
     - обрезает длинные тексты
     - игнорирует слишком короткие
+    - сначала смотрит в кэш (url + хэш текста)
     - защищает от ошибок huggingface
     """
-    text = clean_text(text)
-    if len(text) > max_chars:
-        text = text[:max_chars]
+    return summarize_many([text], [url], max_chars, max_len, min_len, mode)[0]
+
+
+def _cached_translations(texts, lang, urls):
+    """Переводы из кэша выжимок (url + хэш исходной выжимки) и что осталось перевести"""
+    results = [None] * len(texts)
+    pending = []
+    for i, (text, url) in enumerate(zip(texts, urls)):
+        key = content_hash(text)
+        cached = summary_cache.get(lang, url, key)
+        if cached is not None:
+            results[i] = cached
+        else:
+            pending.append((i, key))
+    return results, pending
+
+
+def translate_all(
+    texts: list[str],
+    urls: list[str | None] | None = None,
+    langs=("en", "ru"),
+) -> dict:
+    """
+    Батчевый перевод выжимок сразу на несколько языков:
+    - сначала кэш выжимок (url + хэш исходной выжимки)
+    - остальное через translation_service: по предложениям, с памятью
+      переводов, языки параллельно
+    - готовые переводы пишутся в articles.summary_en / summary_ru
+    """
+    urls = urls or [None] * len(texts)
+    results, pending = {}, {}
+    for lang in langs:
+        results[lang], pending[lang] = _cached_translations(texts, lang, urls)
+
+    todo = sorted({i for items in pending.values() for i, _ in items})
+    if not todo:
+        return results
+
+    # Переводим объединение непереведённого: предложения, уже
+    # переведённые на язык, возьмутся из памяти переводов
+    translated = translation_service.translate_all(
+        [texts[i] for i in todo],
+        [lang for lang in langs if pending[lang]],
+    )
+    position = {i: n for n, i in enumerate(todo)}
+    for lang, outputs in translated.items():
+        done = []
+        for i, key in pending[lang]:
+            value = outputs[position[i]]
+            if not value:
+                continue
+            results[lang][i] = value
+            summary_cache.put(lang, urls[i], key, value)
+            done.append(i)
+        translation_service.save_to_articles(
+            lang,
+            [urls[i] for i in done],
+            [texts[i] for i in done],
+            [results[lang][i] for i in done],
+        )
+
+    return results
+
+
+def translate_many(
+    texts: list[str],
+    lang: str,
+    urls: list[str | None] | None = None,
+) -> list[str | None]:
+    """Батчевый перевод выжимок на en/ru (см. translate_all)"""
+    return translate_all(texts, urls, (lang,))[lang]
+
+
+def summaries_for(items: list[dict], mode: str) -> list[str | None]:
+    """Готовые выжимки (summary_de уже сохранённых статей) + summarize_many для остальных"""
+    results = [item.get("summary_de") or None for item in items]
+    todo = [i for i, summary in enumerate(results) if not summary]
+    outputs = summarize_many(
+        [items[i]["content"] for i in todo],
+        [items[i]["url"] for i in todo],
+        mode=mode,
+    )
+    for i, summary in zip(todo, outputs):
+        results[i] = summary
+    return results
+
+
+def translate_de_en(text: str, url: str | None = None):
+    return translate_many([text], "en", [url])[0]
+
+
+def translate_de_ru(text: str, url: str | None = None):
+    return translate_many([text], "ru", [url])[0]
 
-    if len(text.split()) < 30:  # меньше ~30 слов — слишком коротко
-        return None
 
-    try:
-        out = summarizer(
-            text,
-            max_length=max_len,
-            min_length=min_len,
+def _summarize_titles(titles: list[str], urls: list[str]) -> list[str | None]:
+    """Короткие выжимки заголовков (батчем, с кэшем)"""
+    results = [None] * len(titles)
+    pending = []
+
+    for i, (title, url) in enumerate(zip(titles, urls)):
+        key = content_hash(title)
+        cached = summary_cache.get("title", url, key)
+        if cached is not None:
+            results[i] = cached
+        else:
+            pending.append((i, key))
+
+    if not pending:
+        return results
+
+    with metrics.stage("summarize"):
+        outputs = run_batched(
+            model_registry.get("summarizer"),
+            [titles[i] for i, _ in pending],
+            max_length=50,
+            min_length=10,
             do_sample=False,
-            truncation=True,
         )
-        if not out or "summary_text" not in out[0]:
-            return None
-        return out[0]["summary_text"]
-    except Exception:
-        return None
+    for (i, key), out in zip(pending, outputs):
+        if not out or "summary_text" not in out:
+            continue
+        results[i] = out["summary_text"]
+        summary_cache.put("title", urls[i], key, results[i])
+
+    return results
 
 
 # --- 🔹 Короткий дайджест (/news) ---
-def summarize_news(news_json: str):
+def summarize_news(news):
     """Краткая сводка по заголовкам (для команды /news)"""
-    data = json.loads(news_json)
-    summaries = []
+    data = _load_items(news)
+    items = []
 
     for n in data[:5]:
         title = n.get("title", "").strip()
-        if not title:
-            continue
+        if title:
+            items.append((title, n.get("url", "")))
 
-        try:
-            summary = summarizer(
-                title, max_length=50, min_length=10, do_sample=False
-            )[0]["summary_text"]
-            summaries.append(f"🗞️ {summary}\n🔗 {n.get('url', '')}")
-        except Exception as e:
-            summaries.append(f"⚠️ Ошибка при суммаризации: {e}\n{title}")
+    outputs = _summarize_titles([t for t, _ in items], [u for _, u in items])
+    summaries = []
+
+    for (title, url), summary in zip(items, outputs):
+        if summary:
+            summaries.append(f"🗞️ {summary}\n🔗 {url}")
+        else:
+            summaries.append(f"⚠️ Ошибка при суммаризации.\n{title}")
 
     if not summaries:
         return "⚠️ Нет подходящих новостей для отображения."
@@ -89,30 +326,28 @@ def summarize_news(news_json: str):
 
 
 # --- 🔹 Глубокая выжимка (/smartnews) ---
-def smart_summarize(news_json: str):
+def smart_summarize(news, mode: str = SUMMARY_MODE_SMART):
     """Создаёт расширенный дайджест из текста статей"""
-    data = json.loads(news_json)
+    data = _load_items(news)
     clean_articles = []
-    seen_titles = []
 
-    for item in data:
+    # почти-дубли (один сюжет из разных источников) — по одной статье на кластер
+    for item in representatives(data):
         title = clean_text(item["title"])
-        if any(is_similar(title, t) for t in seen_titles):
-            continue
-        seen_titles.append(title)
-
         content = clean_text(item.get("content", ""))
         if len(content) > 300:  # игнорируем пустые и короткие тексты
             clean_articles.append({
                 "title": title,
                 "url": item["url"],
-                "content": content
+                "content": content,
+                "summary_de": item.get("summary_de", ""),
             })
 
+    selected = clean_articles[:5]
+    outputs = summaries_for(selected, mode)
     summaries = []
 
-    for art in clean_articles[:5]:
-        summary = summarize_text_safe(art["content"])
+    for art, summary in zip(selected, outputs):
         if not summary:
             summaries.append(
                 f"⚠️ Пропущено: текст слишком короткий или не подошёл для суммаризации.\n{art['title']}"
@@ -127,36 +362,39 @@ def smart_summarize(news_json: str):
 
 
 # --- 🔹 Мультиязычная версия (/multilangnews) ---
-def summarize_multilang(news_json: str):
+def summarize_multilang(news, mode: str = SUMMARY_MODE_MULTILANG):
     """Создаёт выжимку на 3 языках (DE, EN, RU)"""
-    data = json.loads(news_json)
-    results = []
+    data = _load_items(news)
 
+    candidates = []
     for n in data[:5]:
         content = clean_text(n["content"])
-        if len(content) < 300:
-            continue
+        if len(content) >= 300:
+            candidates.append({**n, "content": content})
 
-        summary_de = summarize_text_safe(content)
-        if not summary_de:
-            continue
+    summaries_de = summaries_for(candidates, mode)
+    selected = [(n, s) for n, s in zip(candidates, summaries_de) if s]
 
-        try:
-            summary_en = translator_de_en(summary_de)[0]["translation_text"]
-            summary_ru = translator_de_ru(summary_de)[0]["translation_text"]
+    texts = [s for _, s in selected]
+    urls = [n["url"] for n, _ in selected]
+    translations = translate_all(texts, urls, ("en", "ru"))
+    summaries_en, summaries_ru = translations["en"], translations["ru"]
 
-            block = (
-                f"📰 *{n['title']}*\n\n"
-                f"🇩🇪 **DE:** {summary_de}\n\n"
-                f"🇬🇧 **EN:** {summary_en}\n\n"
-                f"🇷🇺 **RU:** {summary_ru}\n\n"
-                f"🔗 {n['url']}"
-            )
-            results.append(block)
-        except Exception as e:
-            results.append(f"⚠️ Ошибка при обработке статьи: {e}")
+    results = []
+    for (n, summary_de), summary_en, summary_ru in zip(selected, summaries_en, summaries_ru):
+        if not summary_en or not summary_ru:
+            results.append(f"⚠️ Ошибка при обработке статьи: {n['title']}")
+            continue
+
+        block = (
+            f"📰 *{n['title']}*\n\n"
+            f"🇩🇪 **DE:** {summary_de}\n\n"
+            f"🇬🇧 **EN:** {summary_en}\n\n"
+            f"🇷🇺 **RU:** {summary_ru}\n\n"
+            f"🔗 {n['url']}"
+        )
+        results.append(block)
 
     if not results:
         return "⚠️ Нет подходящих новостей для перевода."
     return "\n\n".join(results)
-
@@ -0,0 +1,292 @@
+import re
+from collections import defaultdict
+from dataclasses import dataclass, field
+
+from sqlalchemy import text
+
+from backend.ai_module.category import CATEGORIES
+from backend.ai_module.model import summaries_for, summary_hash, translate_many
+from backend.ai_module.ranking import rank_articles
+from backend.config import (
+    PERSONAL_DIGEST_SIZE,
+    PERSONAL_DIGEST_MAX_SIZE,
+    PERSONAL_POOL_HOURS,
+    PERSONAL_POOL_SIZE,
+    RANKING_ENABLED,
+    SUMMARY_MODE_SMART,
+)
+from backend.db.database import SessionLocal
+from backend.metrics import metrics
+
+LANGS = ("de", "en", "ru")
+ALL_CATEGORIES = tuple(CATEGORIES) + ("other",)
+_FLAGS = {"de": "🇩🇪", "en": "🇬🇧", "ru": "🇷🇺"}
+
+
+# ---------------------------------------------------------
+#  Настройки подписчика
+# ---------------------------------------------------------
+@dataclass(frozen=True)
+class Preferences:
+    """Настройки сводки; одинаковые настройки = одинаковый текст (ключ группы)"""
+    categories: tuple = ()  # пусто — все категории
+    lang: str = "de"
+    size: int = PERSONAL_DIGEST_SIZE
+
+    @classmethod
+    def from_subscriber(cls, sub) -> "Preferences":
+        categories = tuple(sorted(
+            c for c in (sub.categories or "").split(",") if c in ALL_CATEGORIES
+        ))
+        lang = sub.lang if sub.lang in LANGS else "de"
+        size = min(max(1, sub.digest_size or PERSONAL_DIGEST_SIZE), PERSONAL_DIGEST_MAX_SIZE)
+        return cls(categories, lang, size)
+
+    def describe(self) -> str:
+        categories = ", ".join(self.categories) if self.categories else "все"
+        return f"категории: {categories}; язык: {self.lang}; статей: {self.size}"
+
+
+def parse_categories(words) -> tuple | None:
+    """Категории из аргументов /prefs (через пробел или запятую); None — есть неизвестные"""
+    items = [w.strip().lower() for part in words for w in part.split(",") if w.strip()]
+    if items in ([], ["all"]):
+        return ()
+    if any(item not in ALL_CATEGORIES for item in items):
+        return None
+    return tuple(sorted(set(items)))
+
+
+def group_subscribers(subscribers) -> dict:
+    """Preferences -> chat_id подписчиков с такими настройками"""
+    groups = defaultdict(list)
+    for sub in subscribers:
+        groups[Preferences.from_subscriber(sub)].append(sub.chat_id)
+    return dict(groups)
+
+
+# ---------------------------------------------------------
+#  Общий пул кандидатов: одна выборка и один расчёт выжимок
+#  и переводов на тик рассылки, дальше — только выбор из пула
+# ---------------------------------------------------------
+def load_candidates(
+    limit: int = PERSONAL_POOL_SIZE,
+    hours: int = PERSONAL_POOL_HOURS,
+    session_maker=SessionLocal,
+) -> list[dict]:
+    """
+    Свежие статьи, по одной на сюжет (почти-дубли отсекаются по
+    article_signatures), от новых к старым; при RANKING_ENABLED порядок
+    пула — по темам, как у дайджестов (ranking.rank_articles). Готовые
+    выжимки и переводы берутся из БД.
+    """
+    session = session_maker()
+    try:
+        rows = session.execute(text("""
+            SELECT a.title, a.url, a.content, a.category,
+                   a.summary_de, a.summary_en, a.summary_ru
+            FROM articles a
+            LEFT JOIN article_signatures s ON s.url = a.url
+            WHERE a.created_at >= datetime('now', :window)
+              AND (s.cluster IS NULL OR s.cluster = a.url)
+            ORDER BY a.created_at DESC, a.id DESC
+            LIMIT :limit
+        """), {"window": f"-{hours} hour", "limit": limit}).fetchall()
+    finally:
+        session.close()
+
+    candidates = [
+        {
+            "title": title, "url": url, "content": content, "category": category,
+            "summary_de": de or "", "summary_en": en or "", "summary_ru": ru or "",
+        }
+        for title, url, content, category, de, en, ru in rows
+    ]
+    return rank_articles(candidates) if RANKING_ENABLED else candidates
+
+
+def select_articles(candidates: list[dict], prefs: Preferences) -> list[dict]:
+    """Выбор из пула под настройки: фильтр по категориям, первые size статей пула"""
+    if prefs.categories:
+        candidates = [a for a in candidates if a["category"] in prefs.categories]
+    return candidates[:prefs.size]
+
+
+@dataclass
+class CandidatePool:
+    candidates: list[dict]
+    selections: dict = field(default_factory=dict)  # Preferences -> выбранные статьи
+
+    def needed(self, lang: str | None = None) -> list[dict]:
+        """Статьи, попавшие хотя бы в одну сводку (на языке lang), без повторов"""
+        seen, result = set(), []
+        for prefs, articles in self.selections.items():
+            if lang is not None and prefs.lang != lang:
+                continue
+            for a in articles:
+                if a["url"] not in seen:
+                    seen.add(a["url"])
+                    result.append(a)
+        return result
+
+
+def _save_summaries(articles: list[dict], session_maker=SessionLocal):
+    """Новые выжимки — в articles.summary_de (после этого к ним же сохранятся переводы)"""
+    if not articles:
+        return
+    session = session_maker()
+    try:
+        with metrics.stage("db_upsert"):
+            session.execute(text("""
+                UPDATE articles SET summary_de = :summary, content_hash = :hash
+                WHERE url = :url AND (summary_de IS NULL OR summary_de = '')
+            """), [
+                {
+                    "url": a["url"],
+                    "summary": a["summary_de"],
+                    "hash": summary_hash(a["content"], mode=SUMMARY_MODE_SMART),
+                }
+                for a in articles
+            ])
+            session.commit()
+    except Exception as e:
+        session.rollback()
+        print(f"❌ Не удалось сохранить выжимки: {e}")
+    finally:
+        session.close()
+
+
+def build_pool(candidates: list[dict], groups, session_maker=SessionLocal) -> CandidatePool:
+    """
+    Выжимки считаются один раз для объединения всех выборок, переводы —
+    один раз на язык для статей, которые нужны группам с этим языком.
+    """
+    pool = CandidatePool(candidates, {prefs: select_articles(candidates, prefs) for prefs in groups})
+
+    needed = [a for a in pool.needed() if not a["summary_de"]]
+    for article, summary in zip(needed, summaries_for(needed, SUMMARY_MODE_SMART)):
+        article["summary_de"] = summary or ""
+    _save_summaries([a for a in needed if a["summary_de"]], session_maker)
+
+    for lang in LANGS[1:]:
+        column = f"summary_{lang}"
+        todo = [a for a in pool.needed(lang) if a["summary_de"] and not a[column]]
+        if not todo:
+            continue
+        outputs = translate_many([a["summary_de"] for a in todo], lang, [a["url"] for a in todo])
+        for article, translated in zip(todo, outputs):
+            article[column] = translated or ""
+
+    return pool
+
+
+# ---------------------------------------------------------
+#  Текст сводки для группы (parse_mode="Markdown", лимит Telegram — 4096 символов)
+# ---------------------------------------------------------
+MESSAGE_LIMIT = 4096
+_TITLE_CHARS = 300
+_SUMMARY_CHARS = 1500
+_MARKDOWN_SPECIAL = re.compile(r"([_*`\[])")
+
+
+def escape_markdown(value: str) -> str:
+    """Экранирует _ * ` [ вне разметки (legacy Markdown Telegram)"""
+    return _MARKDOWN_SPECIAL.sub(r"\\\1", value)
+
+
+def _bold(value: str) -> str:
+    # внутри *...* экранирование не работает: звёздочку выносим между двумя сущностями
+    return "*" + value.replace("*", "*\\**") + "*"
+
+
+def _length(value: str) -> int:
+    # Telegram считает длину в единицах UTF-16: эмодзи — по две
+    return len(value.encode("utf-16-le")) // 2
+
+
+def _shorten(value: str, limit: int) -> str:
+    return value if len(value) <= limit else value[:limit - 1].rstrip() + "…"
+
+
+def _fit(value: str, limit: int) -> str:
+    """Экранирует value и укладывает в limit единиц UTF-16; режется исходный текст, не разметка"""
+    escaped = escape_markdown(value)
+    if _length(escaped) <= limit:
+        return escaped
+    size, end = _length("…"), 0
+    for ch in value:
+        size += _length(escape_markdown(ch))
+        if size > limit:
+            break
+        end += 1
+    return escape_markdown(value[:end].rstrip()) + "…"
+
+
+def render(articles: list[dict], prefs: Preferences) -> list[str]:
+    """Тексты сводки: статьи раскладываются по сообщениям не длиннее MESSAGE_LIMIT"""
+    header = f"🕓 Автоматическая сводка новостей {_FLAGS[prefs.lang]}"
+    if prefs.categories:
+        header += f" ({escape_markdown(', '.join(prefs.categories))})"
+    # запас под номер части " (12/12)" в заголовке
+    budget = MESSAGE_LIMIT - _length(header) - 12
+
+    blocks = []
+    for a in articles:
+        title = _shorten(" ".join(a["title"].split()), _TITLE_CHARS)
+        url = escape_markdown(a["url"])
+        # заголовок уже укорочен, без ограничения остаётся только ссылка
+        head = f"🗞️ {escape_markdown(title)}\n🔗 "
+        block = head + _fit(a["url"], budget - _length(head))
+        summary = a.get(f"summary_{prefs.lang}") or a["summary_de"]
+        if summary:
+            summary = escape_markdown(_shorten(summary, _SUMMARY_CHARS))
+            full = f"📰 {_bold(title)}\n{summary}\n🔗 {url}"
+            if _length(full) <= budget:
+                block = full
+        blocks.append(block)
+
+    parts, current, size = [], [], 0
+    for block in blocks:
+        added = _length(block) + (2 if current else 0)
+        if current and size + added > budget:
+            parts.append(current)
+            current, size = [], 0
+            added = _length(block)
+        current.append(block)
+        size += added
+    parts.append(current)
+
+    if len(parts) == 1:
+        return [f"{header}:\n\n" + "\n\n".join(parts[0])]
+    return [
+        f"{header} ({i}/{len(parts)}):\n\n" + "\n\n".join(part)
+        for i, part in enumerate(parts, 1)
+    ]
+
+
+def personal_messages(subscribers, candidates: list[dict], session_maker=SessionLocal) -> list[tuple[str, str]]:
+    """
+    Пары (chat_id, текст) для рассылки; длинная сводка — несколько пар
+    на один chat_id. Стоимость растёт с числом
+    разных наборов настроек, а не с числом подписчиков.
+    Подписчикам, для которых в пуле ничего нет, сводка не отправляется.
+    """
+    groups = group_subscribers(subscribers)
+    pool = build_pool(candidates, groups, session_maker)
+
+    messages, empty = [], 0
+    with metrics.stage("personalize"):
+        for prefs, chat_ids in groups.items():
+            articles = pool.selections[prefs]
+            if not articles:
+                empty += len(chat_ids)
+                continue
+            # части одной сводки идут подписчику подряд
+            parts = render(articles, prefs)
+            messages.extend((chat_id, part) for chat_id in chat_ids for part in parts)
+
+    print(
+        f"🎯 Персональные сводки: {len(groups)} наборов настроек на {len(subscribers)} подписчиков, "
+        f"статей в пуле {len(candidates)}, выжимок нужно {len(pool.needed())}, без новостей {empty}"
+    )
+    return messages
@@ -1,98 +1,390 @@
 import json
-from sqlalchemy.exc import IntegrityError
+from sqlalchemy import or_, select, text
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 
 from backend.ai_module.model import (
     summarize_news,
     smart_summarize,
     summarize_multilang,
-    summarize_text_safe,
+    summarize_many,
+    summary_hash,
 )
-
-from backend.ai_module.category import categorize
+from backend.ai_module.cache import summary_cache
+from backend.ai_module.executor import inference_executor
+from backend.ai_module.digest import digest_store
+from backend.ai_module.dedupe import near_duplicates
+from backend.ai_module.coalesce import SingleFlight
+from backend.ai_module import incremental as incremental_state
+from backend.ai_module.personal import load_candidates, personal_messages
+from backend.ai_module.ranking import rank_articles
+
+from backend.ai_module.category import categorize_scored
 from backend.ai_module.cleaner import clean_article
 
 from backend.db.database import SessionLocal
+from backend.metrics import metrics
 from backend.db.models import News, Article
 
-from rust_core import fetch_full_articles
+from backend.config import (
+    FETCH_MAX_PER_HOST,
+    FETCH_TIMEOUT,
+    PAGE_CACHE_DIR,
+    PAGE_CACHE_KNOWN_DAYS,
+    INFERENCE_BATCH_SIZE,
+    STREAM_BUFFER,
+    STREAM_MAX_ARTICLES,
+    SUMMARY_MODE_SMART,
+    SUMMARY_MODE_MULTILANG,
+    INCREMENTAL_CRAWL,
+    NEWS_SOURCES,
+    RANKING_ENABLED,
+    RANK_TOP_K,
+)
+
+from rust_core import stream_articles
 
 
 # ---------------------------------------------------------
-#  Функция получения статей через Rust
+#  Поток статей из Rust (статьи приходят по мере скачивания)
 # ---------------------------------------------------------
-def _fetch_articles():
-    print("🦀 Rust: собираем статьи...")
-    return fetch_full_articles()
+def _known_urls(incremental: bool = False) -> list[str]:
+    """
+    URL статей, которые уже лежат в БД — Rust их не скачивает.
+    В инкрементальном режиме ещё и все ссылки из seen_urls.
+    """
+    if incremental:
+        return incremental_state.known_urls()
+
+    session = SessionLocal()
+    try:
+        rows = session.execute(text("""
+            SELECT url
+            FROM articles
+            WHERE created_at >= datetime('now', :window)
+        """), {"window": f"-{PAGE_CACHE_KNOWN_DAYS} day"}).fetchall()
+        return [r[0] for r in rows]
+    finally:
+        session.close()
+
+
+def _stored_content(session, url: str) -> str:
+    row = session.execute(
+        text("SELECT content FROM articles WHERE url = :url"), {"url": url}
+    ).fetchone()
+    return row[0] if row else ""
+
+
+def _iter_articles(refresh: bool = False, incremental: bool = False):
+    """
+    Статьи из rust_core по одной, как только страница скачана.
+    Известным статьям без текста в кэше страниц подставляем текст из БД.
+    incremental — известные ссылки Rust не отдаёт вовсе (только дельта),
+    страницы без текста статьи приходят с пустым content.
+    """
+    print("🦀 Rust: собираем статьи..." if not incremental else "🦀 Rust: собираем новые статьи...")
+    stream = stream_articles(
+        max_per_host=FETCH_MAX_PER_HOST,
+        timeout_secs=FETCH_TIMEOUT,
+        cache_dir=PAGE_CACHE_DIR or None,
+        known_urls=None if refresh else _known_urls(incremental),
+        refresh=refresh,
+        buffer=STREAM_BUFFER,
+        skip_known=incremental and not refresh,
+        sources=NEWS_SOURCES or None,
+        # дольше этого срока записи кэша не нужны: известные статьи берутся из БД
+        cache_days=PAGE_CACHE_KNOWN_DAYS,
+    )
+
+    session = SessionLocal()
+    try:
+        items = iter(stream)
+        while True:
+            # ожидание следующей статьи из Rust = скачивание + разбор страницы
+            with metrics.stage("rust_fetch"):
+                n = next(items, None)
+            if n is None:
+                break
+            if n.get("known") and not n.get("content"):
+                n["content"] = _stored_content(session, n["url"])
+                if not n["content"]:
+                    continue
+            yield n
+    finally:
+        session.close()
 
 
 # ---------------------------------------------------------
-#  Сохранение статей в Article (+ очистка, категории)
+#  Стадии: очистка → категория → дубли → выжимка → сохранение
 # ---------------------------------------------------------
-def _upsert_articles(session, raw_json: str, with_summaries: bool = False):
-    items = json.loads(raw_json)
-    saved = 0
+def _prepare_article(n: dict):
+    """Очистка и категоризация одной статьи (None — статья не подходит)"""
+    # --- Чистим текст ---
+    raw_content = n.get("content", "") or ""
+    with metrics.stage("clean"):
+        content = clean_article(raw_content)
+
+    # --- Пропуск слишком маленьких статей ---
+    if len(content) < 200:
+        return None
+
+    title = (n.get("title", "") or "").strip()
+
+    # --- Категоризация (заголовок весит больше текста) ---
+    with metrics.stage("categorize"):
+        cat, _confidence = categorize_scored(title, content)
+
+    return {
+        "title": title,
+        "url": n.get("url", ""),
+        # сырой текст идёт в суммаризацию (ключ кэша выжимок), чистый — в БД
+        "raw": raw_content,
+        "content": content,
+        "category": cat,
+    }
+
+
+def _upsert_articles(
+    session,
+    articles: list[dict],
+    with_summaries: bool = False,
+    summary_mode: str = "truncate",
+) -> dict:
+    """
+    Пакетно сохраняет подготовленные статьи в Article (+ выжимки одним батчем):
+    - известные URL отсекаются одним запросом
+    - новые — одним INSERT ... ON CONFLICT(url) DO NOTHING
+    - у уже сохранённых только дописывается отсутствующая выжимка
+    Возвращает счётчики inserted / updated / skipped и failed — запись
+    не удалась, транзакция сессии откачена (в том числе несохранённое до вызова).
+    """
+    counts = {"inserted": 0, "updated": 0, "skipped": 0, "failed": False}
+    if not articles:
+        return counts
+
+    # --- Суммаризация (опционально), одним батчем на пачку ---
+    # Берём тот же текст, что и smart_summarize / summarize_multilang,
+    # чтобы выжимка считалась один раз и дальше шла из кэша
+    summaries = [None] * len(articles)
+    if with_summaries:
+        summaries = summarize_many(
+            [a["raw"] for a in articles],
+            [a["url"] for a in articles],
+            mode=summary_mode,
+        )
+        # выжимка остаётся и на статье: дайджесты этого прогона берут её, а не считают заново
+        for a, summary_de in zip(articles, summaries):
+            if summary_de:
+                a["summary_de"] = summary_de
+
+    with metrics.stage("db_upsert"):
+        # --- Какие URL уже есть в БД (один запрос) ---
+        urls = [a["url"][:1024] for a in articles]
+        existing = dict(session.execute(
+            select(Article.url, Article.summary_de).where(Article.url.in_(urls))
+        ).all())
+
+        new_rows, summary_rows = [], []
+        seen = set()
+        for a, url, summary_de in zip(articles, urls, summaries):
+            if url in seen:
+                counts["skipped"] += 1
+                continue
+            seen.add(url)
+
+            row = {
+                "title": a["title"][:512],
+                "url": url,
+                "content": a["content"],
+                "summary_de": summary_de or "",
+                "content_hash": summary_hash(a["raw"], mode=summary_mode) if summary_de else "",
+                "lang": "de",
+                "category": a["category"],
+            }
+            if url not in existing:
+                new_rows.append(row)
+            elif summary_de and not existing[url]:
+                summary_rows.append(row)
+            else:
+                counts["skipped"] += 1
 
-    for n in items[:20]:
         try:
-            # --- Чистим текст ---
-            raw_content = n.get("content", "") or ""
-            content = clean_article(raw_content)
+            if new_rows:
+                stmt = sqlite_insert(Article).values(new_rows).on_conflict_do_nothing(
+                    index_elements=["url"]
+                )
+                inserted = session.execute(stmt).rowcount
+                counts["inserted"] += inserted
+                counts["skipped"] += len(new_rows) - inserted
+
+            if summary_rows:
+                stmt = sqlite_insert(Article).values(summary_rows)
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=["url"],
+                    set_={
+                        "summary_de": stmt.excluded.summary_de,
+                        "content_hash": stmt.excluded.content_hash,
+                    },
+                    where=or_(Article.summary_de.is_(None), Article.summary_de == ""),
+                )
+                updated = session.execute(stmt).rowcount
+                counts["updated"] += updated
+                counts["skipped"] += len(summary_rows) - updated
+        except Exception as e:
+            session.rollback()
+            print(f"❌ Ошибка сохранения статей: {e}")
+            return {"inserted": 0, "updated": 0, "skipped": len(articles), "failed": True}
+
+    if counts["inserted"] or counts["updated"]:
+        print(
+            f"💾 Статьи: добавлено {counts['inserted']}, "
+            f"обновлено {counts['updated']}, пропущено {counts['skipped']}"
+        )
+    return counts
+
+
+def _ingest(
+    with_summaries: bool,
+    limit: int = STREAM_MAX_ARTICLES,
+    summary_mode: str = "truncate",
+    incremental: bool = INCREMENTAL_CRAWL,
+):
+    """
+    Прогоняет поток статей через все стадии небольшими пачками:
+    первые выжимки готовы ещё до конца скрейпа, в памяти — максимум limit статей.
+    Почти-дубли сохраняются, но не суммаризируются и в дайджест не попадают.
+    incremental — обрабатываются только новые ссылки; каждая ссылка
+    запоминается в seen_urls вместе с сохранением своей пачки, а дайджест
+    добирается уже сохранёнными статьями (с готовыми выжимками).
+    RANKING_ENABLED — статьи упорядочиваются по темам (эмбеддинги), выжимки
+    считаются только для RANK_TOP_K лучших, а не для каждой пачки.
+    Возвращает статьи в виде, который понимают функции из model.py.
+    """
+    session = SessionLocal()
+    collected = []
+    batch, duplicates, seen = [], [], []
+    skipped = 0
+    counts = {"new": 0, "duplicates": 0, "rejected": 0}
+
+    # С ранжированием выжимки считаются только для лучших статей прогона (ниже)
+    summarize_batches = with_summaries and not RANKING_ENABLED
+
+    def flush():
+        saved = _upsert_articles(session, batch, summarize_batches, summary_mode)
+        saved_duplicates = _upsert_articles(session, duplicates, with_summaries=False)
+        with metrics.stage("db_upsert"):
+            # Пачка не сохранилась (откат задевает обе записи) — ссылки не запоминаем,
+            # иначе skip_known не даст скачать их снова
+            if incremental and not (saved["failed"] or saved_duplicates["failed"]):
+                incremental_state.mark_seen(session, seen)
+            session.commit()
+        batch.clear()
+        duplicates.clear()
+        seen.clear()
 
-            # --- Пропуск слишком маленьких статей ---
-            if len(content) < 200:
+    try:
+        for n in _iter_articles(incremental=incremental):
+            article = _prepare_article(n)
+            if article is None:
+                if not n.get("known"):
+                    seen.append((n.get("url", ""), "rejected"))
+                    counts["rejected"] += 1
                 continue
 
-            # --- Суммаризация (опционально) ---
-            summary_de = summarize_text_safe(content) if with_summaries else ""
-
-            # --- Категоризация ---
-            full_text_for_cat = (n.get("title", "") or "") + " " + content
-            cat = categorize(full_text_for_cat)
-
-            # --- Сохранение ---
-            art = Article(
-                title=n.get("title", "")[:512],
-                url=n.get("url", "")[:1024],
-                content=content,
-                summary_de=summary_de or "",
-                lang="de",
-                category=cat,
+            # --- Почти-дубли (MinHash/LSH, в т.ч. с прошлых прогонов) ---
+            with metrics.stage("dedupe"):
+                cluster = near_duplicates.assign(
+                    article["url"], article["title"], article["content"], session
+                )
+            if cluster != article["url"]:
+                duplicates.append(article)
+                seen.append((article["url"], "duplicate"))
+                skipped += 1
+                counts["duplicates"] += 1
+                continue
+
+            batch.append(article)
+            collected.append(article)
+            seen.append((article["url"], "article"))
+            counts["new"] += 1
+
+            if len(batch) >= INFERENCE_BATCH_SIZE:
+                flush()
+
+            if len(collected) >= limit:
+                break
+
+        flush()
+        if incremental:
+            incremental_state.save_watermark(session, counts)
+            session.commit()
+
+        if skipped:
+            print(f"🧬 Почти-дублей пропущено: {skipped}")
+
+        articles = [
+            # lead — чистое начало текста для эмбеддингов (content — сырой, ключ кэша выжимок)
+            {
+                "title": a["title"], "url": a["url"], "content": a["raw"], "lead": a["content"][:400],
+                "summary_de": a.get("summary_de", ""),
+            }
+            for a in collected
+        ]
+        if incremental:
+            print(
+                f"🆕 Дельта: новых {counts['new']}, дублей {counts['duplicates']}, "
+                f"без текста {counts['rejected']}"
+            )
+            # Новые статьи первыми, дальше — уже обработанные из БД
+            articles += incremental_state.recent_articles(
+                limit - len(articles), {a["url"] for a in articles}
             )
 
-            session.add(art)
-            session.flush()
-            saved += 1
+        if RANKING_ENABLED:
+            articles = rank_articles(articles)
+            if with_summaries:
+                # Выжимки — только лучшим новым статьям; дайджесты берут первые из списка
+                top = {a["url"] for a in articles[:RANK_TOP_K]}
+                _upsert_articles(session, [a for a in collected if a["url"] in top], True, summary_mode)
+                session.commit()
+                fresh = {a["url"]: a["summary_de"] for a in collected if a.get("summary_de")}
+                for a in articles:
+                    if not a.get("summary_de") and a["url"] in fresh:
+                        a["summary_de"] = fresh[a["url"]]
+    finally:
+        session.close()
+
+    return articles
 
-        except IntegrityError:
-            session.rollback()
-        except Exception:
-            session.rollback()
 
-    if saved:
-        print(f"💾 Сохранено статей: {saved}")
+def _save_legacy_news(session, items: list[tuple[str, str]]) -> int:
+    """Старая таблица News: одна запись на ссылку, повторные прогоны её не дублируют"""
+    rows = [
+        {"title": title[:512], "url": url[:1024], "summary": ""}
+        for title, url in items if title and url
+    ]
+    if not rows:
+        return 0
+    stmt = sqlite_insert(News).values(rows).on_conflict_do_nothing(index_elements=["url"])
+    return session.execute(stmt).rowcount
 
 
 # ---------------------------------------------------------
 #  /news — короткая выжимка
 # ---------------------------------------------------------
 def process_news_pipeline():
+    articles = _ingest(with_summaries=False)
+
     session = SessionLocal()
     try:
-        raw = _fetch_articles()
-        _upsert_articles(session, raw, with_summaries=False)
-
         # Сохраняем в старую таблицу News (совместимость)
-        news_list = json.loads(raw)
-        for n in news_list[:5]:
-            session.add(News(title=n.get("title", ""), url=n.get("url", ""), summary=""))
+        _save_legacy_news(session, [(n["title"], n["url"]) for n in articles[:5]])
         session.commit()
 
         print("🤖 AI: создаём краткую выжимку...")
-        summarized = summarize_news(raw)
+        summarized = summarize_news(articles)
 
         # Fallback, если модель вернула пустоту
         if not summarized or summarized.strip().startswith("⚠️"):
-            from sqlalchemy import text
             rows = session.execute(text("""
                 SELECT title, url
                 FROM articles
@@ -118,34 +410,110 @@ def process_news_pipeline():
 #  /smartnews — глубокая выжимка
 # ---------------------------------------------------------
 def process_smart_pipeline():
-    raw = _fetch_articles()
     print("🤖 AI: обрабатываем контент...")
+    articles = _ingest(with_summaries=True, summary_mode=SUMMARY_MODE_SMART)
 
-    session = SessionLocal()
-    try:
-        _upsert_articles(session, raw, with_summaries=True)
-        session.commit()
-    finally:
-        session.close()
-
-    return smart_summarize(raw)
+    result = smart_summarize(articles)
+    print(f"🧮 Кэш выжимок: {summary_cache.stats_line()}")
+    return result
 
 
 # ---------------------------------------------------------
 #  /multilangnews — выжимка на DE/EN/RU
 # ---------------------------------------------------------
 def process_multilang_pipeline():
-    raw = _fetch_articles()
     print("🤖 AI: создаём выжимку и переводы...")
+    articles = _ingest(with_summaries=True, summary_mode=SUMMARY_MODE_MULTILANG)
 
-    session = SessionLocal()
+    result = summarize_multilang(articles)
+    print(f"🧮 Кэш выжимок: {summary_cache.stats_line()}")
+    return result
+
+
+# ---------------------------------------------------------
+#  Сборка всех дайджестов за один скрейп (планировщик)
+# ---------------------------------------------------------
+def _is_usable(result) -> bool:
+    return bool(result) and not result.strip().startswith("⚠️")
+
+
+def build_digests():
+    print("🤖 AI: собираем дайджесты (news / smart / multilang)...")
+    articles = _ingest(with_summaries=True, summary_mode=SUMMARY_MODE_SMART)
+
+    # Выжимки из _ingest уже лежат на статьях (summary_de) — smart и multilang
+    # берут их; недостающие считаются в одном режиме, чтобы второй дайджест
+    # нашёл их в кэше, а не суммаризировал статью ещё раз
+    digests = {
+        "news": summarize_news(articles),
+        "smart": smart_summarize(articles, mode=SUMMARY_MODE_SMART),
+        "multilang": summarize_multilang(articles, mode=SUMMARY_MODE_SMART),
+    }
+    for kind, digest_text in digests.items():
+        if _is_usable(digest_text):
+            digest_store.save(kind, digest_text)
+
+    print(f"🗂️ Дайджесты обновлены. Кэш выжимок: {summary_cache.stats_line()}")
+
+
+# ---------------------------------------------------------
+#  Персональные сводки подписчиков (рассылка)
+# ---------------------------------------------------------
+def build_personal_messages(subscribers) -> list[tuple[str, str]]:
+    """
+    Один общий пул свежих статей на всю рассылку. Статьи обычно уже
+    собраны планировщиком дайджестов; если за окно ничего нет — сбор сейчас.
+    """
+    candidates = load_candidates()
+    if not candidates:
+        print("🦀 Для рассылки нет свежих статей, собираем...")
+        _ingest(with_summaries=True, summary_mode=SUMMARY_MODE_SMART)
+        candidates = load_candidates()
+    return personal_messages(subscribers, candidates)
+
+
+# ---------------------------------------------------------
+#  Асинхронные обёртки: пайплайны выполняются в пуле инференса,
+#  event loop бота не блокируется. Успешный живой результат
+#  заодно обновляет снимок дайджеста.
+# ---------------------------------------------------------
+# Одинаковые команды, пришедшие почти одновременно, делят один прогон пайплайна
+pipeline_flights = SingleFlight(reusable=_is_usable)
+
+
+async def _run_live(kind: str, fn):
+    with metrics.stage("pipeline"):
+        result = await inference_executor.run(fn)
+    if _is_usable(result):
+        digest_store.save(kind, result)
+    return result
+
+
+async def process_news_pipeline_async():
+    return await pipeline_flights.do("news", lambda: _run_live("news", process_news_pipeline))
+
+
+async def process_smart_pipeline_async():
+    return await pipeline_flights.do("smart", lambda: _run_live("smart", process_smart_pipeline))
+
+
+async def process_multilang_pipeline_async():
+    return await pipeline_flights.do(
+        "multilang", lambda: _run_live("multilang", process_multilang_pipeline)
+    )
+
+
+async def build_digests_async():
     try:
-        _upsert_articles(session, raw, with_summaries=True)
-        session.commit()
-    finally:
-        session.close()
+        with metrics.command("digest"), metrics.stage("pipeline"):
+            await inference_executor.run(build_digests, timeout=None, force=True)
+    except Exception as e:
+        print(f"❌ Ошибка сборки дайджестов: {e}")
 
-    return summarize_multilang(raw)
+
+def get_fresh_digest(kind: str):
+    """Готовый дайджест, если он не старше DIGEST_MAX_AGE_MINUTES"""
+    return digest_store.get(kind)
 
 
 # ---------------------------------------------------------
@@ -155,7 +523,8 @@ def auto_collect_news(fetch_fn, summarize_fn, session_maker):
     print("🦀 Rust: автоматический сбор новостей...")
 
     try:
-        raw = fetch_fn()
+        with metrics.stage("rust_fetch"):
+            raw = fetch_fn()
     except Exception as e:
         print(f"❌ Ошибка fetch_fn: {e}")
         return "⚠️ Ошибка получения данных из Rust."
@@ -175,16 +544,12 @@ def auto_collect_news(fetch_fn, summarize_fn, session_maker):
 
     # Сохранение в старую News (для истории)
     session = session_maker()
-    count = 0
     try:
-        news_list = json.loads(raw)
-        for n in news_list[:5]:
-            title = n.get("title", "").strip()
-            url = n.get("url", "").strip()
-            if title and url:
-                session.add(News(title=title, url=url, summary=""))
-                count += 1
-
+        with metrics.stage("json_decode"):
+            news_list = json.loads(raw)
+        count = _save_legacy_news(session, [
+            (n.get("title", "").strip(), n.get("url", "").strip()) for n in news_list[:5]
+        ])
         session.commit()
         print(f"💾 Сохранено статей в News: {count}")
 
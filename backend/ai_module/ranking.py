@@ -0,0 +1,293 @@
+import json
+import os
+import threading
+
+import numpy as np
+
+from backend.ai_module.registry import MODEL_SPECS, model_registry
+from backend.config import (
+    EMBEDDINGS_DIR,
+    RANK_SIMILARITY,
+    RANK_NOVELTY_WEIGHT,
+    RANK_HISTORY,
+)
+from backend.metrics import metrics
+
+_DTYPE = np.float32
+_LEAD_CHARS = 400
+
+
+# ---------------------------------------------------------
+#  Эмбеддинги: заголовок + лид, средний вектор токенов, L2-норма
+# ---------------------------------------------------------
+def embedding_input(item: dict) -> str:
+    lead = " ".join((item.get("lead") or item.get("content") or "")[:_LEAD_CHARS].split())
+    return f"{(item.get('title') or '').strip()}. {lead}"
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-12)
+
+
+def embed_texts(texts: list[str], pipe=None) -> np.ndarray:
+    """
+    Матрица [n, dim] float32 с нормированными строками (косинус = скалярное произведение).
+    Тексты идут в pipeline по одному: при батчинге feature-extraction
+    возвращает и позиции паддинга, а они испортили бы среднее.
+    """
+    if not texts:
+        return np.zeros((0, 0), dtype=_DTYPE)
+    pipe = pipe or model_registry.get("embedder")
+    with metrics.stage("embed"):
+        outputs = pipe(texts, return_tensors=True, truncation=True)
+        vectors = []
+        for out in outputs:
+            tokens = np.asarray(out, dtype=_DTYPE)
+            vectors.append(tokens.reshape(-1, tokens.shape[-1]).mean(axis=0))
+    return _normalize(np.vstack(vectors).astype(_DTYPE, copy=False))
+
+
+# ---------------------------------------------------------
+#  Хранилище векторов на диске
+# ---------------------------------------------------------
+class EmbeddingStore:
+    """
+    Векторы статей между прогонами:
+    - vectors.f32 — упакованная матрица float32 [n, dim], только дописывается,
+      читается через np.memmap (в память попадают лишь нужные страницы)
+    - urls.txt — URL по строке на вектор, в том же порядке
+    - meta.json — модель и размерность; сменилась модель — хранилище заново
+    """
+
+    def __init__(self, directory: str = EMBEDDINGS_DIR, model: str = MODEL_SPECS["embedder"]["model"]):
+        self.directory = directory
+        self.model = model
+        self.dim = None
+        self._index = None  # url -> номер строки
+        self._urls = []
+        self._lock = threading.Lock()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _load(self):
+        if self._index is not None:
+            return
+        self._index, self._urls = {}, []
+        try:
+            with open(self._path("meta.json"), encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return
+        if meta.get("model") != self.model:
+            print(f"♻️ Эмбеддинги посчитаны другой моделью ({meta.get('model')}), начинаем заново")
+            self._reset()
+            return
+
+        self.dim = meta["dim"]
+        try:
+            with open(self._path("urls.txt"), encoding="utf-8") as f:
+                urls = f.read().splitlines()
+        except OSError:
+            urls = []
+        try:
+            size = os.path.getsize(self._path("vectors.f32"))
+        except OSError:
+            size = 0
+
+        # после падения между записями файлы могут разойтись — берём общее
+        rows = min(size // (self.dim * 4), len(urls))
+        self._urls = urls[:rows]
+        self._index = {url: i for i, url in enumerate(self._urls)}
+        if rows != len(urls) or rows * self.dim * 4 != size:
+            self._rewrite_tail(rows)
+
+    def _rewrite_tail(self, rows: int):
+        with open(self._path("vectors.f32"), "a+b") as f:
+            f.truncate(rows * self.dim * 4)
+        with open(self._path("urls.txt"), "w", encoding="utf-8") as f:
+            f.writelines(f"{url}\n" for url in self._urls)
+
+    def _write_meta(self):
+        with open(self._path("meta.json"), "w", encoding="utf-8") as f:
+            json.dump({"model": self.model, "dim": self.dim}, f)
+
+    def _reset(self):
+        for name in ("vectors.f32", "urls.txt", "meta.json"):
+            try:
+                os.remove(self._path(name))
+            except OSError:
+                pass
+        self.dim = None
+        self._index, self._urls = {}, []
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._load()
+            return len(self._urls)
+
+    def _matrix(self) -> np.ndarray:
+        if not self._urls:
+            return np.zeros((0, self.dim or 0), dtype=_DTYPE)
+        return np.memmap(self._path("vectors.f32"), dtype=_DTYPE, mode="r", shape=(len(self._urls), self.dim))
+
+    def lookup(self, urls: list[str]) -> dict:
+        """url -> вектор для тех, что уже посчитаны"""
+        with self._lock:
+            self._load()
+            rows = {url: self._index[url] for url in urls if url in self._index}
+            if not rows:
+                return {}
+            matrix = self._matrix()
+            return {url: np.array(matrix[i]) for url, i in rows.items()}
+
+    def add(self, urls: list[str], vectors: np.ndarray):
+        with self._lock:
+            self._load()
+            fresh = [(url, i) for i, url in enumerate(urls) if url and url not in self._index]
+            if not fresh:
+                return
+            if self.dim is None:
+                # остатки без meta.json (другая модель, прерванное сжатие) не нужны
+                self._reset()
+                os.makedirs(self.directory, exist_ok=True)
+                self.dim = int(vectors.shape[1])
+                self._write_meta()
+
+            block = np.ascontiguousarray(vectors[[i for _, i in fresh]], dtype=_DTYPE)
+            with open(self._path("vectors.f32"), "ab") as f:
+                f.write(block.tobytes())
+            with open(self._path("urls.txt"), "a", encoding="utf-8") as f:
+                f.writelines(f"{url}\n" for url, _ in fresh)
+            for url, _ in fresh:
+                self._index[url] = len(self._urls)
+                self._urls.append(url)
+
+    def compact(self, keep: int) -> int:
+        """
+        Оставляет последние keep векторов (новизна смотрит только на свежие).
+        Файлы пишутся рядом и подменяются через os.replace. Возвращает, сколько удалено.
+        """
+        with self._lock:
+            self._load()
+            drop = len(self._urls) - keep
+            if keep <= 0 or drop <= 0:
+                return 0
+            tail = np.array(self._matrix()[drop:])
+            urls = self._urls[drop:]
+
+            with open(self._path("vectors.f32.tmp"), "wb") as f:
+                f.write(tail.tobytes())
+            with open(self._path("urls.txt.tmp"), "w", encoding="utf-8") as f:
+                f.writelines(f"{url}\n" for url in urls)
+            # без meta.json хранилище считается пустым: если упадём между
+            # заменами, строки и URL не разойдутся — хранилище начнётся заново
+            os.remove(self._path("meta.json"))
+            os.replace(self._path("vectors.f32.tmp"), self._path("vectors.f32"))
+            os.replace(self._path("urls.txt.tmp"), self._path("urls.txt"))
+            self._write_meta()
+
+            self._urls = urls
+            self._index = {url: i for i, url in enumerate(urls)}
+            return drop
+
+    def history(self, limit: int = RANK_HISTORY, exclude: set | None = None) -> np.ndarray:
+        """Последние limit векторов (кроме exclude) — с ними сравнивается новизна"""
+        with self._lock:
+            self._load()
+            start = max(0, len(self._urls) - limit)
+            keep = [i for i in range(start, len(self._urls)) if not exclude or self._urls[i] not in exclude]
+            if not keep:
+                return np.zeros((0, self.dim or 0), dtype=_DTYPE)
+            return np.array(self._matrix()[keep])
+
+
+# ---------------------------------------------------------
+#  Темы прогона и выбор статьи на тему
+# ---------------------------------------------------------
+def cluster_topics(vectors: np.ndarray, threshold: float = RANK_SIMILARITY):
+    """
+    Жадная кластеризация по матрице косинусов (одно матричное умножение):
+    центр темы — статья с наибольшим числом соседей выше threshold,
+    в тему идут все её ещё не разобранные соседи.
+    Возвращает (темы — списки индексов, матрица сходства).
+    """
+    n = len(vectors)
+    sim = vectors @ vectors.T
+    adjacency = sim >= threshold
+    np.fill_diagonal(adjacency, True)
+    free = np.ones(n, dtype=bool)
+
+    topics = []
+    for i in np.argsort(-adjacency.sum(axis=1), kind="stable"):
+        if not free[i]:
+            continue
+        members = np.flatnonzero(adjacency[i] & free)
+        free[members] = False
+        topics.append(members.tolist())
+    return topics, sim
+
+
+def novelty(vectors: np.ndarray, history: np.ndarray) -> np.ndarray:
+    """1 − наибольшее сходство с прошлыми статьями (нет истории — всё новое)"""
+    if not len(history) or history.shape[1] != vectors.shape[1]:
+        return np.ones(len(vectors), dtype=_DTYPE)
+    return np.clip(1.0 - (vectors @ history.T).max(axis=1), 0.0, 1.0)
+
+
+def rank_articles(
+    items: list[dict],
+    store: "EmbeddingStore | None" = None,
+    threshold: float = RANK_SIMILARITY,
+    novelty_weight: float = RANK_NOVELTY_WEIGHT,
+    pipe=None,
+) -> list[dict]:
+    """
+    Переупорядочивает статьи прогона:
+    - сначала по одной статье на тему (темы — от самых обсуждаемых),
+      внутри темы — самая центральная и новая
+    - за ними остальные статьи тем в том же порядке
+    Статьи, посчитанные в прошлых прогонах, новизны не имеют.
+    Без эмбеддингов (модель не загрузилась) — исходный порядок.
+    """
+    if len(items) < 2:
+        return list(items)
+    store = store if store is not None else embedding_store
+    urls = [item["url"] for item in items]
+
+    try:
+        known = store.lookup(urls)
+        todo = [i for i, url in enumerate(urls) if url not in known]
+        computed = embed_texts([embedding_input(items[i]) for i in todo], pipe)
+    except Exception as e:
+        print(f"⚠️ Ранжирование пропущено, эмбеддинги недоступны: {e}")
+        return list(items)
+
+    with metrics.stage("rank"):
+        fresh = dict(zip(todo, computed))
+        vectors = np.vstack([fresh[i] if i in fresh else known[url] for i, url in enumerate(urls)])
+
+        novel = novelty(vectors, store.history(exclude=set(urls)))
+        novel[[i for i, url in enumerate(urls) if url in known]] = 0.0
+
+        topics, sim = cluster_topics(vectors, threshold)
+        leaders, scores = [], {}
+        for members in topics:
+            centrality = sim[np.ix_(members, members)].mean(axis=1)
+            score = (1 - novelty_weight) * centrality + novelty_weight * novel[members]
+            order = [members[j] for j in np.argsort(-score, kind="stable")]
+            leaders.append(order)
+            scores[order[0]] = float(score.max())
+
+        # темы: больше статей — важнее, при равенстве — лучшая статья темы
+        leaders.sort(key=lambda order: (-len(order), -scores[order[0]]))
+        ranked = [order[0] for order in leaders] + [i for order in leaders for i in order[1:]]
+
+    if todo:
+        store.add([urls[i] for i in todo], computed)
+    print(f"🧭 Ранжирование: {len(items)} статей → {len(topics)} тем (новых векторов {len(todo)})")
+    return [items[i] for i in ranked]
+
+
+embedding_store = EmbeddingStore()
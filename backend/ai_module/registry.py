@@ -0,0 +1,163 @@
+import gc
+import threading
+import time
+
+from backend.config import MODEL_IDLE_TTL, MODEL_OVERRIDES
+from backend.ai_module.backends import backend_for, build_pipeline
+
+try:
+    import psutil
+except ImportError:  # psutil не обязателен — тогда без RSS в статистике
+    psutil = None
+
+
+# --- Какие модели умеем загружать ---
+MODEL_SPECS = {
+    # Суммаризация немецких новостей
+    "summarizer": {
+        "task": "summarization",
+        "model": "sshleifer/distilbart-cnn-12-6",
+    },
+    # Переводчики
+    "translator_de_en": {
+        "task": "translation",
+        "model": "Helsinki-NLP/opus-mt-de-en",
+    },
+    "translator_de_ru": {
+        "task": "translation",
+        "model": "facebook/nllb-200-distilled-600M",
+        "src_lang": "deu_Latn",
+        "tgt_lang": "rus_Cyrl",
+    },
+    # Эмбеддинги заголовков и лидов (ранжирование и темы прогона)
+    "embedder": {
+        "task": "feature-extraction",
+        "model": "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2",
+    },
+}
+
+
+def _apply_overrides(specs: dict, overrides: list[str]) -> dict:
+    """MODEL_OVERRIDES: "имя=чекпойнт" — та же задача, другая (например, маленькая) модель"""
+    specs = {name: dict(spec) for name, spec in specs.items()}
+    for item in overrides:
+        name, _, model = item.partition("=")
+        if name.strip() in specs and model.strip():
+            specs[name.strip()]["model"] = model.strip()
+        else:
+            print(f"⚠️ Некорректное переопределение модели: {item}")
+    return specs
+
+
+MODEL_SPECS = _apply_overrides(MODEL_SPECS, MODEL_OVERRIDES)
+
+
+def _rss_mb():
+    if psutil is None:
+        return None
+    return psutil.Process().memory_info().rss / 2**20
+
+
+def _params_mb(pipe):
+    """Размер весов модели в памяти"""
+    try:
+        return sum(p.numel() * p.element_size() for p in pipe.model.parameters()) / 2**20
+    except Exception:
+        return None
+
+
+class ModelRegistry:
+    """
+    Ленивый реестр HF-пайплайнов:
+    - модель грузится при первом get()
+    - unload_idle() выгружает модели, к которым не обращались дольше TTL
+    - stats() — время загрузки и память по каждой модели
+    - бэкенд (torch / int8 / onnx) выбирается по MODEL_BACKEND и переопределениям
+    """
+
+    def __init__(self, specs: dict = MODEL_SPECS, idle_ttl: int = MODEL_IDLE_TTL, backends: dict | None = None):
+        self._specs = specs
+        self.idle_ttl = idle_ttl
+        self._backends = backends or {name: backend_for(name) for name in specs}
+        self._models = {}
+        self._last_used = {}
+        self._info = {}
+        self._locks = {name: threading.Lock() for name in specs}
+
+    def get(self, name: str):
+        pipe = self._models.get(name)
+        if pipe is None:
+            with self._locks[name]:
+                pipe = self._models.get(name)
+                if pipe is None:
+                    pipe = self._load(name)
+        self._last_used[name] = time.monotonic()
+        return pipe
+
+    def _load(self, name: str):
+        # transformers (и torch / optimum) импортируются только когда модель реально нужна
+        rss_before = _rss_mb()
+        started = time.perf_counter()
+        pipe, backend = build_pipeline(self._specs[name], self._backends.get(name, "torch"))
+        load_seconds = time.perf_counter() - started
+        rss_after = _rss_mb()
+
+        info = {
+            "backend": backend,
+            "load_seconds": round(load_seconds, 2),
+            "params_mb": _params_mb(pipe),
+            "rss_delta_mb": None if rss_before is None else rss_after - rss_before,
+            "loads": self._info.get(name, {}).get("loads", 0) + 1,
+        }
+        self._info[name] = info
+        self._models[name] = pipe
+
+        size = f"~{info['params_mb']:.0f} MB" if info["params_mb"] else "размер неизвестен"
+        print(f"🧠 Модель {name} [{backend}] загружена за {load_seconds:.1f} c ({size})")
+        return pipe
+
+    def install(self, name: str, pipe):
+        """Подставить готовый пайплайн (заглушки в бенчмарках, заранее собранные модели)"""
+        with self._locks[name]:
+            self._models[name] = pipe
+            self._info[name] = {**self._info.get(name, {}), "backend": "installed"}
+        self._last_used[name] = time.monotonic()
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._models
+
+    def unload(self, name: str):
+        with self._locks[name]:
+            if self._models.pop(name, None) is None:
+                return
+        gc.collect()
+        print(f"💤 Модель {name} выгружена")
+
+    def unload_idle(self):
+        """Выгружает модели, простаивающие дольше idle_ttl (вызывается планировщиком)"""
+        if self.idle_ttl <= 0:
+            return
+        now = time.monotonic()
+        for name in list(self._models):
+            if now - self._last_used.get(name, now) > self.idle_ttl:
+                self.unload(name)
+
+    def prewarm(self, names: list[str]):
+        """Заранее грузит модели (в фоне, после старта бота)"""
+        for name in names:
+            if name not in self._specs:
+                print(f"⚠️ Неизвестная модель для прогрева: {name}")
+                continue
+            try:
+                self.get(name)
+            except Exception as e:
+                print(f"❌ Не удалось прогреть {name}: {e}")
+
+    def stats(self) -> dict:
+        return {
+            name: {**self._info.get(name, {}), "loaded": name in self._models}
+            for name in self._specs
+        }
+
+
+model_registry = ModelRegistry()
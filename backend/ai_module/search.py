@@ -0,0 +1,90 @@
+import re
+import time
+
+from sqlalchemy import text
+
+from backend.db.database import SessionLocal
+
+# Слова запроса: буквы/цифры в любом алфавите, остальное (кавычки, * , -, OR) отбрасываем,
+# чтобы пользовательский ввод не превращался в синтаксис FTS5
+_TERM_RE = re.compile(r"\w+", re.UNICODE)
+MAX_TERMS = 8
+
+# Индекс (unicode61 remove_diacritics 2) сводит ü к u, но не знает немецкой
+# транслитерации: Mueller и Müller, Strasse и Straße для него разные слова
+_GERMAN_SPELLINGS = (("ä", "ae"), ("ö", "oe"), ("ü", "ue"), ("ß", "ss"))
+
+
+def _spellings(term: str) -> list[str]:
+    """Слово и его написания с умлаутами / через ae, oe, ue, ss"""
+    forms = {term}
+    for letter, digraph in _GERMAN_SPELLINGS:
+        forms |= {f.replace(letter, digraph) for f in forms} | {f.replace(digraph, letter) for f in forms}
+    return sorted(forms)
+
+
+def build_match_query(query: str) -> str:
+    """
+    Запрос пользователя -> выражение MATCH:
+    каждое слово в кавычках и с префиксом (Regierung* найдёт и Regierungen),
+    написания Mueller/Müller, Strasse/Straße — через OR,
+    все слова обязательны (AND).
+    """
+    terms = [t for t in _TERM_RE.findall(query.lower()) if len(t) >= 2][:MAX_TERMS]
+    groups = []
+    for term in terms:
+        forms = [f'"{form}"*' for form in _spellings(term)]
+        groups.append(forms[0] if len(forms) == 1 else "(" + " OR ".join(forms) + ")")
+    return " AND ".join(groups)
+
+
+def search_articles(query: str, limit: int = 5, session_maker=SessionLocal) -> list[dict]:
+    """
+    Поиск по articles_fts: ранжирование BM25 (совпадение в заголовке весит в 5 раз больше),
+    фрагмент текста вокруг найденных слов.
+    У статей, чей текст ушёл в архив, ищется по заголовку и выжимке (archived=True).
+    """
+    match = build_match_query(query)
+    if not match:
+        return []
+
+    session = session_maker()
+    try:
+        # Сначала только rowid лучших limit совпадений, потом фрагменты для них:
+        # иначе SQLite считает snippet() для каждого совпадения до сортировки
+        rows = session.execute(text("""
+            WITH top AS (
+                SELECT rowid, bm25(articles_fts, 5.0, 1.0) AS score
+                FROM articles_fts
+                WHERE articles_fts MATCH :match
+                ORDER BY score
+                LIMIT :limit
+            )
+            SELECT a.title, a.url, a.category, a.archived_at IS NOT NULL AS archived,
+                   snippet(articles_fts, 1, '«', '»', '…', 16) AS fragment
+            FROM articles_fts
+            JOIN top ON top.rowid = articles_fts.rowid
+            JOIN articles a ON a.id = articles_fts.rowid
+            WHERE articles_fts MATCH :match
+            ORDER BY top.score
+        """), {"match": match, "limit": limit}).fetchall()
+    finally:
+        session.close()
+
+    return [
+        {"title": title, "url": url, "category": category, "archived": bool(archived), "snippet": fragment}
+        for title, url, category, archived, fragment in rows
+    ]
+
+
+def rebuild_index(session_maker=SessionLocal) -> float:
+    """Полная пересборка articles_fts из articles (+ слияние сегментов). Возвращает секунды."""
+    started = time.perf_counter()
+    session = session_maker()
+    try:
+        session.execute(text("INSERT INTO articles_fts(articles_fts) VALUES ('rebuild')"))
+        session.execute(text("INSERT INTO articles_fts(articles_fts) VALUES ('optimize')"))
+        session.commit()
+    finally:
+        session.close()
+    return time.perf_counter() - started
@@ -0,0 +1,182 @@
+import contextvars
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import select, text
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from backend.ai_module.batching import run_batched
+from backend.ai_module.cache import content_hash
+from backend.ai_module.chunking import split_sentences
+from backend.ai_module.registry import model_registry
+from backend.config import TRANSLATION_MEMORY_SIZE
+from backend.db.database import SessionLocal
+from backend.db.models import TranslationMemory
+from backend.metrics import metrics
+
+TRANSLATORS = {
+    "en": "translator_de_en",
+    "ru": "translator_de_ru",
+}
+
+# Куда в articles пишется готовый перевод выжимки
+_ARTICLE_COLUMNS = {
+    "en": "summary_en",
+    "ru": "summary_ru",
+}
+
+# SQLite ограничивает число параметров в запросе
+_IN_CHUNK = 500
+
+
+class TranslationService:
+    """
+    Перевод выжимок DE -> en/ru через память переводов:
+    - выжимка режется на предложения, одинаковые предложения переводятся один раз
+    - память: LRU в процессе + таблица translation_memory
+    - всё непереведённое по всем статьям — одним батчем на язык
+    - translate_all() гоняет языки параллельно (каждый своей моделью)
+    """
+
+    def __init__(self, session_maker=SessionLocal, maxsize: int = TRANSLATION_MEMORY_SIZE):
+        self._session_maker = session_maker
+        self.maxsize = maxsize
+        self._memory = OrderedDict()  # (lang, хэш предложения) -> перевод
+        self._lock = threading.Lock()
+
+    # --- Память переводов ---
+    def _lookup(self, lang: str, hashes: set[str]) -> dict:
+        found = {}
+        with self._lock:
+            for h in hashes:
+                value = self._memory.get((lang, h))
+                if value is not None:
+                    self._memory.move_to_end((lang, h))
+                    found[h] = value
+
+        missing = list(hashes - found.keys())
+        if not missing:
+            return found
+
+        session = self._session_maker()
+        try:
+            for start in range(0, len(missing), _IN_CHUNK):
+                rows = session.execute(
+                    select(TranslationMemory.source_hash, TranslationMemory.target).where(
+                        TranslationMemory.lang == lang,
+                        TranslationMemory.source_hash.in_(missing[start:start + _IN_CHUNK]),
+                    )
+                ).all()
+                found.update(rows)
+                self._remember(lang, rows)
+        except Exception as e:
+            print(f"⚠️ Память переводов недоступна: {e}")
+        finally:
+            session.close()
+        return found
+
+    def _remember(self, lang: str, pairs):
+        with self._lock:
+            for h, value in pairs:
+                self._memory[(lang, h)] = value
+                self._memory.move_to_end((lang, h))
+            while len(self._memory) > self.maxsize:
+                self._memory.popitem(last=False)
+
+    def _store(self, lang: str, rows: list[dict]):
+        if not rows:
+            return
+        self._remember(lang, [(r["source_hash"], r["target"]) for r in rows])
+
+        session = self._session_maker()
+        try:
+            session.execute(
+                sqlite_insert(TranslationMemory)
+                .values(rows)
+                .on_conflict_do_nothing(index_elements=["lang", "source_hash"])
+            )
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            print(f"⚠️ Не удалось сохранить переводы: {e}")
+        finally:
+            session.close()
+
+    # --- Перевод ---
+    def translate(self, texts: list[str], lang: str) -> list[str | None]:
+        """Перевод списка текстов; None — если не перевелось хотя бы одно предложение"""
+        segmented = [split_sentences(t or "") for t in texts]
+        sources = {content_hash(s): s for sentences in segmented for s in sentences}
+        if not sources:
+            return [None] * len(texts)
+
+        translated = self._lookup(lang, set(sources))
+        pending = [h for h in sources if h not in translated]
+
+        if pending:
+            with metrics.stage(f"translate_{lang}"):
+                outputs = run_batched(
+                    model_registry.get(TRANSLATORS[lang]), [sources[h] for h in pending]
+                )
+            rows = []
+            for h, out in zip(pending, outputs):
+                if out and "translation_text" in out:
+                    translated[h] = out["translation_text"]
+                    rows.append({
+                        "lang": lang,
+                        "source_hash": h,
+                        "source": sources[h],
+                        "target": translated[h],
+                    })
+            self._store(lang, rows)
+
+        results = []
+        for sentences in segmented:
+            parts = [translated.get(content_hash(s)) for s in sentences]
+            results.append(" ".join(parts) if parts and all(parts) else None)
+        return results
+
+    def translate_all(self, texts: list[str], langs=("en", "ru")) -> dict:
+        """Все языки параллельно: {lang: [перевод | None, ...]}"""
+        if len(langs) == 1:
+            return {langs[0]: self.translate(texts, langs[0])}
+
+        with ThreadPoolExecutor(max_workers=len(langs), thread_name_prefix="translate") as pool:
+            futures = {
+                lang: pool.submit(contextvars.copy_context().run, self.translate, texts, lang)
+                for lang in langs
+            }
+            return {lang: future.result() for lang, future in futures.items()}
+
+    # --- Сохранение в articles ---
+    def save_to_articles(self, lang: str, urls, sources, targets):
+        """
+        Пишет переводы в articles.summary_en / summary_ru, только если
+        в строке лежит та же summary_de, с которой переводили
+        (иначе кэш выжимок не признает перевод актуальным).
+        """
+        column = _ARTICLE_COLUMNS[lang]
+        rows = [
+            {"url": url, "src": src, "dst": dst}
+            for url, src, dst in zip(urls, sources, targets)
+            if url and src and dst
+        ]
+        if not rows:
+            return
+
+        session = self._session_maker()
+        try:
+            session.execute(
+                text(f"UPDATE articles SET {column} = :dst WHERE url = :url AND summary_de = :src"),
+                rows,
+            )
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            print(f"⚠️ Не удалось сохранить переводы в articles: {e}")
+        finally:
+            session.close()
+
+
+translation_service = TranslationService()
@@ -0,0 +1,151 @@
+"""
+Бенчмарк бэкендов инференса (torch fp32 / int8 / onnx) на одном наборе статей:
+- задержка на текст (после прогрева)
+- память: прирост RSS при загрузке (нужен psutil)
+- похожесть выходов на fp32: ROUGE-L F1 по словам
+
+    python -m backend.bench.bench_backends --model summarizer --backends torch,int8,onnx
+    python -m backend.bench.bench_backends --model translator_de_ru --size 16 --json out.json
+
+Первый прогон onnx включает экспорт в ONNX_CACHE_DIR (время загрузки это покажет).
+"""
+import argparse
+import gc
+import json
+import sqlite3
+import statistics
+import time
+
+from backend.ai_module.backends import BACKENDS, build_pipeline
+from backend.ai_module.batching import run_batched
+from backend.ai_module.chunking import split_sentences
+from backend.ai_module.registry import MODEL_SPECS, _rss_mb
+
+FALLBACK = [
+    "Die Bundesregierung hat am Mittwoch einen neuen Haushaltsentwurf vorgelegt. "
+    "Nach wochenlangen Verhandlungen einigten sich die Koalitionspartner auf Einsparungen "
+    "in mehreren Ministerien. Die Opposition kritisierte den Entwurf als unsozial.",
+    "Die Inflation in Deutschland ist im Oktober weiter gesunken. Nach Angaben des "
+    "Statistischen Bundesamtes lagen die Verbraucherpreise 2,1 Prozent über dem Vorjahr. "
+    "Ökonomen erwarten, dass die Energiepreise in den kommenden Monaten stabil bleiben.",
+]
+
+
+def load_articles(db_path: str, size: int, model: str) -> list[str]:
+    """Фиксированный набор: первые статьи по id (для переводчиков — первые 2 предложения)"""
+    texts = []
+    try:
+        conn = sqlite3.connect(db_path)
+        texts = [c for (c,) in conn.execute(
+            "SELECT content FROM articles WHERE length(content) > 500 ORDER BY id LIMIT ?", (size,)
+        )]
+        conn.close()
+    except sqlite3.Error:
+        pass
+    while len(texts) < size:
+        texts.append(FALLBACK[len(texts) % len(FALLBACK)])
+
+    if MODEL_SPECS[model]["task"] == "translation":
+        return [" ".join(split_sentences(t)[:2]) for t in texts]
+    return [t[:1800] for t in texts]
+
+
+def _lcs(a: list[str], b: list[str]) -> int:
+    prev = [0] * (len(b) + 1)
+    for x in a:
+        cur = [0]
+        for j, y in enumerate(b):
+            cur.append(prev[j] + 1 if x == y else max(prev[j + 1], cur[j]))
+        prev = cur
+    return prev[-1]
+
+
+def rouge_l(candidate: str, reference: str) -> float:
+    """ROUGE-L F1 по словам (без внешних зависимостей)"""
+    a, b = candidate.lower().split(), reference.lower().split()
+    if not a or not b:
+        return 0.0
+    lcs = _lcs(a, b)
+    if not lcs:
+        return 0.0
+    precision, recall = lcs / len(a), lcs / len(b)
+    return 2 * precision * recall / (precision + recall)
+
+
+def _output_text(out) -> str:
+    if not out:
+        return ""
+    return out.get("summary_text") or out.get("translation_text") or ""
+
+
+def run_backend(model: str, backend: str, texts: list[str], repeats: int) -> dict:
+    spec = MODEL_SPECS[model]
+    kwargs = {"do_sample": False, "truncation": True}
+    if spec["task"] == "summarization":
+        kwargs.update(max_length=80, min_length=25)
+
+    gc.collect()
+    rss_before = _rss_mb()
+    started = time.perf_counter()
+    pipe, used = build_pipeline(spec, backend)
+    load_s = time.perf_counter() - started
+    rss_after = _rss_mb()
+
+    run_batched(pipe, texts[:1], **kwargs)  # прогрев
+
+    timings, outputs = [], []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        outputs = run_batched(pipe, texts, **kwargs)
+        timings.append(time.perf_counter() - started)
+
+    del pipe
+    gc.collect()
+    return {
+        "backend": used,
+        "load_s": round(load_s, 2),
+        "rss_delta_mb": None if rss_before is None else round(rss_after - rss_before, 1),
+        "ms_per_text": round(statistics.median(timings) / len(texts) * 1000, 1),
+        "outputs": [_output_text(o) for o in outputs],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--model", default="summarizer",
+        choices=sorted(n for n, spec in MODEL_SPECS.items() if spec["task"] != "feature-extraction"),
+    )
+    parser.add_argument("--backends", default=",".join(BACKENDS))
+    parser.add_argument("--db", default="news.db")
+    parser.add_argument("--size", type=int, default=8)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--json", help="куда сохранить результаты")
+    args = parser.parse_args()
+
+    texts = load_articles(args.db, args.size, args.model)
+    backends = [b.strip() for b in args.backends.split(",") if b.strip()]
+    if "torch" not in backends:
+        backends.insert(0, "torch")  # эталон для ROUGE
+
+    results = {b: run_backend(args.model, b, texts, args.repeats) for b in backends}
+    reference = results["torch"]["outputs"]
+
+    print(f"Модель: {args.model}, текстов: {len(texts)}, повторов: {args.repeats}")
+    print(f"{'бэкенд':8s} {'загрузка':>9s} {'RSS, MB':>8s} {'ms/текст':>9s} {'ROUGE-L':>8s}")
+    for name, r in results.items():
+        r["rouge_l"] = round(statistics.mean(
+            rouge_l(out, ref) for out, ref in zip(r["outputs"], reference)
+        ), 3)
+        rss = "—" if r["rss_delta_mb"] is None else f"{r['rss_delta_mb']:.0f}"
+        label = name if r["backend"] == name else f"{name}→{r['backend']}"
+        print(f"{label:8s} {r['load_s']:8.1f}s {rss:>8s} {r['ms_per_text']:9.1f} {r['rouge_l']:8.3f}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"model": args.model, "texts": len(texts), "results": results}, f,
+                      ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Бенчмарк категоризации: старый вложенный цикл `kw in text` (первое совпадение)
+против подсчёта всех ключевых слов по заголовку и лиду из category.py.
+
+Корпус — статьи из news.db (если есть), дополненные синтетическими.
+
+    python -m backend.bench.bench_category --db news.db --size 2000
+"""
+import argparse
+import random
+import sqlite3
+import time
+from collections import Counter
+
+from backend.ai_module.category import CATEGORIES, categorize_many
+
+SYNTHETIC = [
+    ("Bundesregierung streitet über Haushalt", "Die Koalition aus SPD, Grünen und FDP ringt um den Etat. Der Kanzler will bis Freitag eine Einigung."),
+    ("Neue Kita-Plätze für Kinder in Berlin", "Die neue Schule und mehr Plätze für Familien: Die Stadt investiert in Bildung und Gesundheit."),
+    ("Inflation sinkt weiter", "Die Energiepreise fallen, Unternehmen und Handel atmen auf. Der Arbeitsmarkt bleibt stabil."),
+    ("KI-Startup sammelt Millionen ein", "Das Unternehmen entwickelt Software für künstliche Intelligenz und Cyber-Abwehr."),
+    ("Israel und die USA beraten über Nahost", "Gespräche in Washington, auch China und Frankreich sind beteiligt."),
+]
+
+# Категории синтетических статей, как их отнёс бы человек
+EXPECTED = {
+    "Bundesregierung streitet über Haushalt": "politics",
+    "Neue Kita-Plätze für Kinder in Berlin": "society",
+    "Inflation sinkt weiter": "economy",
+    "KI-Startup sammelt Millionen ein": "tech",
+    "Israel und die USA beraten über Nahost": "world",
+}
+
+
+def categorize_legacy(text: str) -> str:
+    """Реализация до подсчёта по всем категориям"""
+    text = text.lower()
+    for category, keywords in CATEGORIES.items():
+        for kw in keywords:
+            if kw in text:
+                return category
+    return "other"
+
+
+def load_corpus(db_path: str, size: int) -> list[tuple[str, str]]:
+    corpus = []
+    try:
+        conn = sqlite3.connect(db_path)
+        corpus = [(t or "", c or "") for t, c in conn.execute("SELECT title, content FROM articles")]
+        conn.close()
+    except sqlite3.Error:
+        pass
+
+    rnd = random.Random(0)
+    base = corpus + SYNTHETIC
+    while len(corpus) < size:
+        title, body = rnd.choice(base)
+        corpus.append((title, body * rnd.randint(1, 8)))
+    return corpus[:size]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--db", default="news.db")
+    parser.add_argument("--size", type=int, default=2000)
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.db, args.size)
+    chars = sum(len(t) + len(b) for t, b in corpus)
+
+    started = time.perf_counter()
+    legacy = [categorize_legacy(f"{t} {b}") for t, b in corpus]
+    legacy_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    new = [cat for cat, _ in categorize_many(corpus)]
+    new_s = time.perf_counter() - started
+
+    print(f"Статей: {len(corpus)}, символов: {chars}")
+    print(f"старый категоризатор: {legacy_s * 1000:8.1f} ms  ({legacy_s / len(corpus) * 1e6:6.1f} µs/статья)")
+    print(f"новый матчер:         {new_s * 1000:8.1f} ms  ({new_s / len(corpus) * 1e6:6.1f} µs/статья)")
+
+    changed = Counter((a, b) for a, b in zip(legacy, new) if a != b)
+    agree = sum(a == b for a, b in zip(legacy, new)) / len(corpus)
+    print(f"совпадение категорий: {agree:.1%}")
+    for (a, b), n in changed.most_common(10):
+        print(f"  {a:10s} -> {b:10s} {n}")
+
+    labeled = [(i, EXPECTED[t]) for i, (t, _) in enumerate(corpus) if t in EXPECTED]
+    if labeled:
+        for name, result in (("старый", legacy), ("новый", new)):
+            right = sum(result[i] == expected for i, expected in labeled) / len(labeled)
+            print(f"верно на размеченных ({len(labeled)}), {name}: {right:.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Бенчмарк очистки текста: старый clean_article (BeautifulSoup на каждую
+статью, lower() всего текста) против однопроходного cleaner.clean_articles.
+
+Корпус — тексты из news.db (если есть), дополненные синтетическими,
+часть из них — с HTML-разметкой.
+
+    python -m backend.bench.bench_cleaner --db news.db --size 2000
+"""
+import argparse
+import random
+import re
+import sqlite3
+import time
+
+from bs4 import BeautifulSoup
+
+from backend.ai_module.cleaner import NAVIGATION_PHRASES, clean_articles
+
+SYNTHETIC = [
+    "Zum Inhalt springen\nZur Hauptnavigation springen\nDie Bundesregierung hat am Mittwoch "
+    "einen neuen Haushaltsentwurf vorgelegt. Finanzminister und Kanzler sprechen von einem Kompromiss.",
+    "Die Inflation in Deutschland ist im Oktober weiter gesunken.  Ökonomen erwarten, "
+    "dass die Energiepreise stabil bleiben. Please enable JavaScript to view this video.",
+    "<p>Das Startup aus M&uuml;nchen entwickelt <b>Software</b> f&uuml;r K&uuml;nstliche Intelligenz.</p>"
+    "<script>var x = 1;</script><p>Zu weiteren Angeboten der Redaktion.</p>",
+]
+
+
+def clean_article_legacy(text: str) -> str:
+    """Реализация до однопроходного очистителя"""
+    if not text:
+        return ""
+    try:
+        cleaned = BeautifulSoup(text, "html.parser").get_text(separator=" ")
+    except Exception:
+        cleaned = text
+    cleaned = re.sub(r"\s+", " ", cleaned).strip()
+    lowered = cleaned.lower()
+    for phrase in NAVIGATION_PHRASES:
+        if phrase in lowered:
+            lowered = lowered.replace(phrase, "")
+    return re.sub(r"\s+", " ", lowered.strip()).strip()
+
+
+def load_corpus(db_path: str, size: int) -> list[str]:
+    corpus = []
+    try:
+        conn = sqlite3.connect(db_path)
+        corpus = [c for (c,) in conn.execute("SELECT content FROM articles") if c]
+        conn.close()
+    except sqlite3.Error:
+        pass
+
+    rnd = random.Random(0)
+    base = corpus + SYNTHETIC
+    while len(corpus) < size:
+        corpus.append(rnd.choice(base) * rnd.randint(1, 8))
+    return corpus[:size]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--db", default="news.db")
+    parser.add_argument("--size", type=int, default=2000)
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.db, args.size)
+    chars = sum(len(t) for t in corpus)
+    with_markup = sum("<" in t for t in corpus)
+
+    started = time.perf_counter()
+    legacy = [clean_article_legacy(t) for t in corpus]
+    legacy_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    new = clean_articles(corpus)
+    new_s = time.perf_counter() - started
+
+    print(f"Текстов: {len(corpus)} (с разметкой: {with_markup}), символов: {chars}")
+    print(f"старая очистка: {legacy_s * 1000:8.1f} ms  ({legacy_s / len(corpus) * 1e6:7.1f} µs/текст)")
+    print(f"новая очистка:  {new_s * 1000:8.1f} ms  ({new_s / len(corpus) * 1e6:7.1f} µs/текст)")
+
+    # старая версия приводила всё к нижнему регистру — сравниваем без учёта регистра
+    same = sum(a == b.lower() for a, b in zip(legacy, new)) / len(corpus)
+    print(f"совпадение (без учёта регистра): {same:.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,335 @@
+"""
+Офлайн-бенчмарк пайплайнов целиком: news / smart / multilang / auto_collect_news.
+
+- страницы отдаёт локальный HTTP-сервер фикстур (rust_core ходит к нему через NEWS_SOURCES):
+  либо записанный HTML из --fixtures DIR (DIR/<источник>/index.html + страницы статей),
+  либо синтетические страницы, собранные из текстов news.db
+- каждый пайплайн — в отдельном процессе на чистой БД (DATABASE_URL во временной папке),
+  поэтому пиковый RSS и размер БД меряются честно
+- --models stub — детерминированные заглушки вместо HF-моделей (меряется всё, кроме инференса),
+  --models real — модели из MODEL_SPECS (маленькие чекпойнты — через MODEL_OVERRIDES)
+- результат: время стадий (backend.metrics), статей/с, пиковый RSS, размер БД -> JSON
+
+    python -m backend.bench.bench_pipeline --articles 40 --out bench.json
+    python -m backend.bench.bench_pipeline --fixtures recorded/ --models real --out bench.json
+"""
+import argparse
+import html
+import json
+import os
+import platform
+import resource
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PIPELINES = ("news", "smart", "multilang", "auto")
+
+FALLBACK_TEXT = (
+    "Die Bundesregierung hat am Mittwoch einen neuen Haushaltsentwurf vorgelegt. "
+    "Nach wochenlangen Verhandlungen einigten sich die Koalitionspartner auf Einsparungen. "
+    "Die Opposition kritisierte den Entwurf scharf und kündigte Widerstand im Bundestag an. "
+    "Ökonomen sehen in den Plänen ein Risiko für Investitionen in Infrastruktur und Bildung."
+)
+
+
+# ---------------------------------------------------------
+#  Фикстуры: путь -> HTML
+# ---------------------------------------------------------
+def _article_html(title: str, text: str) -> str:
+    sentences = [s.strip() for s in text.replace("\n", " ").split(". ") if s.strip()]
+    paragraphs = [". ".join(sentences[i:i + 3]) for i in range(0, len(sentences), 3)] or [text]
+    while len(paragraphs) < 4:
+        paragraphs += paragraphs
+    body = "".join(f"<p>{html.escape(p)}</p>" for p in paragraphs[:10])
+    return f"<html><head><title>{html.escape(title)}</title></head><body><article>{body}</article></body></html>"
+
+
+def synthetic_fixtures(db_path: str, articles: int) -> dict:
+    """Два «источника» с индексными страницами; тексты — из news.db (или шаблон)"""
+    rows = []
+    try:
+        conn = sqlite3.connect(db_path)
+        rows = conn.execute(
+            "SELECT title, content FROM articles WHERE length(content) > 600 ORDER BY id LIMIT ?",
+            (articles,),
+        ).fetchall()
+        conn.close()
+    except sqlite3.Error:
+        pass
+    while len(rows) < articles:
+        i = len(rows)
+        rows.append((f"Testmeldung Nummer {i} aus Berlin", f"Meldung {i}. " + FALLBACK_TEXT * 3))
+
+    pages, links = {}, {"dw": [], "tagesschau": []}
+    for i, (title, content) in enumerate(rows):
+        source = "dw" if i % 2 == 0 else "tagesschau"
+        path = f"/{source}/nachricht-{i}.html"
+        pages[path] = _article_html(title, content)
+        links[source].append((title if len(title) >= 15 else f"{title} — Nachricht {i}", path))
+
+    for source, items in links.items():
+        anchors = "".join(f'<li><a href="{path}">{html.escape(t)}</a></li>' for t, path in items)
+        pages[f"/{source}/"] = f"<html><body><ul>{anchors}</ul></body></html>"
+    return pages
+
+
+def recorded_fixtures(directory: str) -> dict:
+    """DIR/<источник>/index.html — индексная страница, остальные файлы — как есть"""
+    pages = {}
+    for source in sorted(os.listdir(directory)):
+        root = os.path.join(directory, source)
+        if not os.path.isdir(root):
+            continue
+        for dirpath, _, files in os.walk(root):
+            for name in files:
+                full = os.path.join(dirpath, name)
+                rel = os.path.relpath(full, directory).replace(os.sep, "/")
+                with open(full, encoding="utf-8", errors="replace") as f:
+                    body = f.read()
+                pages[f"/{rel}"] = body
+                if name == "index.html":
+                    pages[f"/{os.path.dirname(rel)}/"] = body
+    return pages
+
+
+class FixtureServer:
+    """Локальный HTTP-сервер фикстур в фоновом потоке"""
+
+    def __init__(self, pages: dict):
+        self.pages = {path: body.encode("utf-8") for path, body in pages.items()}
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = server.pages.get(self.path.split("?")[0])
+                if body is None:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.base_url = f"http://127.0.0.1:{self._httpd.server_address[1]}"
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+
+    def sources(self) -> list[str]:
+        return [self.base_url + path for path in sorted(self.pages) if path.endswith("/")]
+
+    def close(self):
+        self._httpd.shutdown()
+
+
+# ---------------------------------------------------------
+#  Заглушки моделей (--models stub)
+# ---------------------------------------------------------
+class StubPipeline:
+    """Ведёт себя как HF-пайплайн: список текстов -> список словарей"""
+    tokenizer = None
+
+    def __init__(self, key: str, transform):
+        self._key = key
+        self._transform = transform
+
+    def __call__(self, inputs, **kwargs):
+        texts = inputs if isinstance(inputs, list) else [inputs]
+        return [{self._key: self._transform(t)} for t in texts]
+
+
+class StubEmbedder:
+    """Как feature-extraction: текст -> [1, токены, dim], токен = one-hot по хэшу слова"""
+
+    def __init__(self, dim: int = 256):
+        self.dim = dim
+
+    def __call__(self, inputs, **kwargs):
+        import zlib
+
+        import numpy as np
+
+        texts = inputs if isinstance(inputs, list) else [inputs]
+        outputs = []
+        for t in texts:
+            words = t.lower().split() or [""]
+            tokens = np.zeros((1, len(words), self.dim), dtype=np.float32)
+            for j, w in enumerate(words):
+                tokens[0, j, zlib.crc32(w.encode()) % self.dim] = 1.0
+            outputs.append(tokens)
+        return outputs
+
+
+def install_stub_models():
+    from backend.ai_module.registry import model_registry
+
+    model_registry.install("summarizer", StubPipeline("summary_text", lambda t: " ".join(t.split()[:40])))
+    model_registry.install("translator_de_en", StubPipeline("translation_text", lambda t: f"[en] {t}"))
+    model_registry.install("translator_de_ru", StubPipeline("translation_text", lambda t: f"[ru] {t}"))
+    model_registry.install("embedder", StubEmbedder())
+
+
+# ---------------------------------------------------------
+#  Один пайплайн в отдельном процессе
+# ---------------------------------------------------------
+def _db_size(db_file: str) -> int:
+    return sum(
+        os.path.getsize(db_file + suffix)
+        for suffix in ("", "-wal", "-shm")
+        if os.path.exists(db_file + suffix)
+    )
+
+
+def _peak_rss_mb() -> float:
+    # Linux: ru_maxrss в килобайтах, macOS — в байтах
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (2**20 if sys.platform == "darwin" else 2**10), 1)
+
+
+def run_worker(pipeline: str, models: str, db_file: str) -> dict:
+    from sqlalchemy import text
+
+    from backend.ai_module import pipeline as pl
+    from backend.ai_module.model import summarize_news
+    from backend.db.database import Base, SessionLocal, engine
+    from backend.db.migrations import run_migrations
+    from backend.metrics import metrics
+    from backend.config import NEWS_SOURCES
+    from rust_core import fetch_news
+
+    Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+    if models == "stub":
+        install_stub_models()
+
+    headlines = []
+
+    def fetch():
+        raw = fetch_news(sources=NEWS_SOURCES or None)
+        headlines.extend(json.loads(raw))
+        return raw
+
+    runners = {
+        "news": pl.process_news_pipeline,
+        "smart": pl.process_smart_pipeline,
+        "multilang": pl.process_multilang_pipeline,
+        "auto": lambda: pl.auto_collect_news(fetch, summarize_news, SessionLocal),
+    }
+
+    started = time.perf_counter()
+    with metrics.command(pipeline), metrics.stage("pipeline"):
+        output = runners[pipeline]()
+    wall = time.perf_counter() - started
+
+    session = SessionLocal()
+    try:
+        stored = session.execute(text("SELECT COUNT(*) FROM articles")).scalar()
+    finally:
+        session.close()
+    processed = len(headlines) if pipeline == "auto" else stored
+
+    return {
+        "pipeline": pipeline,
+        "wall_s": round(wall, 3),
+        "articles": processed,
+        "articles_per_s": round(processed / wall, 2) if wall else None,
+        "peak_rss_mb": _peak_rss_mb(),
+        "db_bytes": _db_size(db_file),
+        "output_chars": len(output or ""),
+        "stages": metrics.as_dict().get(pipeline, {}),
+    }
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--articles", type=int, default=40, help="статей в синтетических фикстурах")
+    parser.add_argument("--fixtures", help="папка с записанным HTML вместо синтетики")
+    parser.add_argument("--db", default="news.db", help="откуда брать тексты для синтетики")
+    parser.add_argument("--models", choices=("stub", "real"), default="stub")
+    parser.add_argument("--pipelines", default=",".join(PIPELINES))
+    parser.add_argument("--out", help="куда сохранить JSON")
+    parser.add_argument("--worker", choices=PIPELINES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        result = run_worker(args.worker, args.models, os.environ["BENCH_DB_FILE"])
+        print("BENCH_RESULT " + json.dumps(result, ensure_ascii=False))
+        return
+
+    pages = recorded_fixtures(args.fixtures) if args.fixtures else synthetic_fixtures(args.db, args.articles)
+    server = FixtureServer(pages)
+    results = []
+    try:
+        for pipeline in [p.strip() for p in args.pipelines.split(",") if p.strip()]:
+            with tempfile.TemporaryDirectory(prefix="newsbot-bench-") as tmp:
+                db_file = os.path.join(tmp, "bench.db")
+                env = {
+                    **os.environ,
+                    "DATABASE_URL": f"sqlite:///{db_file}",
+                    "BENCH_DB_FILE": db_file,
+                    "NEWS_SOURCES": ",".join(server.sources()),
+                    "PAGE_CACHE_DIR": "",
+                    "EMBEDDINGS_DIR": os.path.join(tmp, "embeddings"),
+                    "STREAM_MAX_ARTICLES": str(max(args.articles, len(pages))),
+                    "METRICS_ENABLED": "1",
+                    "METRICS_PORT": "0",
+                }
+                proc = subprocess.run(
+                    [sys.executable, "-m", "backend.bench.bench_pipeline",
+                     "--worker", pipeline, "--models", args.models],
+                    env=env, capture_output=True, text=True,
+                )
+                line = next((l for l in proc.stdout.splitlines() if l.startswith("BENCH_RESULT ")), None)
+                if proc.returncode != 0 or line is None:
+                    print(f"❌ {pipeline}: прогон упал\n{proc.stderr[-2000:]}")
+                    results.append({"pipeline": pipeline, "error": proc.stderr[-2000:]})
+                    continue
+                results.append(json.loads(line[len("BENCH_RESULT "):]))
+    finally:
+        server.close()
+
+    print(f"Фикстур: {len(pages)} страниц, модели: {args.models}")
+    print(f"{'пайплайн':10s} {'время':>8s} {'статей':>7s} {'ст/с':>7s} {'RSS, MB':>8s} {'БД, KB':>8s}")
+    for r in results:
+        if "error" in r:
+            continue
+        print(
+            f"{r['pipeline']:10s} {r['wall_s']:7.2f}s {r['articles']:7d} "
+            f"{r['articles_per_s'] or 0:7.1f} {r['peak_rss_mb']:8.1f} {r['db_bytes'] / 1024:8.0f}"
+        )
+        for stage, s in sorted(r["stages"].items(), key=lambda kv: -kv[1]["sum"]):
+            print(f"    {stage:14s} n={s['count']:<4d} sum={s['sum']:.3f}s p95≤{s['p95']:g}s")
+
+    if args.out:
+        report = {
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "models": args.models,
+            "fixtures": args.fixtures or f"synthetic:{args.articles}",
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "results": results,
+        }
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"💾 Результаты: {args.out}")
+
+
+if __name__ == "__main__":
+    main()
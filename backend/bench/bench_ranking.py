@@ -0,0 +1,93 @@
+"""
+Бенчмарк ранжирования без модели: синтетические эмбеддинги (темы = центры
++ шум, dim как у MiniLM), время кластеризации и выбора статей, чтение
+хранилища векторов через memmap.
+
+    python -m backend.bench.bench_ranking --sizes 20,100,500,2000 --history 5000
+"""
+import argparse
+import tempfile
+import time
+
+import numpy as np
+
+from backend.ai_module.ranking import EmbeddingStore, cluster_topics, novelty, rank_articles
+
+
+class VectorPipe:
+    """Отдаёт заранее заданный вектор статьи в форме feature-extraction [1, 1, dim]"""
+
+    def __init__(self, vectors: dict):
+        self._vectors = vectors
+
+    def __call__(self, texts, **kwargs):
+        return [self._vectors[t][None, None, :] for t in texts]
+
+
+def synthetic(n: int, topics: int, dim: int, noise: float, rnd) -> tuple[np.ndarray, np.ndarray]:
+    centers = rnd.standard_normal((topics, dim)).astype(np.float32)
+    labels = rnd.integers(0, topics, n)
+    vectors = centers[labels] + noise * rnd.standard_normal((n, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors, labels
+
+
+def purity(topics: list[list[int]], labels: np.ndarray) -> float:
+    """Доля статей, попавших в тему вместе с большинством своей настоящей темы"""
+    hit = sum(np.bincount(labels[members]).max() for members in topics)
+    return hit / len(labels)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="20,100,500,2000")
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--history", type=int, default=5000)
+    parser.add_argument("--threshold", type=float, default=0.6)
+    args = parser.parse_args()
+    rnd = np.random.default_rng(0)
+
+    print(f"{'статей':>7s} {'тем':>5s} {'найдено':>8s} {'чистота':>8s} {'кластеры':>9s} {'rank_articles':>14s}")
+    for n in [int(x) for x in args.sizes.split(",")]:
+        topics = max(2, n // 4)
+        vectors, labels = synthetic(n, topics, args.dim, noise=0.05, rnd=rnd)
+
+        started = time.perf_counter()
+        found, _ = cluster_topics(vectors, args.threshold)
+        cluster_ms = (time.perf_counter() - started) * 1000
+
+        with tempfile.TemporaryDirectory() as tmp:
+            store = EmbeddingStore(tmp, model="synthetic")
+            history, _ = synthetic(args.history, 50, args.dim, noise=0.05, rnd=rnd)
+            store.add([f"old/{i}" for i in range(args.history)], history)
+
+            items = [{"title": f"t{i}", "url": f"new/{i}", "content": ""} for i in range(n)]
+            pipe = VectorPipe({f"t{i}. ": vectors[i] for i in range(n)})
+            started = time.perf_counter()
+            rank_articles(items, store=EmbeddingStore(tmp, model="synthetic"), threshold=args.threshold, pipe=pipe)
+            rank_ms = (time.perf_counter() - started) * 1000
+
+        print(
+            f"{n:7d} {topics:5d} {len(found):8d} {purity(found, labels):8.1%} "
+            f"{cluster_ms:8.2f}ms {rank_ms:12.2f}ms"
+        )
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = EmbeddingStore(tmp, model="synthetic")
+        history, _ = synthetic(args.history, 50, args.dim, noise=0.05, rnd=rnd)
+        store.add([f"old/{i}" for i in range(args.history)], history)
+        reopened = EmbeddingStore(tmp, model="synthetic")
+        started = time.perf_counter()
+        recent = reopened.history()
+        load_ms = (time.perf_counter() - started) * 1000
+        started = time.perf_counter()
+        novelty(history[:100], recent)
+        novelty_ms = (time.perf_counter() - started) * 1000
+        print(
+            f"\nхранилище {args.history} векторов ({args.history * args.dim * 4 / 2**20:.1f} MB): "
+            f"открытие + последние {len(recent)} — {load_ms:.1f} ms, новизна 100 статей — {novelty_ms:.2f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Бенчмарк полнотекстового поиска: FTS5 (articles_fts, BM25 + snippet)
+против LIKE по articles.content на синтетической таблице.
+
+Словарь — слова из news.db (если есть), дополненные псевдословами до --vocab;
+частоты слов по закону Ципфа, как в настоящих текстах: частые слова есть
+почти везде, редкие — в единицах статей.
+
+    python -m backend.bench.bench_search --rows 100000
+"""
+import argparse
+import itertools
+import os
+import random
+import re
+import sqlite3
+import statistics
+import tempfile
+import time
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from backend.ai_module.search import build_match_query, search_articles
+from backend.db.database import tune_sqlite
+from backend.db.migrations import run_migrations
+from backend.db.models import Base  # Base через models — все таблицы уже зарегистрированы
+
+FALLBACK_WORDS = (
+    "Bundesregierung Haushalt Kanzler Opposition Wirtschaft Inflation Energiepreise "
+    "Ukraine Russland Krieg Migration Schule Gesundheit Forschung Klimaschutz Bahn Streik "
+    "Bundestag Wahl Koalition Unternehmen Arbeitsmarkt Digitalisierung Software Europa"
+).split()
+
+# Ранги слов в словаре (0 — самое частое), из которых собираются запросы
+QUERY_RANKS = [(50,), (500,), (5_000,), (200, 2_000), (30, 300)]
+
+
+def vocabulary(db_path: str, size: int) -> list[str]:
+    words = list(FALLBACK_WORDS)
+    try:
+        conn = sqlite3.connect(db_path)
+        for (content,) in conn.execute("SELECT content FROM articles"):
+            words.extend(w for w in re.findall(r"\w+", content or "") if len(w) > 3)
+        conn.close()
+    except sqlite3.Error:
+        pass
+
+    words = list(dict.fromkeys(words))
+    rnd = random.Random(3)
+    while len(words) < size:
+        words.append("".join(rnd.choices("abcdefghiklmnoprstuwzäöü", k=rnd.randint(5, 11))))
+    rnd.shuffle(words)
+    return words[:size]
+
+
+def fill(engine, rows: int, words: list[str]):
+    rnd = random.Random(7)
+    weights = [1 / (rank + 1) ** 1.1 for rank in range(len(words))]
+    cum = list(itertools.accumulate(weights))
+    sql = text("INSERT INTO articles (title, url, content, category) VALUES (:title, :url, :content, 'other')")
+    with engine.begin() as conn:
+        batch = []
+        for i in range(rows):
+            batch.append({
+                "title": " ".join(rnd.choices(words, cum_weights=cum, k=6)),
+                "url": f"https://example.org/artikel/{i}",
+                "content": " ".join(rnd.choices(words, cum_weights=cum, k=150)),
+            })
+            if len(batch) == 5000:
+                conn.execute(sql, batch)
+                batch = []
+        if batch:
+            conn.execute(sql, batch)
+
+
+def timed(fn, repeats: int) -> float:
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--db", default="news.db")
+    parser.add_argument("--vocab", type=int, default=50_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'search.db')}")
+        tune_sqlite(engine)
+        Base.metadata.create_all(bind=engine)
+
+        words = vocabulary(args.db, args.vocab)
+        started = time.perf_counter()
+        fill(engine, args.rows, words)
+        print(f"{args.rows} статей ({len(words)} слов в словаре), вставка {time.perf_counter() - started:.1f} c")
+
+        started = time.perf_counter()
+        run_migrations(engine)  # создаёт articles_fts и индексирует уже вставленное
+        print(f"построение FTS-индекса: {time.perf_counter() - started:.1f} c\n")
+
+        session_maker = sessionmaker(bind=engine)
+        with engine.connect() as conn:
+            for ranks in QUERY_RANKS:
+                query = " ".join(words[r] for r in ranks)
+                first = query.split()[0]
+                like_ms = timed(lambda: conn.execute(
+                    text("SELECT title, url FROM articles WHERE content LIKE :p LIMIT 5"),
+                    {"p": f"%{first}%"},
+                ).fetchall(), max(3, args.repeats // 4))
+                fts_ms = timed(lambda: search_articles(query, 5, session_maker), args.repeats)
+                found = search_articles(query, 5, session_maker)
+                hits = conn.execute(
+                    text("SELECT COUNT(*) FROM articles_fts WHERE articles_fts MATCH :m"),
+                    {"m": build_match_query(query)},
+                ).scalar()
+                print(
+                    f"{query!r:28s} совпадений {hits:6d}   FTS5+BM25 {fts_ms:7.2f} ms ({len(found)} шт.)   "
+                    f"LIKE '{first}' без ранжирования {like_ms:8.2f} ms"
+                )
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Бенчмарк чтения articles: дефолтный SQLite против профиля из database.py
+(WAL + pragmas + индексы из migrations.py).
+
+    python -m backend.bench.bench_sqlite --rows 100000
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, text
+
+from backend.db.database import tune_sqlite
+from backend.db.migrations import run_migrations
+from backend.db.models import Base  # Base через models — все таблицы уже зарегистрированы
+
+CATEGORIES = ["politics", "economy", "tech", "world", "society", "other"]
+
+# Те же запросы, что в pipeline.py / handlers.py
+QUERIES = {
+    "list_categories": ("""
+        SELECT category, COUNT(*)
+        FROM articles
+        WHERE created_at >= datetime('now', '-3 day')
+        GROUP BY category
+        ORDER BY COUNT(*) DESC
+    """, {}),
+    "get_news_by_category": ("""
+        SELECT title, url
+        FROM articles
+        WHERE category = :cat
+        ORDER BY created_at DESC
+        LIMIT 10
+    """, {"cat": "economy"}),
+    "news_fallback": ("""
+        SELECT title, url
+        FROM articles
+        WHERE created_at >= datetime('now', '-1 day')
+        ORDER BY created_at DESC
+        LIMIT 5
+    """, {}),
+}
+
+
+def fill(engine, rows: int, days: int = 90):
+    """Синтетические статьи, равномерно за последние days дней"""
+    rnd = random.Random(42)
+    now = datetime.utcnow()
+    body = "Lorem ipsum dolor sit amet. " * 40
+    batch = []
+    with engine.begin() as conn:
+        for i in range(rows):
+            created = now - timedelta(seconds=rnd.randint(0, days * 86400))
+            batch.append({
+                "title": f"Artikel {i}",
+                "url": f"https://example.org/artikel/{i}",
+                "content": body,
+                "category": rnd.choice(CATEGORIES),
+                "created_at": created.strftime("%Y-%m-%d %H:%M:%S"),
+            })
+            if len(batch) == 5000:
+                conn.execute(text("""
+                    INSERT INTO articles (title, url, content, category, created_at)
+                    VALUES (:title, :url, :content, :category, :created_at)
+                """), batch)
+                batch = []
+        if batch:
+            conn.execute(text("""
+                INSERT INTO articles (title, url, content, category, created_at)
+                VALUES (:title, :url, :content, :category, :created_at)
+            """), batch)
+
+
+def measure(engine, repeats: int) -> dict:
+    results = {}
+    with engine.connect() as conn:
+        for name, (sql, params) in QUERIES.items():
+            timings = []
+            for _ in range(repeats):
+                started = time.perf_counter()
+                conn.execute(text(sql), params).fetchall()
+                timings.append((time.perf_counter() - started) * 1000)
+            plan = conn.execute(text("EXPLAIN QUERY PLAN " + sql), params).fetchall()
+            results[name] = {
+                "median_ms": statistics.median(timings),
+                "p95_ms": sorted(timings)[int(len(timings) * 0.95) - 1],
+                "plan": " | ".join(row[-1] for row in plan),
+            }
+    return results
+
+
+def build(path: str, rows: int, tuned: bool):
+    engine = create_engine(f"sqlite:///{path}")
+    if tuned:
+        tune_sqlite(engine)
+
+    # Схема как у старой БД: без индексов по category / created_at
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(text("DROP INDEX IF EXISTS ix_articles_category_created_at"))
+        conn.execute(text("DROP INDEX IF EXISTS ix_articles_created_at"))
+
+    started = time.perf_counter()
+    fill(engine, rows)
+    insert_seconds = time.perf_counter() - started
+
+    if tuned:
+        run_migrations(engine)
+    return engine, insert_seconds
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeats", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for tuned in (False, True):
+            label = "профиль + индексы" if tuned else "по умолчанию"
+            path = os.path.join(tmp, f"bench_{int(tuned)}.db")
+            engine, insert_seconds = build(path, args.rows, tuned)
+
+            print(f"\n=== {label}: {args.rows} статей, вставка {insert_seconds:.1f} c ===")
+            for name, r in measure(engine, args.repeats).items():
+                print(f"{name:22s} median {r['median_ms']:8.2f} ms   p95 {r['p95_ms']:8.2f} ms   {r['plan']}")
+            engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+import os
+from dotenv import load_dotenv
+
+# Настройки читаются из .env один раз при импорте
+load_dotenv()
+
+
+def _int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    if value is None or not value.strip():
+        return default
+    return int(value)
+
+
+def _float(name: str, default: float) -> float:
+    value = os.getenv(name)
+    if value is None or not value.strip():
+        return default
+    return float(value)
+
+
+def _bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None or not value.strip():
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def _list(name: str, default: str = "") -> list[str]:
+    value = os.getenv(name, default)
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+# --- Кэш выжимок/переводов ---
+SUMMARY_CACHE_SIZE = _int("SUMMARY_CACHE_SIZE", 2048)
+
+# --- Батчевый инференс ---
+INFERENCE_BATCH_SIZE = _int("INFERENCE_BATCH_SIZE", 8)
+
+# --- Пул инференса (чтобы не блокировать event loop бота) ---
+INFERENCE_WORKERS = _int("INFERENCE_WORKERS", 1)
+INFERENCE_QUEUE_SIZE = _int("INFERENCE_QUEUE_SIZE", 4)
+INFERENCE_TIMEOUT = _int("INFERENCE_TIMEOUT", 300)  # секунд на один запрос
+
+# --- Реестр моделей (ленивая загрузка) ---
+MODEL_IDLE_TTL = _int("MODEL_IDLE_TTL", 3600)  # секунд без обращений до выгрузки, 0 — не выгружать
+MODEL_PREWARM = _list("MODEL_PREWARM")  # например: summarizer,translator_de_en
+
+# --- Предрасчитанные дайджесты ---
+DIGEST_INTERVAL_MINUTES = _int("DIGEST_INTERVAL_MINUTES", 30)  # как часто пересобирать
+DIGEST_MAX_AGE_MINUTES = _int("DIGEST_MAX_AGE_MINUTES", 90)  # старше — считаем протухшим
+
+# --- Рассылка подписчикам ---
+DELIVERY_CONCURRENCY = _int("DELIVERY_CONCURRENCY", 10)  # одновременных отправок
+DELIVERY_GLOBAL_RATE = _float("DELIVERY_GLOBAL_RATE", 25.0)  # сообщений в секунду на бота (лимит Telegram ~30)
+DELIVERY_PER_CHAT_RATE = _float("DELIVERY_PER_CHAT_RATE", 1.0)  # сообщений в секунду в один чат
+DELIVERY_MAX_RETRIES = _int("DELIVERY_MAX_RETRIES", 3)
+
+# --- Скрейпинг (rust_core) ---
+FETCH_MAX_PER_HOST = _int("FETCH_MAX_PER_HOST", 4)  # параллельных запросов на один сайт
+FETCH_TIMEOUT = _float("FETCH_TIMEOUT", 10.0)  # секунд на один HTTP-запрос
+PAGE_CACHE_DIR = os.getenv("PAGE_CACHE_DIR", "page_cache")  # пусто — без дискового кэша страниц
+PAGE_CACHE_KNOWN_DAYS = _int("PAGE_CACHE_KNOWN_DAYS", 30)  # статьи из БД за этот срок не скачиваются повторно
+STREAM_BUFFER = _int("STREAM_BUFFER", 16)  # статей в очереди между Rust и Python
+STREAM_MAX_ARTICLES = _int("STREAM_MAX_ARTICLES", 20)  # сколько статей обрабатываем за один прогон
+
+# --- SQLite ---
+SQLITE_CACHE_MB = _int("SQLITE_CACHE_MB", 64)  # page cache на соединение
+SQLITE_MMAP_MB = _int("SQLITE_MMAP_MB", 256)  # 0 — без memory-mapped I/O
+SQLITE_BUSY_TIMEOUT_MS = _int("SQLITE_BUSY_TIMEOUT_MS", 5000)
+
+# --- Поиск почти-дублей (MinHash/LSH) ---
+DEDUPE_NUM_PERM = _int("DEDUPE_NUM_PERM", 64)  # длина MinHash-подписи
+DEDUPE_BANDS = _int("DEDUPE_BANDS", 16)  # LSH-полос (DEDUPE_NUM_PERM должно делиться на это число)
+DEDUPE_THRESHOLD = _float("DEDUPE_THRESHOLD", 0.5)  # оценка Жаккара, начиная с которой статьи — дубли
+DEDUPE_WINDOW_DAYS = _int("DEDUPE_WINDOW_DAYS", 7)  # сколько дней подписей держим в памяти
+
+# --- Категоризация по ключевым словам ---
+CATEGORY_LEAD_CHARS = _int("CATEGORY_LEAD_CHARS", 1000)  # текста после заголовка смотрим столько, 0 — весь текст
+
+# --- Суммаризация длинных статей ---
+# truncate — первые 1800 символов; chunked — map-reduce по кускам в токенах
+SUMMARY_MODE_SMART = os.getenv("SUMMARY_MODE_SMART", "chunked")  # /smartnews
+SUMMARY_MODE_MULTILANG = os.getenv("SUMMARY_MODE_MULTILANG", "truncate")  # /multilangnews (ещё и переводы)
+SUMMARY_CHUNK_TOKENS = _int("SUMMARY_CHUNK_TOKENS", 700)  # токенов в куске (distilbart принимает до 1024)
+SUMMARY_MAX_CHUNKS = _int("SUMMARY_MAX_CHUNKS", 4)  # кусков на статью, остальное отбрасывается
+
+# --- Бэкенд инференса моделей ---
+# torch — как есть (fp32); int8 — динамическая квантизация Linear-слоёв;
+# onnx — граф ONNX Runtime через optimum (экспорт один раз, дальше из ONNX_CACHE_DIR)
+MODEL_BACKEND = os.getenv("MODEL_BACKEND", "torch")
+MODEL_BACKEND_OVERRIDES = _list("MODEL_BACKEND_OVERRIDES")  # например: translator_de_ru=int8,summarizer=onnx
+ONNX_CACHE_DIR = os.getenv("ONNX_CACHE_DIR", "onnx_cache")
+
+# --- Переводы (память переводов по предложениям) ---
+TRANSLATION_MEMORY_SIZE = _int("TRANSLATION_MEMORY_SIZE", 8192)  # предложений в памяти процесса
+
+# --- Метрики (время стадий по командам) ---
+METRICS_ENABLED = _bool("METRICS_ENABLED", True)  # False — таймеры стадий ничего не делают
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = _int("METRICS_PORT", 0)  # >0 — Prometheus-эндпоинт http://host:port/metrics
+ADMIN_IDS = _list("ADMIN_IDS")  # telegram user id, кому доступны /stats и служебные команды
+
+# --- Склейка одинаковых запросов (single-flight) ---
+COALESCE_REUSE_SECONDS = _float("COALESCE_REUSE_SECONDS", 15.0)  # сколько отдаём только что готовый результат
+
+# --- Инкрементальный сбор ---
+INCREMENTAL_CRAWL = _bool("INCREMENTAL_CRAWL", True)  # обрабатывать только ссылки, которых ещё не видели
+SEEN_URLS_DAYS = _int("SEEN_URLS_DAYS", 14)  # сколько дней помним просмотренные ссылки
+
+# --- Окружение (переопределяются для бенчмарков и тестовых стендов) ---
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///news.db")
+NEWS_SOURCES = _list("NEWS_SOURCES")  # индексные страницы вместо DW/Tagesschau, пусто — по умолчанию
+MODEL_OVERRIDES = _list("MODEL_OVERRIDES")  # другие чекпойнты: summarizer=sshleifer/distilbart-xsum-1-1
+
+# --- Персональные дайджесты подписчиков ---
+PERSONAL_DIGEST_SIZE = _int("PERSONAL_DIGEST_SIZE", 5)  # статей по умолчанию
+PERSONAL_DIGEST_MAX_SIZE = _int("PERSONAL_DIGEST_MAX_SIZE", 10)
+PERSONAL_POOL_HOURS = _int("PERSONAL_POOL_HOURS", 24)  # из статей за это время выбираются сводки
+PERSONAL_POOL_SIZE = _int("PERSONAL_POOL_SIZE", 60)  # кандидатов в общем пуле (по одной на сюжет)
+
+# --- Ранжирование статей по эмбеддингам (темы прогона) ---
+RANKING_ENABLED = _bool("RANKING_ENABLED", True)  # False — статьи в порядке скрейпа, как раньше
+EMBEDDINGS_DIR = os.getenv("EMBEDDINGS_DIR", "embeddings")  # матрица float32 (memmap) + список URL
+RANK_SIMILARITY = _float("RANK_SIMILARITY", 0.6)  # косинус, начиная с которого статьи — одна тема
+RANK_NOVELTY_WEIGHT = _float("RANK_NOVELTY_WEIGHT", 0.5)  # вес новизны против центральности в теме
+RANK_HISTORY = _int("RANK_HISTORY", 500)  # последних векторов, с которыми сравниваем новизну
+RANK_TOP_K = _int("RANK_TOP_K", 5)  # сколько лучших статей прогона суммаризируем
+
+# --- Хранение и архив (планировщик чистит БД каждые RETENTION_INTERVAL_HOURS) ---
+RETENTION_INTERVAL_HOURS = _int("RETENTION_INTERVAL_HOURS", 6)
+RETENTION_BATCH = _int("RETENTION_BATCH", 500)  # строк за одну транзакцию удаления/архивации
+RETENTION_PAUSE_MS = _int("RETENTION_PAUSE_MS", 50)  # пауза между пачками, чтобы писатели успевали
+RETENTION_NEWS_DAYS = _int("RETENTION_NEWS_DAYS", 30)  # старая таблица news
+RETENTION_SIGNATURES_DAYS = _int("RETENTION_SIGNATURES_DAYS", DEDUPE_WINDOW_DAYS * 2)
+RETENTION_TRANSLATIONS_DAYS = _int("RETENTION_TRANSLATIONS_DAYS", 90)  # память переводов
+ARCHIVE_AFTER_DAYS = _int("ARCHIVE_AFTER_DAYS", 30)  # полный текст статьи уезжает в архив, метаданные остаются
+RETENTION_ARTICLES_DAYS = _int("RETENTION_ARTICLES_DAYS", 365)  # статьи целиком, 0 — не удалять
+RETENTION_EMBEDDINGS_KEEP = _int("RETENTION_EMBEDDINGS_KEEP", 20000)  # последних векторов в хранилище
+ARCHIVE_DATABASE_URL = os.getenv("ARCHIVE_DATABASE_URL", "sqlite:///archive.db")
+VACUUM_STEP_PAGES = _int("VACUUM_STEP_PAGES", 1000)  # страниц за один шаг incremental_vacuum
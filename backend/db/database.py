@@ -1,8 +1,55 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, inspect, text
 from sqlalchemy.orm import sessionmaker, declarative_base
 
-DATABASE_URL = "sqlite:///news.db"
+from backend.config import DATABASE_URL, SQLITE_CACHE_MB, SQLITE_MMAP_MB, SQLITE_BUSY_TIMEOUT_MS
+
+
+def _set_sqlite_pragmas(dbapi_conn, _record):
+    """
+    Профиль SQLite для бота:
+    - WAL: читатели не ждут писателя (команды бота во время сбора статей)
+    - synchronous=NORMAL: в WAL-режиме безопасно и заметно быстрее FULL
+    - большой page cache, mmap и temp_store в памяти
+    """
+    cursor = dbapi_conn.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_MB * 1024}")
+    cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_MB * 1024 * 1024}")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.close()
+
+
+def tune_sqlite(bind):
+    """Применяет профиль к каждому новому соединению движка"""
+    event.listen(bind, "connect", _set_sqlite_pragmas)
+
 
 engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+tune_sqlite(engine)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
+
+
+def ensure_columns(bind=engine):
+    """
+    Досоздаёт колонки, которые появились в моделях после создания БД
+    (create_all не трогает уже существующие таблицы).
+    """
+    inspector = inspect(bind)
+    with bind.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {c["name"] for c in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                col_type = column.type.compile(dialect=bind.dialect)
+                default = ""
+                if column.default is not None and isinstance(column.default.arg, str):
+                    default = f" DEFAULT '{column.default.arg}'"
+                conn.execute(text(
+                    f"ALTER TABLE {table.name} ADD COLUMN {column.name} {col_type}{default}"
+                ))
@@ -0,0 +1,162 @@
+from sqlalchemy import text
+
+from backend.db.database import engine, ensure_columns
+
+# --- Миграции схемы ---
+# Версия БД хранится в PRAGMA user_version. Миграция — (версия, описание, SQL).
+# Новые колонки моделей досоздаёт ensure_columns, здесь — всё остальное
+# (индексы, служебные таблицы, перенос данных). Миграции только добавляются в конец.
+MIGRATIONS = [
+    (
+        1,
+        "индексы для чтения articles по категории и дате",
+        [
+            "CREATE INDEX IF NOT EXISTS ix_articles_category_created_at ON articles (category, created_at)",
+            "CREATE INDEX IF NOT EXISTS ix_articles_created_at ON articles (created_at)",
+        ],
+    ),
+    (
+        2,
+        "полнотекстовый индекс articles_fts (FTS5) + триггеры синхронизации",
+        [
+            # external content: текст хранится только в articles, индекс — отдельно.
+            # unicode61 + remove_diacritics 2: «Maerz», «März» и «marz» — одно слово
+            """
+            CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5(
+                title, content,
+                content='articles', content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2'
+            )
+            """,
+            # Любая запись в articles (в т.ч. ON CONFLICT из _upsert_articles) обновляет индекс.
+            # Дописывание выжимок title/content не меняет — индекс не трогается.
+            """
+            CREATE TRIGGER IF NOT EXISTS articles_fts_ai AFTER INSERT ON articles BEGIN
+                INSERT INTO articles_fts(rowid, title, content) VALUES (new.id, new.title, new.content);
+            END
+            """,
+            """
+            CREATE TRIGGER IF NOT EXISTS articles_fts_ad AFTER DELETE ON articles BEGIN
+                INSERT INTO articles_fts(articles_fts, rowid, title, content)
+                VALUES ('delete', old.id, old.title, old.content);
+            END
+            """,
+            """
+            CREATE TRIGGER IF NOT EXISTS articles_fts_au AFTER UPDATE OF title, content ON articles BEGIN
+                INSERT INTO articles_fts(articles_fts, rowid, title, content)
+                VALUES ('delete', old.id, old.title, old.content);
+                INSERT INTO articles_fts(rowid, title, content) VALUES (new.id, new.title, new.content);
+            END
+            """,
+            # уже сохранённые статьи
+            "INSERT INTO articles_fts(articles_fts) VALUES ('rebuild')",
+        ],
+    ),
+    (
+        3,
+        "дубли в news удалены, уникальный url и индекс по дате",
+        [
+            "DELETE FROM news WHERE id NOT IN (SELECT MIN(id) FROM news GROUP BY url)",
+            "CREATE UNIQUE INDEX IF NOT EXISTS ux_news_url ON news (url)",
+            "CREATE INDEX IF NOT EXISTS ix_news_created_at ON news (created_at)",
+        ],
+    ),
+    (
+        4,
+        "поиск по архивным статьям: articles_fts индексирует выжимку вместо вынесенного текста",
+        [
+            # Полный текст старых статей уходит в архив (content = ''); для поиска у такой
+            # статьи остаются заголовок и summary_de. Индекс строится по представлению:
+            # 'delete' и 'rebuild' видят ровно те значения, что были проиндексированы.
+            "DROP TRIGGER IF EXISTS articles_fts_ai",
+            "DROP TRIGGER IF EXISTS articles_fts_ad",
+            "DROP TRIGGER IF EXISTS articles_fts_au",
+            "DROP TABLE IF EXISTS articles_fts",
+            """
+            CREATE VIEW IF NOT EXISTS articles_search AS
+            SELECT id, title,
+                   CASE WHEN content != '' THEN content ELSE COALESCE(summary_de, '') END AS content
+            FROM articles
+            """,
+            """
+            CREATE VIRTUAL TABLE articles_fts USING fts5(
+                title, content,
+                content='articles_search', content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2'
+            )
+            """,
+            """
+            CREATE TRIGGER articles_fts_ai AFTER INSERT ON articles BEGIN
+                INSERT INTO articles_fts(rowid, title, content) VALUES (
+                    new.id, new.title,
+                    CASE WHEN new.content != '' THEN new.content ELSE COALESCE(new.summary_de, '') END
+                );
+            END
+            """,
+            """
+            CREATE TRIGGER articles_fts_ad AFTER DELETE ON articles BEGIN
+                INSERT INTO articles_fts(articles_fts, rowid, title, content) VALUES (
+                    'delete', old.id, old.title,
+                    CASE WHEN old.content != '' THEN old.content ELSE COALESCE(old.summary_de, '') END
+                );
+            END
+            """,
+            # выжимка живой статьи на индекс не влияет — переиндексация только когда
+            # меняется то, что в индексе (заголовок, текст, выжимка архивной статьи)
+            """
+            CREATE TRIGGER articles_fts_au AFTER UPDATE OF title, content, summary_de ON articles
+            WHEN old.title IS NOT new.title
+              OR CASE WHEN old.content != '' THEN old.content ELSE COALESCE(old.summary_de, '') END
+                 IS NOT CASE WHEN new.content != '' THEN new.content ELSE COALESCE(new.summary_de, '') END
+            BEGIN
+                INSERT INTO articles_fts(articles_fts, rowid, title, content) VALUES (
+                    'delete', old.id, old.title,
+                    CASE WHEN old.content != '' THEN old.content ELSE COALESCE(old.summary_de, '') END
+                );
+                INSERT INTO articles_fts(rowid, title, content) VALUES (
+                    new.id, new.title,
+                    CASE WHEN new.content != '' THEN new.content ELSE COALESCE(new.summary_de, '') END
+                );
+            END
+            """,
+            "INSERT INTO articles_fts(articles_fts) VALUES ('rebuild')",
+        ],
+    ),
+    (
+        5,
+        "digests: одна строка на вид дайджеста (DigestStore.save обновляет её)",
+        [
+            "DELETE FROM digests WHERE id NOT IN (SELECT MAX(id) FROM digests GROUP BY kind)",
+            "CREATE UNIQUE INDEX IF NOT EXISTS ux_digests_kind ON digests (kind)",
+        ],
+    ),
+]
+
+
+def current_version(conn) -> int:
+    return conn.execute(text("PRAGMA user_version")).scalar() or 0
+
+
+def run_migrations(bind=engine):
+    """Досоздаёт колонки и применяет ещё не применённые миграции"""
+    ensure_columns(bind)
+
+    with bind.begin() as conn:
+        version = current_version(conn)
+        for number, description, statements in MIGRATIONS:
+            if number <= version:
+                continue
+            for statement in statements:
+                conn.execute(text(statement))
+            conn.execute(text(f"PRAGMA user_version = {number}"))
+            print(f"🛠️ Миграция {number}: {description}")
+
+        # ANALYZE после миграций — планировщику запросов нужна статистика по индексам
+        migrated = current_version(conn) != version
+        if migrated:
+            conn.execute(text("ANALYZE"))
+
+    # соединения из пула помнят схему до миграций (например, без новых уникальных
+    # индексов — ON CONFLICT по ним не компилируется): открываем заново
+    if migrated:
+        bind.dispose()
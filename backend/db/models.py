@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, func
+from sqlalchemy import Column, Integer, String, Text, DateTime, Index, LargeBinary, UniqueConstraint, func
 from backend.db.database import Base
 
 
@@ -12,6 +12,12 @@ class News(Base):
     summary = Column(Text, default="")
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+    # Одна запись на ссылку; по дате чистит retention
+    __table_args__ = (
+        Index("ux_news_url", "url", unique=True),
+        Index("ix_news_created_at", "created_at"),
+    )
+
 
 # --- Подписчики (для автообновлений) ---
 class Subscriber(Base):
@@ -19,6 +25,10 @@ class Subscriber(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     chat_id = Column(String, unique=True)
+    # Настройки персонального дайджеста (/prefs)
+    categories = Column(String(256), default="")  # через запятую, пусто — все категории
+    lang = Column(String(8), default="de")  # de / en / ru
+    digest_size = Column(Integer, default=5)  # статей в сводке, NULL — по умолчанию
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
 
@@ -35,10 +45,79 @@ class Article(Base):
     summary_en = Column(Text, default="")
     summary_ru = Column(Text, default="")
 
+    # Хэш текста, по которому построена summary_de (ключ кэша выжимок)
+    content_hash = Column(String(40), default="")
+
     lang = Column(String(8), default="de")
 
     # ⭐ Новое
     category = Column(String(32), default="other")
 
     created_at = Column(DateTime, server_default=func.now())
+    # Когда полный текст перенесён в архив (content тогда пустой, см. db/retention.py)
+    archived_at = Column(DateTime, nullable=True)
+
+    # Чтение идёт по категории и свежести (/category, /categories, фолбэк /news)
+    __table_args__ = (
+        Index("ix_articles_category_created_at", "category", "created_at"),
+        Index("ix_articles_created_at", "created_at"),
+    )
+
+
+# --- Готовые дайджесты (собираются планировщиком) ---
+class Digest(Base):
+    __tablename__ = "digests"
+
+    id = Column(Integer, primary_key=True)
+    kind = Column(String(32), nullable=False, index=True)  # news / smart / multilang
+    content = Column(Text, nullable=False)
+    created_at = Column(DateTime, server_default=func.now())
+
+
+# --- MinHash-подписи статей (кластеры почти-дублей между источниками) ---
+class ArticleSignature(Base):
+    __tablename__ = "article_signatures"
+
+    id = Column(Integer, primary_key=True)
+    url = Column(String(1024), nullable=False, unique=True)
+    signature = Column(LargeBinary, nullable=False)
+    # URL представителя кластера (совпадает с url у первой статьи сюжета)
+    cluster = Column(String(1024), nullable=False)
+    created_at = Column(DateTime, server_default=func.now(), index=True)
+
+
+# --- Память переводов: переведённые предложения выжимок ---
+class TranslationMemory(Base):
+    __tablename__ = "translation_memory"
+
+    id = Column(Integer, primary_key=True)
+    lang = Column(String(8), nullable=False)  # en / ru
+    source_hash = Column(String(40), nullable=False)  # sha1 исходного предложения
+    source = Column(Text, nullable=False)
+    target = Column(Text, nullable=False)
+    created_at = Column(DateTime, server_default=func.now(), index=True)
+
+    __table_args__ = (
+        UniqueConstraint("lang", "source_hash", name="uq_translation_memory_lang_hash"),
+    )
+
+
+# --- Ссылки, которые скрейпер уже видел (инкрементальный сбор) ---
+class SeenUrl(Base):
+    __tablename__ = "seen_urls"
+
+    id = Column(Integer, primary_key=True)
+    url = Column(String(1024), nullable=False, unique=True)
+    # article — сохранена, duplicate — почти-дубль, rejected — страница без текста статьи
+    status = Column(String(16), nullable=False, default="article")
+    first_seen = Column(DateTime, server_default=func.now())
+    last_seen = Column(DateTime, server_default=func.now(), index=True)
+
+
+# --- Состояние сборщика: водяной знак последнего прогона и т.п. ---
+class CrawlState(Base):
+    __tablename__ = "crawl_state"
 
+    key = Column(String(64), primary_key=True)
+    value = Column(Text, nullable=False, default="")
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
@@ -0,0 +1,266 @@
+import time
+import zlib
+from datetime import datetime, timezone
+
+from sqlalchemy import create_engine, text
+
+from backend.config import (
+    ARCHIVE_DATABASE_URL,
+    ARCHIVE_AFTER_DAYS,
+    RETENTION_BATCH,
+    RETENTION_PAUSE_MS,
+    RETENTION_NEWS_DAYS,
+    RETENTION_SIGNATURES_DAYS,
+    RETENTION_TRANSLATIONS_DAYS,
+    RETENTION_ARTICLES_DAYS,
+    SEEN_URLS_DAYS,
+    VACUUM_STEP_PAGES,
+)
+from backend.db.database import engine, tune_sqlite
+
+try:
+    import zstandard
+except ImportError:  # zstandard не обязателен — тогда zlib
+    zstandard = None
+
+
+# ---------------------------------------------------------
+#  Сжатие текста статей для архива
+# ---------------------------------------------------------
+def compress(content: str) -> tuple[str, bytes]:
+    """-> (кодек, блоб); кодек хранится рядом, чтобы читать архив при любом окружении"""
+    data = content.encode("utf-8")
+    if zstandard is not None:
+        return "zstd", zstandard.ZstdCompressor(level=9).compress(data)
+    return "zlib", zlib.compress(data, 6)
+
+
+def decompress(codec: str, blob: bytes) -> str:
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("архив сжат zstd, а пакет zstandard не установлен")
+        return zstandard.ZstdDecompressor().decompress(blob).decode("utf-8")
+    return zlib.decompress(blob).decode("utf-8")
+
+
+# ---------------------------------------------------------
+#  Архив: отдельная SQLite-база, полный текст старых статей.
+#  В основной БД у статьи остаются заголовок, ссылка, категория и выжимки.
+# ---------------------------------------------------------
+_archive_engine = None
+
+
+def archive_engine():
+    global _archive_engine
+    if _archive_engine is None:
+        _archive_engine = create_engine(ARCHIVE_DATABASE_URL, connect_args={"check_same_thread": False})
+        tune_sqlite(_archive_engine)
+        # пока архив пуст, VACUUM для auto_vacuum=INCREMENTAL ничего не стоит
+        ensure_incremental_vacuum(_archive_engine)
+        with _archive_engine.begin() as conn:
+            conn.execute(text("""
+                CREATE TABLE IF NOT EXISTS article_archive (
+                    url VARCHAR(1024) PRIMARY KEY,
+                    title VARCHAR(512) NOT NULL,
+                    category VARCHAR(32),
+                    created_at DATETIME,
+                    archived_at DATETIME NOT NULL,
+                    codec VARCHAR(8) NOT NULL,
+                    content BLOB NOT NULL
+                )
+            """))
+    return _archive_engine
+
+
+def read_archived(url: str, archive=None) -> str | None:
+    """Полный текст статьи из архива (None — статьи там нет)"""
+    archive = archive or archive_engine()
+    with archive.connect() as conn:
+        row = conn.execute(
+            text("SELECT codec, content FROM article_archive WHERE url = :url"), {"url": url}
+        ).fetchone()
+    return decompress(row[0], row[1]) if row else None
+
+
+def _pause():
+    # между пачками блокировка записи отпускается — бот и сборщик успевают писать
+    if RETENTION_PAUSE_MS > 0:
+        time.sleep(RETENTION_PAUSE_MS / 1000)
+
+
+def archive_articles(days: int = ARCHIVE_AFTER_DAYS, bind=engine, archive=None, batch: int = RETENTION_BATCH) -> int:
+    """
+    Переносит полный текст статей старше days в архив пачками:
+    сначала запись в архив (commit), потом очистка content в основной БД.
+    Упали между шагами — статья просто заархивируется заново в следующий раз.
+    """
+    if days <= 0:
+        return 0
+    archive = archive or archive_engine()
+    moved = 0
+    while True:
+        with bind.connect() as conn:
+            rows = conn.execute(text("""
+                SELECT id, url, title, category, created_at, content
+                FROM articles
+                WHERE created_at < datetime('now', :window) AND content != ''
+                ORDER BY id
+                LIMIT :batch
+            """), {"window": f"-{days} day", "batch": batch}).fetchall()
+        if not rows:
+            return moved
+
+        archived_at = datetime.now(timezone.utc).replace(tzinfo=None, microsecond=0)
+        records = []
+        for _id, url, title, category, created_at, content in rows:
+            codec, blob = compress(content)
+            records.append({
+                "url": url, "title": title, "category": category, "created_at": created_at,
+                "archived_at": archived_at, "codec": codec, "content": blob,
+            })
+        with archive.begin() as conn:
+            conn.execute(text("""
+                INSERT OR REPLACE INTO article_archive
+                    (url, title, category, created_at, archived_at, codec, content)
+                VALUES (:url, :title, :category, :created_at, :archived_at, :codec, :content)
+            """), records)
+
+        with bind.begin() as conn:
+            conn.execute(text("""
+                UPDATE articles SET content = '', archived_at = :archived_at
+                WHERE id = :id AND content != ''
+            """), [{"id": row[0], "archived_at": archived_at} for row in rows])
+
+        moved += len(rows)
+        _pause()
+
+
+# ---------------------------------------------------------
+#  Удаление по сроку: пачками по rowid, каждая пачка — своя короткая транзакция
+# ---------------------------------------------------------
+# таблица -> (условие "строка устарела", срок в днях)
+RETENTION_RULES = {
+    "news": ("created_at < datetime('now', :window)", RETENTION_NEWS_DAYS),
+    "article_signatures": ("created_at < datetime('now', :window)", RETENTION_SIGNATURES_DAYS),
+    "seen_urls": ("last_seen < datetime('now', :window)", SEEN_URLS_DAYS),
+    "translation_memory": ("created_at < datetime('now', :window)", RETENTION_TRANSLATIONS_DAYS),
+    "articles": ("created_at < datetime('now', :window)", RETENTION_ARTICLES_DAYS),
+}
+
+
+def purge(table: str, condition: str, days: int, bind=engine, batch: int = RETENTION_BATCH) -> int:
+    """Удаляет устаревшие строки table пачками по batch; days <= 0 — таблица не чистится"""
+    if days <= 0:
+        return 0
+    statement = text(f"""
+        DELETE FROM {table} WHERE rowid IN (
+            SELECT rowid FROM {table} WHERE {condition} LIMIT :batch
+        )
+    """)
+    deleted = 0
+    while True:
+        with bind.begin() as conn:
+            count = conn.execute(statement, {"window": f"-{days} day", "batch": batch}).rowcount
+        deleted += count
+        if count < batch:
+            return deleted
+        _pause()
+
+
+# ---------------------------------------------------------
+#  Возврат места на диск: auto_vacuum=INCREMENTAL + incremental_vacuum шагами
+# ---------------------------------------------------------
+def _pragma(bind, name: str):
+    with bind.connect() as conn:
+        # соединение из пула помнит auto_vacuum до VACUUM, пока ничего не прочитает
+        conn.execute(text("SELECT 1 FROM sqlite_master LIMIT 1")).fetchall()
+        return conn.execute(text(f"PRAGMA {name}")).scalar()
+
+
+def _executescript(bind, sql: str):
+    # PRAGMA incremental_vacuum через execute() sqlite3 освобождает одну страницу
+    # за вызов; executescript выполняет оператор до конца
+    raw = bind.raw_connection()
+    try:
+        raw.driver_connection.executescript(sql)
+    finally:
+        raw.close()
+
+
+def ensure_incremental_vacuum(bind=engine) -> bool:
+    """
+    Включает auto_vacuum=INCREMENTAL. Для существующей БД это требует одного
+    полного VACUUM (файл переписывается целиком, запись на это время заблокирована),
+    поэтому вызывается при старте бота, а не из планировщика. True — если VACUUM был.
+    """
+    if _pragma(bind, "auto_vacuum") == 2:
+        return False
+    print("🧹 Включаем incremental auto_vacuum (один полный VACUUM)...")
+    started = time.perf_counter()
+    _executescript(bind, "PRAGMA auto_vacuum = INCREMENTAL; VACUUM;")
+    print(f"🧹 VACUUM завершён за {time.perf_counter() - started:.1f} c")
+    return True
+
+
+def incremental_vacuum(bind=engine, step: int = VACUUM_STEP_PAGES) -> int:
+    """Отдаёт свободные страницы файлу шагами по step страниц. Возвращает, сколько освобождено."""
+    freed = 0
+    free = _pragma(bind, "freelist_count") or 0
+    while free > 0:
+        _executescript(bind, f"PRAGMA incremental_vacuum({step});")
+        left = _pragma(bind, "freelist_count") or 0
+        if left >= free:
+            break
+        freed += free - left
+        free = left
+        _pause()
+    if freed:
+        # WAL-файл тоже сжимаем, иначе место вернётся только при следующем checkpoint
+        _executescript(bind, "PRAGMA wal_checkpoint(TRUNCATE);")
+    return freed
+
+
+# ---------------------------------------------------------
+#  Полный проход (планировщик)
+# ---------------------------------------------------------
+def run_retention(bind=engine, archive=None) -> dict:
+    """
+    Удаление по срокам → архив → incremental vacuum (сначала удаляем, чтобы не сжимать
+    то, что сразу удалится). Сбой одного шага не останавливает остальные.
+    Полного VACUUM здесь нет: auto_vacuum включается один раз при старте.
+    """
+    started = time.perf_counter()
+    stats = {}
+
+    for table, (condition, days) in RETENTION_RULES.items():
+        try:
+            stats[table] = purge(table, condition, days, bind=bind)
+        except Exception as e:
+            print(f"❌ Ошибка очистки {table}: {e}")
+
+    try:
+        archive = archive or archive_engine()
+        # удалённые статьи не держим и в архиве
+        stats["article_archive"] = purge(
+            "article_archive", "created_at < datetime('now', :window)", RETENTION_ARTICLES_DAYS, bind=archive
+        )
+        stats["archived"] = archive_articles(bind=bind, archive=archive)
+    except Exception as e:
+        print(f"❌ Ошибка архивации статей: {e}")
+
+    for name, target in (("freed_mb", bind), ("archive_freed_mb", archive)):
+        if target is None:
+            continue
+        try:
+            # без auto_vacuum=INCREMENTAL (ensure_incremental_vacuum при старте) шаги ничего не дают
+            if _pragma(target, "auto_vacuum") != 2:
+                continue
+            page_size = _pragma(target, "page_size") or 4096
+            stats[name] = round(incremental_vacuum(target) * page_size / 2**20, 1)
+        except Exception as e:
+            print(f"❌ Ошибка vacuum: {e}")
+
+    stats["seconds"] = round(time.perf_counter() - started, 1)
+    done = ", ".join(f"{k}={v}" for k, v in stats.items() if v)
+    print(f"🧹 Очистка БД: {done or 'нечего чистить'}")
+    return stats
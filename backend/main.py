@@ -1,5 +1,6 @@
 import asyncio
 import os
+from datetime import datetime
 from aiogram import Bot, Dispatcher
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from dotenv import load_dotenv
@@ -9,11 +10,25 @@ asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
 
 # --- Локальные импорты ---
 from backend.telegram.handlers import router
-from backend.ai_module.pipeline import auto_collect_news
+from backend.ai_module.pipeline import build_digests_async, build_personal_messages
+from backend.ai_module.digest import digest_store
 from backend.db.database import Base, engine, SessionLocal
+from backend.db.migrations import run_migrations
+from backend.db.retention import ensure_incremental_vacuum, run_retention
 from backend.db.models import Subscriber
-from rust_core import fetch_news
-from backend.ai_module.model import summarize_news
+from backend.telegram.delivery import DeliveryEngine
+from backend.ai_module.executor import inference_executor
+from backend.ai_module.registry import model_registry
+from backend.ai_module.ranking import embedding_store
+from backend.config import (
+    MODEL_PREWARM,
+    DIGEST_INTERVAL_MINUTES,
+    METRICS_HOST,
+    METRICS_PORT,
+    RETENTION_INTERVAL_HOURS,
+    RETENTION_EMBEDDINGS_KEEP,
+)
+from backend.metrics import metrics, start_http_server
 
 
 # --- Загружаем токен ---
@@ -37,24 +52,47 @@ async def send_auto_news(bot: Bot):
         return
 
     print(f"📡 Отправляем автообновление для {len(subs)} пользователей...")
-    summarized = auto_collect_news(fetch_news, summarize_news, SessionLocal)
-
-    for s in subs:
-        try:
-            await bot.send_message(
-                int(s.chat_id),
-                f"🕓 Автоматическая сводка новостей:\n\n{summarized}",
-                parse_mode="Markdown",
-                disable_web_page_preview=True,
-            )
-        except Exception as e:
-            print(f"Ошибка при отправке {s.chat_id}: {e}")
+    with metrics.command("auto"):
+        # Общий пул статей и выжимок на всех, тексты — по группам одинаковых настроек
+        messages = await inference_executor.run(
+            build_personal_messages, subs, timeout=None, force=True,
+        )
+        if not messages:
+            print("⚠️ Нет новостей ни для одного набора настроек.")
+            return
+
+        stats = await DeliveryEngine(bot).deliver_many(
+            messages,
+            parse_mode="Markdown",
+            disable_web_page_preview=True,
+        )
+    print(f"📬 Рассылка завершена: {stats}")
+
+
+# --- Хранение: архив старых статей, удаление по срокам, vacuum ---
+async def run_retention_job():
+    try:
+        with metrics.command("retention"), metrics.stage("retention"):
+            await asyncio.to_thread(run_retention)
+            dropped = await asyncio.to_thread(embedding_store.compact, RETENTION_EMBEDDINGS_KEEP)
+        if dropped:
+            print(f"🧹 Эмбеддингов удалено из хранилища: {dropped}")
+    except Exception as e:
+        print(f"❌ Ошибка очистки БД: {e}")
 
 
 # --- Главная асинхронная функция ---
 async def main():
     # Создание таблиц, если их нет
     Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+    # Один раз на БД: полный VACUUM до начала работы, дальше — incremental_vacuum по расписанию
+    ensure_incremental_vacuum(engine)
+    digest_store.load_latest()
+
+    # Prometheus-эндпоинт — только если задан порт
+    if METRICS_PORT and metrics.enabled:
+        start_http_server(METRICS_HOST, METRICS_PORT)
 
     bot = Bot(token=TOKEN)
     dp = Dispatcher()
@@ -63,10 +101,35 @@ async def main():
     # Планировщик автообновлений
     scheduler = AsyncIOScheduler(timezone="Europe/Berlin")
     scheduler.add_job(send_auto_news, "interval", hours=2, args=[bot])
+    scheduler.add_job(model_registry.unload_idle, "interval", minutes=1)
+    # Дайджесты: сразу при старте и дальше по расписанию
+    scheduler.add_job(
+        build_digests_async, "interval",
+        minutes=DIGEST_INTERVAL_MINUTES,
+        next_run_time=datetime.now(scheduler.timezone),
+        max_instances=1, coalesce=True,
+    )
+    scheduler.add_job(
+        run_retention_job, "interval",
+        hours=RETENTION_INTERVAL_HOURS,
+        max_instances=1, coalesce=True,
+    )
     scheduler.start()
 
+    # Прогрев моделей в фоне — бот начинает отвечать сразу.
+    # Ссылку на задачу держим до конца работы (иначе её может собрать GC)
+    prewarm_task = None
+    if MODEL_PREWARM:
+        prewarm_task = asyncio.create_task(inference_executor.run(
+            model_registry.prewarm, MODEL_PREWARM, timeout=None, force=True,
+        ))
+
     print("🤖 Бот запущен! Автоновости каждые 2 часа.")
-    await dp.start_polling(bot)
+    try:
+        await dp.start_polling(bot)
+    finally:
+        if prewarm_task is not None and not prewarm_task.done():
+            prewarm_task.cancel()
 
 
 # --- Точка входа ---
@@ -0,0 +1,200 @@
+import bisect
+import contextvars
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from backend.config import METRICS_ENABLED
+
+# Границы корзин гистограммы, секунды (как у Prometheus: le — «меньше или равно»)
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+# Команда, в рамках которой идёт работа (news / smart / multilang / digest / auto).
+# Пул инференса копирует contextvars, так что стадии в потоках видят команду.
+current_command = contextvars.ContextVar("current_command", default="background")
+
+
+class Histogram:
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)  # последняя — +Inf
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, seconds: float):
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.total += seconds
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """Оценка квантиля по корзинам (верхняя граница корзины)"""
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(BUCKETS, self.counts):
+            seen += n
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+
+class _NoopTimer:
+    """Выключенные метрики: пустой контекстный менеджер без вызовов часов"""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP = _NoopTimer()
+
+
+class _StageTimer:
+    __slots__ = ("_metrics", "_stage", "_started")
+
+    def __init__(self, metrics, stage: str):
+        self._metrics = metrics
+        self._stage = stage
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._metrics.observe(self._stage, time.perf_counter() - self._started)
+        return False
+
+
+class _CommandScope:
+    __slots__ = ("_name", "_token")
+
+    def __init__(self, name: str):
+        self._name = name
+
+    def __enter__(self):
+        self._token = current_command.set(self._name)
+        return self
+
+    def __exit__(self, *exc):
+        current_command.reset(self._token)
+        return False
+
+
+class StageMetrics:
+    """
+    Время стадий пайплайна по командам:
+    - with metrics.command("smart"): ...  — к какой команде относится работа
+    - with metrics.stage("summarize"): ... — замер стадии в гистограмму (команда, стадия)
+    - render_prometheus() — текстовый формат Prometheus, summary_lines() — для /stats
+    При enabled=False оба менеджера — общий пустой объект.
+    """
+
+    def __init__(self, enabled: bool = METRICS_ENABLED):
+        self.enabled = enabled
+        self._hist = {}  # (команда, стадия) -> Histogram
+        self._lock = threading.Lock()
+
+    def command(self, name: str):
+        return _CommandScope(name) if self.enabled else _NOOP
+
+    def stage(self, name: str):
+        return _StageTimer(self, name) if self.enabled else _NOOP
+
+    def observe(self, stage: str, seconds: float, command: str | None = None):
+        if not self.enabled:
+            return
+        key = (command or current_command.get(), stage)
+        with self._lock:
+            hist = self._hist.get(key)
+            if hist is None:
+                hist = self._hist[key] = Histogram()
+            hist.observe(seconds)
+
+    def _snapshot(self) -> list:
+        with self._lock:
+            return [
+                (command, stage, list(h.counts), h.total, h.count)
+                for (command, stage), h in sorted(self._hist.items())
+            ]
+
+    def render_prometheus(self) -> str:
+        lines = [
+            "# HELP newsbot_stage_seconds Время стадии пайплайна по командам",
+            "# TYPE newsbot_stage_seconds histogram",
+        ]
+        for command, stage, counts, total, count in self._snapshot():
+            labels = f'command="{command}",stage="{stage}"'
+            cumulative = 0
+            for bound, n in zip(BUCKETS, counts):
+                cumulative += n
+                lines.append(f'newsbot_stage_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'newsbot_stage_seconds_bucket{{{labels},le="+Inf"}} {count}')
+            lines.append(f"newsbot_stage_seconds_sum{{{labels}}} {total:.6f}")
+            lines.append(f"newsbot_stage_seconds_count{{{labels}}} {count}")
+        return "\n".join(lines) + "\n"
+
+    def summary_lines(self) -> list[str]:
+        """Строки для /stats: команда / стадия — число, среднее, p50, p95"""
+        with self._lock:
+            items = sorted(self._hist.items())
+            rows = [
+                (command, stage, h.count, h.total / h.count, h.quantile(0.5), h.quantile(0.95))
+                for (command, stage), h in items if h.count
+            ]
+
+        lines, last = [], None
+        for command, stage, count, avg, p50, p95 in rows:
+            if command != last:
+                lines.append(f"▸ {command}")
+                last = command
+            lines.append(f"  {stage}: n={count} avg={avg:.2f}s p50≤{p50:g}s p95≤{p95:g}s")
+        return lines
+
+    def as_dict(self) -> dict:
+        """{команда: {стадия: {count, sum, p50, p95}}} — для JSON-отчётов бенчмарков"""
+        with self._lock:
+            result = {}
+            for (command, stage), h in sorted(self._hist.items()):
+                result.setdefault(command, {})[stage] = {
+                    "count": h.count,
+                    "sum": round(h.total, 6),
+                    "p50": h.quantile(0.5),
+                    "p95": h.quantile(0.95),
+                }
+            return result
+
+    def reset(self):
+        with self._lock:
+            self._hist.clear()
+
+
+metrics = StageMetrics()
+
+
+# ---------------------------------------------------------
+#  Prometheus-эндпоинт (отдельный поток, только для локального скрейпера)
+# ---------------------------------------------------------
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = metrics.render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # без строки в stdout на каждый скрейп
+
+
+def start_http_server(host: str, port: int) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    print(f"📈 Метрики: http://{host}:{port}/metrics")
+    return server
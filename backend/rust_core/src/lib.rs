@@ -1,129 +1,585 @@
+use std::collections::{HashMap, HashSet};
+use std::fs;
+use std::path::PathBuf;
+use std::sync::{Arc, Mutex, OnceLock};
+use std::time::{Duration, SystemTime};
+
+use futures::stream::{self, StreamExt};
+use pyo3::exceptions::PyRuntimeError;
 use pyo3::prelude::*;
+use pyo3::types::PyDict;
+use reqwest::header::{HeaderName, ETAG, IF_MODIFIED_SINCE, IF_NONE_MATCH, LAST_MODIFIED};
+use reqwest::{Client, Response, StatusCode, Url};
 use scraper::{Html, Selector};
-use serde::Serialize;
+use serde::{Deserialize, Serialize};
+use tokio::runtime::Runtime;
+use tokio::sync::{mpsc, Semaphore};
+
+const SOURCES: [&str; 2] = [
+    "https://www.dw.com/de/themen/s-9077",
+    "https://www.tagesschau.de/",
+];
+
+const ARTICLE_KEYWORDS: [&str; 7] = ["artikel", "nachricht", "news", "story", "deutschland", "politik", "wirtschaft"];
+
+// сколько статей максимум качаем одновременно (по всем хостам вместе)
+const MAX_IN_FLIGHT: usize = 64;
 
 #[derive(Serialize)]
 struct NewsItem {
     title: String,
     url: String,
     content: String,
+    // статья уже есть в БД: не скачивали; content пустой, если её нет и в кэше страниц
+    #[serde(skip_serializing_if = "std::ops::Not::not")]
+    known: bool,
 }
 
-#[pyfunction]
-fn fetch_news() -> PyResult<String> {
-    let sources = vec![
-        "https://www.dw.com/de/themen/s-9077",
-        "https://www.tagesschau.de/",
-    ];
+// --- Дисковый кэш страниц (ETag/Last-Modified + разобранный текст статьи) ---
+// HTML храним только у индексных страниц: при 304 ссылки берутся из него.
+// Статье после 304 нужен лишь извлечённый текст.
+#[derive(Serialize, Deserialize)]
+struct CacheEntry {
+    url: String,
+    etag: Option<String>,
+    last_modified: Option<String>,
+    #[serde(default, skip_serializing_if = "Option::is_none")]
+    body: Option<String>,
+    content: Option<String>,
+}
+
+struct PageCache {
+    dir: PathBuf,
+}
+
+impl PageCache {
+    // max_age > 0 — записи, не обновлявшиеся дольше, удаляются при открытии
+    fn new(dir: &str, max_age: Duration) -> Option<Self> {
+        let dir = PathBuf::from(dir);
+        fs::create_dir_all(&dir).ok()?;
+        let cache = Self { dir };
+        if !max_age.is_zero() {
+            let removed = cache.prune(max_age);
+            if removed > 0 {
+                println!("🧹 Кэш страниц: удалено устаревших записей: {removed}");
+            }
+        }
+        Some(cache)
+    }
+
+    fn prune(&self, max_age: Duration) -> usize {
+        let Ok(entries) = fs::read_dir(&self.dir) else { return 0 };
+        let now = SystemTime::now();
+        let mut removed = 0;
+        for entry in entries.flatten() {
+            let path = entry.path();
+            if path.extension().map_or(true, |ext| ext != "json") {
+                continue;
+            }
+            let expired = entry
+                .metadata()
+                .and_then(|meta| meta.modified())
+                .ok()
+                .and_then(|modified| now.duration_since(modified).ok())
+                .map_or(false, |age| age > max_age);
+            if expired && fs::remove_file(&path).is_ok() {
+                removed += 1;
+            }
+        }
+        removed
+    }
+
+    fn path(&self, url: &str) -> PathBuf {
+        // FNV-1a: стабильное имя файла между запусками и версиями Rust
+        let mut hash: u64 = 0xcbf29ce484222325;
+        for byte in url.bytes() {
+            hash ^= byte as u64;
+            hash = hash.wrapping_mul(0x100000001b3);
+        }
+        self.dir.join(format!("{hash:016x}.json"))
+    }
+
+    fn load(&self, url: &str) -> Option<CacheEntry> {
+        let data = fs::read(self.path(url)).ok()?;
+        let entry: CacheEntry = serde_json::from_slice(&data).ok()?;
+        // защита от коллизий хэша
+        if entry.url == url { Some(entry) } else { None }
+    }
+
+    fn store(&self, entry: &CacheEntry) {
+        if let Ok(data) = serde_json::to_vec(entry) {
+            let _ = fs::write(self.path(&entry.url), data);
+        }
+    }
+}
+
+struct FetchOptions {
+    max_per_host: usize,
+    timeout: Duration,
+    cache: Option<PageCache>,
+    known: HashSet<String>,
+    refresh: bool,
+    // индексные страницы (по умолчанию SOURCES; другой список — для бенчмарка на фикстурах)
+    sources: Vec<String>,
+    // инкрементальный режим: известные ссылки не отдаются вовсе,
+    // а скачанные страницы без текста статьи отдаются пустыми
+    // (чтобы Python запомнил их и не качал в следующий раз)
+    skip_known: bool,
+}
+
+enum Outcome {
+    Downloaded,
+    NotModified,
+    Known,
+    Failed,
+}
+
+// --- Общие tokio runtime и HTTP-клиент (пул соединений, keep-alive) ---
+fn runtime() -> &'static Runtime {
+    static RUNTIME: OnceLock<Runtime> = OnceLock::new();
+    RUNTIME.get_or_init(|| {
+        tokio::runtime::Builder::new_multi_thread()
+            .enable_all()
+            .build()
+            .expect("не удалось создать tokio runtime")
+    })
+}
+
+fn client() -> &'static Client {
+    static CLIENT: OnceLock<Client> = OnceLock::new();
+    CLIENT.get_or_init(|| {
+        Client::builder()
+            .pool_max_idle_per_host(16)
+            .pool_idle_timeout(Duration::from_secs(90))
+            .tcp_keepalive(Duration::from_secs(60))
+            .build()
+            .expect("не удалось создать HTTP-клиент")
+    })
+}
+
+// --- Ограничение параллельных запросов на один хост ---
+struct HostLimiter {
+    per_host: usize,
+    semaphores: Mutex<HashMap<String, Arc<Semaphore>>>,
+}
+
+impl HostLimiter {
+    fn new(per_host: usize) -> Self {
+        Self {
+            per_host: per_host.max(1),
+            semaphores: Mutex::new(HashMap::new()),
+        }
+    }
+
+    fn semaphore_for(&self, url: &str) -> Arc<Semaphore> {
+        let host = Url::parse(url)
+            .ok()
+            .and_then(|u| u.host_str().map(str::to_string))
+            .unwrap_or_default();
+        let mut map = self.semaphores.lock().unwrap();
+        map.entry(host)
+            .or_insert_with(|| Arc::new(Semaphore::new(self.per_host)))
+            .clone()
+    }
+}
+
+fn resolve_url(src: &str, href: &str) -> String {
+    if href.starts_with("http") {
+        return href.to_string();
+    }
+    // относительные ссылки собираем от корня источника, а не склейкой строк
+    match Url::parse(src).and_then(|base| base.join(href)) {
+        Ok(url) => url.to_string(),
+        Err(_) => format!("{src}{href}"),
+    }
+}
+
+fn header_value(response: &Response, name: HeaderName) -> Option<String> {
+    response
+        .headers()
+        .get(name)
+        .and_then(|v| v.to_str().ok())
+        .map(str::to_string)
+}
+
+// Условный запрос через кэш: при 304 отдаём сохранённую запись без разбора.
+// Возвращает (запись, true — если страница реально скачана)
+async fn fetch_cached(url: &str, opts: &FetchOptions, is_article: bool) -> Result<(CacheEntry, bool), reqwest::Error> {
+    let cached = match (&opts.cache, opts.refresh) {
+        // индексная страница без сохранённого HTML ответ 304 не переживёт
+        (Some(cache), false) => cache.load(url).filter(|entry| is_article || entry.body.is_some()),
+        _ => None,
+    };
+
+    let mut request = client().get(url).timeout(opts.timeout);
+    if let Some(entry) = &cached {
+        if let Some(etag) = &entry.etag {
+            request = request.header(IF_NONE_MATCH, etag.as_str());
+        }
+        if let Some(last_modified) = &entry.last_modified {
+            request = request.header(IF_MODIFIED_SINCE, last_modified.as_str());
+        }
+    }
+
+    let response = request.send().await?;
+    if response.status() == StatusCode::NOT_MODIFIED {
+        if let Some(entry) = cached {
+            // перезапись обновляет mtime: живые записи не попадают под prune
+            if let Some(cache) = &opts.cache {
+                cache.store(&entry);
+            }
+            return Ok((entry, false));
+        }
+    }
+
+    let response = response.error_for_status()?;
+    let etag = header_value(&response, ETAG);
+    let last_modified = header_value(&response, LAST_MODIFIED);
+    let body = response.text().await?;
+    let (body, content) = if is_article {
+        (None, extract_article_content(&body))
+    } else {
+        (Some(body), None)
+    };
+
+    let entry = CacheEntry {
+        url: url.to_string(),
+        etag,
+        last_modified,
+        body,
+        content,
+    };
+    if let Some(cache) = &opts.cache {
+        cache.store(&entry);
+    }
+    Ok((entry, true))
+}
+
+async fn fetch_text(url: &str, timeout: Duration) -> Result<String, reqwest::Error> {
+    client()
+        .get(url)
+        .timeout(timeout)
+        .send()
+        .await?
+        .error_for_status()?
+        .text()
+        .await
+}
 
+// --- Разбор страниц ---
+fn extract_headlines(src: &str, html: &str) -> Vec<NewsItem> {
+    let doc = Html::parse_document(html);
+    let selector = Selector::parse("a").unwrap();
     let mut results = Vec::new();
 
-    for src in sources {
-        if let Ok(resp) = reqwest::blocking::get(src) {
-            if let Ok(text) = resp.text() {
-                let doc = Html::parse_document(&text);
-                let selector = Selector::parse("a").unwrap();
-
-                for element in doc.select(&selector).take(20) {
-                    if let Some(title) = element.text().next() {
-                        let title = title.trim();
-                        if title.len() < 15 { continue; }
-                        if title.contains("springen") || title.contains("navigation") { continue; }
-
-                        if let Some(href) = element.value().attr("href") {
-                            let url = if href.starts_with("http") {
-                                href.to_string()
-                            } else {
-                                format!("{src}{href}")
-                            };
-                            results.push(NewsItem {
-                                title: title.to_string(),
-                                url,
-                                content: String::new(),
-                            });
-                        }
-                    }
+    for element in doc.select(&selector).take(20) {
+        if let Some(title) = element.text().next() {
+            let title = title.trim();
+            if title.len() < 15 { continue; }
+            if title.contains("springen") || title.contains("navigation") { continue; }
+
+            if let Some(href) = element.value().attr("href") {
+                results.push(NewsItem {
+                    title: title.to_string(),
+                    url: resolve_url(src, href),
+                    content: String::new(),
+                    known: false,
+                });
+            }
+        }
+    }
+
+    results
+}
+
+fn extract_article_links(src: &str, html: &str) -> Vec<(String, String)> {
+    let doc = Html::parse_document(html);
+    let selector = Selector::parse("a").unwrap();
+    let mut links = Vec::new();
+
+    for element in doc.select(&selector).take(80) {
+        if let Some(title) = element.text().next() {
+            let title = title.trim();
+
+            // фильтрация коротких заголовков
+            if title.len() < 15 { continue; }
+
+            if let Some(href) = element.value().attr("href") {
+                let href_lower = href.to_lowercase();
+                if !ARTICLE_KEYWORDS.iter().any(|&k| href_lower.contains(k)) {
+                    continue;
                 }
+                links.push((title.to_string(), resolve_url(src, href)));
             }
         }
     }
 
-    Ok(serde_json::to_string(&results).unwrap())
+    links
 }
 
-#[pyfunction]
-fn fetch_full_articles() -> PyResult<String> {
-    let sources = vec![
-        "https://www.dw.com/de/themen/s-9077",
-        "https://www.tagesschau.de/",
-    ];
+fn extract_article_content(html: &str) -> Option<String> {
+    let article_doc = Html::parse_document(html);
+    let paragraph_sel = Selector::parse("p").unwrap();
+    let paragraphs: Vec<_> = article_doc.select(&paragraph_sel).collect();
+
+    // фильтр по количеству параграфов
+    if paragraphs.len() < 3 { return None; }
+
+    let mut content = String::new();
+    for p in paragraphs.iter().take(10) {
+        let text = p.text().collect::<Vec<_>>().join(" ");
+        content.push_str(text.trim());
+        content.push(' ');
+    }
+
+    if content.len() > 300 { Some(content) } else { None }
+}
+
+// --- Асинхронный сбор ---
+fn sources_or_default(sources: Option<Vec<String>>) -> Vec<String> {
+    match sources {
+        Some(list) if !list.is_empty() => list,
+        _ => SOURCES.iter().map(|s| s.to_string()).collect(),
+    }
+}
+
+async fn collect_headlines(sources: Vec<String>, timeout: Duration) -> Vec<NewsItem> {
+    let pages = futures::future::join_all(
+        sources.iter().map(|src| async move { (src, fetch_text(src, timeout).await) }),
+    )
+    .await;
 
     let mut results = Vec::new();
-    let keywords = ["artikel", "nachricht", "news", "story", "deutschland", "politik", "wirtschaft"];
-
-    for src in sources {
-        if let Ok(resp) = reqwest::blocking::get(src) {
-            if let Ok(text) = resp.text() {
-                let doc = Html::parse_document(&text);
-                let selector = Selector::parse("a").unwrap();
-
-                for element in doc.select(&selector).take(80) {
-                    if let Some(title) = element.text().next() {
-                        let title = title.trim();
-
-                        // фильтрация коротких заголовков
-                        if title.len() < 15 { continue; }
-
-                        if let Some(href) = element.value().attr("href") {
-                            let href_lower = href.to_lowercase();
-                            if !keywords.iter().any(|&k| href_lower.contains(k)) {
-                                continue;
-                            }
-
-                            let url = if href.starts_with("http") {
-                                href.to_string()
-                            } else {
-                                format!("{src}{href}")
-                            };
-
-                            if let Ok(article_resp) = reqwest::blocking::get(&url) {
-                                if let Ok(article_html) = article_resp.text() {
-                                    let article_doc = Html::parse_document(&article_html);
-                                    let paragraph_sel = Selector::parse("p").unwrap();
-                                    let paragraphs: Vec<_> = article_doc.select(&paragraph_sel).collect();
-
-                                    // фильтр по количеству параграфов
-                                    if paragraphs.len() < 3 { continue; }
-
-                                    let mut content = String::new();
-                                    for p in paragraphs.iter().take(10) {
-                                        let text = p.text().collect::<Vec<_>>().join(" ");
-                                        content.push_str(&format!("{} ", text.trim()));
-                                    }
-
-                                    if content.len() > 300 {
-                                        results.push(NewsItem {
-                                            title: title.to_string(),
-                                            url,
-                                            content,
-                                        });
-                                    }
-                                }
-                            }
-                        }
+    for (src, page) in pages {
+        match page {
+            Ok(html) => results.extend(extract_headlines(src, &html)),
+            Err(e) => println!("⚠️ Источник недоступен {src}: {e}"),
+        }
+    }
+    results
+}
+
+// Статьи уходят в канал по мере скачивания: (позиция на индексной странице, статья)
+async fn collect_articles(opts: FetchOptions, tx: mpsc::Sender<(usize, NewsItem)>) {
+    let opts = &opts;
+
+    // 1. индексные страницы — параллельно, условными запросами
+    let pages = futures::future::join_all(
+        opts.sources.iter().map(|src| async move { (src.as_str(), fetch_cached(src, opts, false).await) }),
+    )
+    .await;
+
+    let mut links = Vec::new();
+    let mut seen = HashSet::new();
+    for (src, page) in pages {
+        match page {
+            Ok((entry, _)) => {
+                for (title, url) in extract_article_links(src, entry.body.as_deref().unwrap_or_default()) {
+                    if seen.insert(url.clone()) {
+                        links.push((title, url));
                     }
                 }
             }
+            Err(e) => println!("⚠️ Источник недоступен {src}: {e}"),
+        }
+    }
+
+    // 2. статьи — параллельно, не больше max_per_host на хост;
+    //    известные по БД не скачиваем, неизменившиеся не разбираем,
+    //    упавшие просто пропускаем, остальные отдаём сразу
+    let limiter = HostLimiter::new(opts.max_per_host);
+    let limiter = &limiter;
+    let total = links.len();
+    let pending = stream::iter(links.into_iter().enumerate())
+        .map(|(i, (title, url))| async move {
+            if !opts.refresh && opts.known.contains(&url) {
+                if opts.skip_known {
+                    return (i, Outcome::Known, None);
+                }
+                let content = opts
+                    .cache
+                    .as_ref()
+                    .and_then(|cache| cache.load(&url))
+                    .and_then(|entry| entry.content)
+                    .unwrap_or_default();
+                return (i, Outcome::Known, Some(NewsItem { title, url, content, known: true }));
+            }
+
+            let semaphore = limiter.semaphore_for(&url);
+            let _permit = semaphore.acquire_owned().await.ok();
+            match fetch_cached(&url, opts, true).await {
+                Ok((entry, downloaded)) => {
+                    let outcome = if downloaded { Outcome::Downloaded } else { Outcome::NotModified };
+                    let item = match entry.content {
+                        Some(content) => Some(NewsItem { title, url, content, known: false }),
+                        None if opts.skip_known => Some(NewsItem { title, url, content: String::new(), known: false }),
+                        None => None,
+                    };
+                    (i, outcome, item)
+                }
+                Err(_) => (i, Outcome::Failed, None),
+            }
+        })
+        .buffer_unordered(MAX_IN_FLIGHT);
+    let mut pending = std::pin::pin!(pending);
+
+    let (mut collected, mut downloaded, mut not_modified, mut known, mut failed) = (0, 0, 0, 0, 0);
+    while let Some((i, outcome, item)) = pending.next().await {
+        match outcome {
+            Outcome::Downloaded => downloaded += 1,
+            Outcome::NotModified => not_modified += 1,
+            Outcome::Known => known += 1,
+            Outcome::Failed => failed += 1,
+        }
+        if let Some(item) = item {
+            collected += 1;
+            // Python перестал читать — дальше качать незачем
+            if tx.send((i, item)).await.is_err() {
+                break;
+            }
+        }
+    }
+
+    println!(
+        "✅ Собрано статей: {collected} (ссылок: {total}, скачано: {downloaded}, не изменилось: {not_modified}, известных: {known}, ошибок: {failed})"
+    );
+}
+
+// Итератор статей для Python: каждая статья — dict, ожидание без GIL
+#[pyclass]
+struct ArticleStream {
+    receiver: mpsc::Receiver<(usize, NewsItem)>,
+}
+
+#[pymethods]
+impl ArticleStream {
+    fn __iter__(slf: PyRef<'_, Self>) -> PyRef<'_, Self> {
+        slf
+    }
+
+    fn __next__(mut slf: PyRefMut<'_, Self>) -> PyResult<Option<PyObject>> {
+        let py = slf.py();
+        let receiver = &mut slf.receiver;
+        let next = py.allow_threads(|| receiver.blocking_recv());
+
+        match next {
+            Some((_, item)) => {
+                let dict = PyDict::new_bound(py);
+                dict.set_item("title", item.title)?;
+                dict.set_item("url", item.url)?;
+                dict.set_item("content", item.content)?;
+                dict.set_item("known", item.known)?;
+                Ok(Some(dict.into_any().unbind()))
+            }
+            None => Ok(None),
         }
     }
+}
+
+fn fetch_options(
+    max_per_host: usize,
+    timeout_secs: f64,
+    cache_dir: Option<String>,
+    cache_days: u64,
+    known_urls: Option<Vec<String>>,
+    refresh: bool,
+    skip_known: bool,
+    sources: Option<Vec<String>>,
+) -> FetchOptions {
+    FetchOptions {
+        max_per_host,
+        timeout: Duration::from_secs_f64(timeout_secs),
+        cache: cache_dir
+            .as_deref()
+            .and_then(|dir| PageCache::new(dir, Duration::from_secs(cache_days * 24 * 3600))),
+        known: known_urls.unwrap_or_default().into_iter().collect(),
+        refresh,
+        sources: sources_or_default(sources),
+        skip_known,
+    }
+}
+
+fn to_json(items: &[NewsItem]) -> PyResult<String> {
+    serde_json::to_string(items).map_err(|e| PyRuntimeError::new_err(e.to_string()))
+}
+
+#[pyfunction]
+#[pyo3(signature = (timeout_secs=10.0, sources=None))]
+fn fetch_news(py: Python<'_>, timeout_secs: f64, sources: Option<Vec<String>>) -> PyResult<String> {
+    let timeout = Duration::from_secs_f64(timeout_secs);
+    let sources = sources_or_default(sources);
+    let results = py.allow_threads(|| runtime().block_on(collect_headlines(sources, timeout)));
+    to_json(&results)
+}
+
+/// Параллельный сбор статей: один пул соединений, лимит на хост,
+/// таймаут на запрос; GIL отпущен на всё время сбора.
+/// cache_dir — дисковый кэш страниц с условными запросами (ETag/Last-Modified),
+/// cache_days — записи кэша, не обновлявшиеся дольше, удаляются (0 — хранить всё),
+/// known_urls — статьи из БД, которые не скачиваются повторно (refresh=True — скачать всё заново).
+/// skip_known=True — только новые ссылки: известные не попадают в результат вовсе.
+/// sources — свои индексные страницы вместо DW/Tagesschau (бенчмарк на фикстурах).
+#[pyfunction]
+#[pyo3(signature = (max_per_host=4, timeout_secs=10.0, cache_dir=None, known_urls=None, refresh=false, skip_known=false, sources=None, cache_days=0))]
+fn fetch_full_articles(
+    py: Python<'_>,
+    max_per_host: usize,
+    timeout_secs: f64,
+    cache_dir: Option<String>,
+    known_urls: Option<Vec<String>>,
+    refresh: bool,
+    skip_known: bool,
+    sources: Option<Vec<String>>,
+    cache_days: u64,
+) -> PyResult<String> {
+    let opts = fetch_options(max_per_host, timeout_secs, cache_dir, cache_days, known_urls, refresh, skip_known, sources);
+    let results = py.allow_threads(|| {
+        runtime().block_on(async move {
+            let (tx, mut rx) = mpsc::channel(MAX_IN_FLIGHT);
+            let consume = async {
+                let mut items = Vec::new();
+                while let Some(item) = rx.recv().await {
+                    items.push(item);
+                }
+                items
+            };
+            let ((), mut items) = futures::join!(collect_articles(opts, tx), consume);
+
+            // порядок как на индексных страницах
+            items.sort_by_key(|(i, _)| *i);
+            items.into_iter().map(|(_, item)| item).collect::<Vec<_>>()
+        })
+    });
+    to_json(&results)
+}
 
-    println!("✅ Собрано статей: {}", results.len());
-    Ok(serde_json::to_string(&results).unwrap())
+/// Потоковый сбор статей: те же параметры, что у fetch_full_articles,
+/// но статьи (dict) отдаются итератором по мере скачивания страниц.
+/// buffer — сколько готовых статей может ждать в очереди (ограничивает память).
+#[pyfunction]
+#[pyo3(signature = (max_per_host=4, timeout_secs=10.0, cache_dir=None, known_urls=None, refresh=false, buffer=16, skip_known=false, sources=None, cache_days=0))]
+fn stream_articles(
+    max_per_host: usize,
+    timeout_secs: f64,
+    cache_dir: Option<String>,
+    known_urls: Option<Vec<String>>,
+    refresh: bool,
+    buffer: usize,
+    skip_known: bool,
+    sources: Option<Vec<String>>,
+    cache_days: u64,
+) -> ArticleStream {
+    let opts = fetch_options(max_per_host, timeout_secs, cache_dir, cache_days, known_urls, refresh, skip_known, sources);
+    let (tx, rx) = mpsc::channel(buffer.max(1));
+    runtime().spawn(collect_articles(opts, tx));
+    ArticleStream { receiver: rx }
 }
 
 #[pymodule]
 fn rust_core(_py: Python<'_>, m: &Bound<'_, PyModule>) -> PyResult<()> {
     m.add_function(wrap_pyfunction!(fetch_news, m)?)?;
     m.add_function(wrap_pyfunction!(fetch_full_articles, m)?)?;
+    m.add_function(wrap_pyfunction!(stream_articles, m)?)?;
+    m.add_class::<ArticleStream>()?;
     Ok(())
 }
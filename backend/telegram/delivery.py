@@ -0,0 +1,178 @@
+import asyncio
+import time
+from dataclasses import dataclass, field
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError, TelegramRetryAfter
+
+from backend.config import (
+    DELIVERY_CONCURRENCY,
+    DELIVERY_GLOBAL_RATE,
+    DELIVERY_PER_CHAT_RATE,
+    DELIVERY_MAX_RETRIES,
+)
+from backend.db.database import SessionLocal
+from backend.db.models import Subscriber
+from backend.metrics import metrics
+
+# Ошибки BadRequest, после которых чат считаем мёртвым
+_DEAD_CHAT_ERRORS = ("chat not found", "user is deactivated", "bot was kicked")
+
+
+class TokenBucket:
+    """Token bucket для asyncio: rate токенов в секунду, запас capacity"""
+
+    def __init__(self, rate: float, capacity: float | None = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+
+    async def acquire(self):
+        while True:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+@dataclass
+class DeliveryStats:
+    total: int = 0
+    sent: int = 0
+    failed: int = 0
+    retries: int = 0
+    removed: set = field(default_factory=set)
+    elapsed: float = 0.0
+
+    @property
+    def rate(self) -> float:
+        return self.sent / self.elapsed if self.elapsed else 0.0
+
+    def __str__(self):
+        return (
+            f"отправлено {self.sent}/{self.total}, ошибок {self.failed}, "
+            f"повторов {self.retries}, удалено подписчиков {len(self.removed)}, "
+            f"{self.elapsed:.1f} c ({self.rate:.1f} сообщ./с)"
+        )
+
+
+class DeliveryEngine:
+    """
+    Параллельная рассылка с учётом лимитов Telegram:
+    - не больше concurrency отправок одновременно
+    - общий и поканальный token bucket
+    - RetryAfter: ждём столько, сколько сказал сервер (вся рассылка на паузе)
+    - подписчики, заблокировавшие бота, удаляются из БД
+    """
+
+    def __init__(
+        self,
+        bot: Bot,
+        session_maker=SessionLocal,
+        concurrency: int = DELIVERY_CONCURRENCY,
+        global_rate: float = DELIVERY_GLOBAL_RATE,
+        per_chat_rate: float = DELIVERY_PER_CHAT_RATE,
+        max_retries: int = DELIVERY_MAX_RETRIES,
+    ):
+        self.bot = bot
+        self._session_maker = session_maker
+        self._concurrency = max(1, concurrency)
+        self._global_bucket = TokenBucket(global_rate)
+        self._per_chat_rate = per_chat_rate
+        self._chat_buckets = {}
+        self.max_retries = max_retries
+        self._paused_until = 0.0
+
+    def _chat_bucket(self, chat_id) -> TokenBucket:
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            bucket = self._chat_buckets[chat_id] = TokenBucket(self._per_chat_rate, capacity=1)
+        return bucket
+
+    async def _wait_pause(self):
+        delay = self._paused_until - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def _send_one(self, chat_id, text: str, kwargs: dict, stats: DeliveryStats) -> bool:
+        """Одно сообщение с повторами; True — чат мёртв, дальше ему не пишем"""
+        for attempt in range(self.max_retries + 1):
+            await self._wait_pause()
+            await self._chat_bucket(chat_id).acquire()
+            await self._global_bucket.acquire()
+            try:
+                with metrics.stage("telegram_send"):
+                    await self.bot.send_message(int(chat_id), text, **kwargs)
+                stats.sent += 1
+                return False
+            except TelegramRetryAfter as e:
+                stats.retries += 1
+                self._paused_until = max(self._paused_until, time.monotonic() + e.retry_after)
+                print(f"⏸️ Flood control: пауза {e.retry_after} c")
+            except TelegramForbiddenError:
+                stats.removed.add(str(chat_id))
+                stats.failed += 1
+                return True
+            except TelegramBadRequest as e:
+                stats.failed += 1
+                if any(err in str(e).lower() for err in _DEAD_CHAT_ERRORS):
+                    stats.removed.add(str(chat_id))
+                    return True
+                print(f"Ошибка при отправке {chat_id}: {e}")
+                return False
+            except Exception as e:
+                print(f"Ошибка при отправке {chat_id}: {e}")
+                stats.failed += 1
+                return False
+
+        print(f"Ошибка при отправке {chat_id}: исчерпаны повторы")
+        stats.failed += 1
+        return False
+
+    async def deliver_many(self, messages: list[tuple[str, str]], **kwargs) -> DeliveryStats:
+        """
+        Рассылает пары (chat_id, текст). Несколько сообщений одному чату
+        (части длинной сводки) уходят по очереди в одном обработчике —
+        порядок сохраняется и после паузы RetryAfter.
+        """
+        stats = DeliveryStats(total=len(messages))
+        started = time.monotonic()
+        semaphore = asyncio.Semaphore(self._concurrency)
+
+        by_chat = {}
+        for chat_id, text in messages:
+            by_chat.setdefault(chat_id, []).append(text)
+
+        async def worker(chat_id, texts):
+            async with semaphore:
+                for i, text in enumerate(texts):
+                    if await self._send_one(chat_id, text, kwargs, stats):
+                        # чат заблокировал бота — остальные части не отправляем
+                        stats.failed += len(texts) - i - 1
+                        return
+
+        await asyncio.gather(*(worker(chat_id, texts) for chat_id, texts in by_chat.items()))
+        stats.elapsed = time.monotonic() - started
+
+        if stats.removed:
+            self._remove_subscribers(stats.removed)
+        return stats
+
+    async def deliver(self, chat_ids: list[str], text: str, **kwargs) -> DeliveryStats:
+        """Один и тот же текст всем chat_ids"""
+        return await self.deliver_many([(chat_id, text) for chat_id in chat_ids], **kwargs)
+
+    def _remove_subscribers(self, chat_ids: set[str]):
+        session = self._session_maker()
+        try:
+            session.query(Subscriber).filter(
+                Subscriber.chat_id.in_(chat_ids)
+            ).delete(synchronize_session=False)
+            session.commit()
+            print(f"🧹 Удалены подписчики, заблокировавшие бота: {len(chat_ids)}")
+        finally:
+            session.close()
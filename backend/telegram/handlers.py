@@ -1,17 +1,33 @@
+import asyncio
 from aiogram import Router, types
 from aiogram.filters import Command
+from sqlalchemy import text
 from backend.ai_module.pipeline import (
-    process_news_pipeline,
-    process_smart_pipeline,
-    process_multilang_pipeline,
+    process_news_pipeline_async,
+    process_smart_pipeline_async,
+    process_multilang_pipeline_async,
+    get_fresh_digest,
+    pipeline_flights,
     list_categories,
     get_news_by_category
 )
+from backend.ai_module.executor import QueueFullError
+from backend.ai_module.cache import summary_cache
+from backend.ai_module.registry import model_registry
+from backend.config import ADMIN_IDS
+from backend.metrics import metrics
+from backend.ai_module.search import search_articles, rebuild_index
+from backend.ai_module.incremental import load_watermark
+from backend.ai_module.personal import ALL_CATEGORIES, LANGS, Preferences, parse_categories
+from backend.config import PERSONAL_DIGEST_MAX_SIZE
 from backend.db.database import SessionLocal
 from backend.db.models import Subscriber
 
 router = Router()
 
+QUEUE_FULL_TEXT = "⏳ Сейчас слишком много запросов, очередь заполнена. Попробуй через минуту."
+TIMEOUT_TEXT = "⌛ Обработка заняла слишком много времени. Попробуй позже."
+
 
 # --- /start ---
 @router.message(Command("start"))
@@ -23,48 +39,153 @@ async def start_cmd(message: types.Message):
         "👉 /news — короткая сводка\n"
         "👉 /smartnews — подробный анализ\n"
         "👉 /multilangnews — новости на 3 языках (DE/EN/RU)\n"
+        "👉 /search <слова> — поиск по сохранённым статьям (старые — по заголовку и выжимке)\n"
         "👉 /subscribe — получать автообновления каждые 2 часа\n"
+        "👉 /prefs — настройки сводки (категории, язык, размер)\n"
         "👉 /unsubscribe — отменить подписку",
         parse_mode="Markdown"
     )
 
 
+async def _send_result(message: types.Message, result: str, **kwargs):
+    with metrics.stage("telegram_send"):
+        await message.answer(result, **kwargs)
+
+
 # --- /news ---
 @router.message(Command("news"))
 async def news_cmd(message: types.Message):
-    await message.answer("🦀 Собираю новости...")
-    try:
-        result = process_news_pipeline()
-        if not result or not result.strip():
-            await message.answer(
-                "⚠️ Не удалось сформировать новости — возможно, источники временно недоступны."
-            )
-        else:
-            await message.answer(result, parse_mode="Markdown")
-    except Exception as e:
-        await message.answer(f"⚠️ Ошибка при обработке: {e}")
+    with metrics.command("news"):
+        try:
+            result = get_fresh_digest("news")
+            if result is None:
+                await message.answer("🦀 Собираю новости...")
+                result = await process_news_pipeline_async()
+            if not result or not result.strip():
+                await message.answer(
+                    "⚠️ Не удалось сформировать новости — возможно, источники временно недоступны."
+                )
+            else:
+                await _send_result(message, result, parse_mode="Markdown")
+        except QueueFullError:
+            await message.answer(QUEUE_FULL_TEXT)
+        except asyncio.TimeoutError:
+            await message.answer(TIMEOUT_TEXT)
+        except Exception as e:
+            await message.answer(f"⚠️ Ошибка при обработке: {e}")
 
 
 # --- /smartnews ---
 @router.message(Command("smartnews"))
 async def smartnews_cmd(message: types.Message):
-    await message.answer("🧠 Секунду, я собираю и анализирую новости...")
-    try:
-        result = process_smart_pipeline()
-        await message.answer(result, parse_mode="Markdown")
-    except Exception as e:
-        await message.answer(f"⚠️ Ошибка при обработке: {e}")
+    with metrics.command("smart"):
+        try:
+            result = get_fresh_digest("smart")
+            if result is None:
+                await message.answer("🧠 Секунду, я собираю и анализирую новости...")
+                result = await process_smart_pipeline_async()
+            await _send_result(message, result, parse_mode="Markdown")
+        except QueueFullError:
+            await message.answer(QUEUE_FULL_TEXT)
+        except asyncio.TimeoutError:
+            await message.answer(TIMEOUT_TEXT)
+        except Exception as e:
+            await message.answer(f"⚠️ Ошибка при обработке: {e}")
 
 
 # --- /multilangnews ---
 @router.message(Command("multilangnews"))
 async def multilang_cmd(message: types.Message):
-    await message.answer("🌍 Собираю и перевожу новости...")
+    with metrics.command("multilang"):
+        try:
+            result = get_fresh_digest("multilang")
+            if result is None:
+                await message.answer("🌍 Собираю и перевожу новости...")
+                result = await process_multilang_pipeline_async()
+            await _send_result(message, result, parse_mode="Markdown")
+        except QueueFullError:
+            await message.answer(QUEUE_FULL_TEXT)
+        except asyncio.TimeoutError:
+            await message.answer(TIMEOUT_TEXT)
+        except Exception as e:
+            await message.answer(f"⚠️ Ошибка при обработке: {e}")
+
+
+# --- /stats (только для ADMIN_IDS) ---
+def is_admin(message: types.Message) -> bool:
+    return message.from_user is not None and str(message.from_user.id) in ADMIN_IDS
+
+
+@router.message(Command("stats"))
+async def stats_cmd(message: types.Message):
+    if not is_admin(message):
+        return
+
+    lines = ["📈 Время стадий:"]
+    lines += metrics.summary_lines() or ["  пока нет замеров" if metrics.enabled else "  метрики выключены"]
+    lines.append(f"\n🧮 Кэш выжимок: {summary_cache.stats_line()}")
+    lines.append(f"🔗 Склейка запросов: {pipeline_flights.stats_line()}")
+
+    crawl = await asyncio.to_thread(load_watermark)
+    if crawl is None:
+        lines.append("🦀 Сбор: ещё не было прогонов")
+    else:
+        at = f"{crawl['at']:%Y-%m-%d %H:%M} UTC" if crawl.get("at") else "?"
+        lines.append(
+            f"🦀 Последний сбор: {at} — новых {crawl.get('new', 0)}, "
+            f"дублей {crawl.get('duplicates', 0)}, без текста {crawl.get('rejected', 0)}"
+        )
+
+    models = []
+    for name, info in model_registry.stats().items():
+        state = "загружена" if info["loaded"] else "не загружена"
+        backend = f" [{info['backend']}]" if info.get("backend") else ""
+        models.append(f"  {name}{backend}: {state}, загрузок {info.get('loads', 0)}")
+    lines += ["🧠 Модели:"] + models
+
+    await message.answer("\n".join(lines))
+
+
+# --- /search ---
+@router.message(Command("search"))
+async def search_cmd(message: types.Message):
+    parts = (message.text or "").split(maxsplit=1)
+    if len(parts) < 2:
+        await message.answer("Использование: /search Bundestag Haushalt")
+        return
+
+    with metrics.command("search"), metrics.stage("search"):
+        try:
+            # FTS-запрос синхронный — в поток, чтобы не держать event loop
+            results = await asyncio.to_thread(search_articles, parts[1], 5)
+        except Exception as e:
+            await message.answer(f"⚠️ Ошибка поиска: {e}")
+            return
+
+    if not results:
+        await message.answer(f"🔎 Ничего не найдено: {parts[1]}")
+        return
+
+    # без parse_mode: во фрагментах статей может быть что угодно.
+    # Текст старых статей в архиве — они находятся по заголовку и выжимке
+    reply = f"🔎 Найдено по запросу «{parts[1]}»:\n\n" + "\n\n".join(
+        f"{'🗄️' if r['archived'] else '🗞️'} {r['title']}\n{r['snippet']}\n🔗 {r['url']}" for r in results
+    )
+    await message.answer(reply, disable_web_page_preview=True)
+
+
+# --- /reindex (только для ADMIN_IDS) ---
+@router.message(Command("reindex"))
+async def reindex_cmd(message: types.Message):
+    if not is_admin(message):
+        return
+    await message.answer("🔧 Пересобираю поисковый индекс...")
     try:
-        result = process_multilang_pipeline()
-        await message.answer(result, parse_mode="Markdown")
+        seconds = await asyncio.to_thread(rebuild_index)
     except Exception as e:
-        await message.answer(f"⚠️ Ошибка при обработке: {e}")
+        await message.answer(f"⚠️ Ошибка пересборки индекса: {e}")
+        return
+    await message.answer(f"✅ Индекс пересобран за {seconds:.1f} c")
 
 
 # --- /subscribe ---
@@ -85,6 +206,54 @@ async def subscribe_cmd(message: types.Message):
         session.close()
 
 
+# --- /prefs ---
+PREFS_HELP = (
+    "Настройки автосводки:\n"
+    "/prefs — текущие\n"
+    f"/prefs categories economy tech — только эти категории ({', '.join(ALL_CATEGORIES)}; all — все)\n"
+    f"/prefs lang en — язык выжимок ({', '.join(LANGS)})\n"
+    f"/prefs size 3 — статей в сводке (1–{PERSONAL_DIGEST_MAX_SIZE})"
+)
+
+
+@router.message(Command("prefs"))
+async def prefs_cmd(message: types.Message):
+    args = (message.text or "").split()[1:]
+    session = SessionLocal()
+    try:
+        sub = session.query(Subscriber).filter(
+            Subscriber.chat_id == str(message.chat.id)
+        ).first()
+        if sub is None:
+            await message.answer("Сначала подпишись: /subscribe")
+            return
+
+        if not args:
+            await message.answer(f"⚙️ {Preferences.from_subscriber(sub).describe()}\n\n{PREFS_HELP}")
+            return
+
+        option, values = args[0].lower(), args[1:]
+        if option == "categories":
+            categories = parse_categories(values)
+            if categories is None:
+                await message.answer(f"⚠️ Неизвестная категория. Доступны: {', '.join(ALL_CATEGORIES)}")
+                return
+            sub.categories = ",".join(categories)
+        elif option == "lang" and values and values[0].lower() in LANGS:
+            sub.lang = values[0].lower()
+        elif option == "size" and values and values[0].isdigit() \
+                and 1 <= int(values[0]) <= PERSONAL_DIGEST_MAX_SIZE:
+            sub.digest_size = int(values[0])
+        else:
+            await message.answer(PREFS_HELP)
+            return
+
+        session.commit()
+        await message.answer(f"✅ Сохранено. {Preferences.from_subscriber(sub).describe()}")
+    finally:
+        session.close()
+
+
 # --- /unsubscribe ---
 @router.message(Command("unsubscribe"))
 async def unsubscribe_cmd(message: types.Message):
@@ -106,12 +275,12 @@ async def send_category_news(message, category):
     session = SessionLocal()
     try:
         rows = session.execute(
-            f"""
+            text("""
             SELECT title, url FROM articles
             WHERE category = :cat
             ORDER BY created_at DESC
             LIMIT 5
-            """
+            """)
         , {"cat": category}).fetchall()
     finally:
         session.close()
@@ -120,8 +289,8 @@ async def send_category_news(message, category):
         await message.answer(f"⚠️ Нет новостей категории '{category}'.")
         return
 
-    text = "\n\n".join([f"🗞️ {r[0]}\n🔗 {r[1]}" for r in rows])
-    await message.answer(text)
+    reply = "\n\n".join([f"🗞️ {r[0]}\n🔗 {r[1]}" for r in rows])
+    await message.answer(reply)
 
 @router.message(Command("categories"))
 async def categories_cmd(message: types.Message):